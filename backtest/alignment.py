@@ -0,0 +1,70 @@
+from functools import reduce
+import numpy as np
+import pandas as pd
+from tracing import traced
+
+# 날짜 정렬 정책
+#   'inner'  : 모든 종목에 공통으로 있는 날짜만 사용 (기존 동작)
+#   'outer'  : 모든 종목의 날짜 합집합을 forward-fill 하되, 가장 늦게 상장한 종목의 첫 날짜부터 사용
+#   'listing': 날짜 합집합을 forward-fill 하고 상장 전 구간은 NaN으로 유지
+#              (엔진은 리밸런싱 시점에 상장된 종목끼리 비중을 재배분하므로, 신규 종목이 전체 기간을 자르지 않음)
+ALIGN_POLICIES = ('inner', 'outer', 'listing')
+
+def to_epoch(index: pd.DatetimeIndex) -> np.ndarray:
+    """DatetimeIndex를 int64 epoch(ns) 배열로 변환합니다. (단위만 맞추고 값은 복사하지 않음)"""
+    return index.values.astype('datetime64[ns]', copy=False).view(np.int64)
+
+def intersect_sorted(arrays: list) -> np.ndarray:
+    """정렬된 int64 배열들의 교집합 (짧은 배열부터 차례로 교집합하여 중간 결과를 최소화)."""
+    arrays = sorted(arrays, key=len)
+    return reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), arrays)
+
+def union_sorted(arrays: list) -> np.ndarray:
+    """정렬된 int64 배열들의 합집합."""
+    return np.unique(np.concatenate(arrays))
+
+def forward_fill(matrix: np.ndarray) -> np.ndarray:
+    """(날짜 × 종목) 행렬의 NaN을 열마다 직전 값으로 채웁니다. (첫 값 이전의 NaN은 그대로, 제자리 수정)"""
+    valid = ~np.isnan(matrix)
+    rows = np.where(valid, np.arange(len(matrix))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    matrix[:] = matrix[rows, np.arange(matrix.shape[1])]
+    return matrix
+
+@traced("backtest.align_prices")
+def align_prices(series_dict: dict, symbols: list, how: str = 'inner') -> tuple:
+    """
+    종목별 가격 시계열을 하나의 (날짜 × 종목) float64 행렬로 정렬합니다.
+    날짜 비교는 Timestamp 집합 대신 정렬된 int64 epoch 배열의 교집합/합집합과 searchsorted로 수행합니다.
+
+    :param series_dict: {종목코드: 가격 Series (index: Date)}
+    :param symbols: 행렬의 열 순서가 될 종목 코드 리스트
+    :param how: 정렬 정책 ('inner', 'outer', 'listing')
+    :return: (DatetimeIndex, (날짜 × 종목) 가격 행렬)
+    """
+    if how not in ALIGN_POLICIES:
+        raise ValueError(f"how는 {ALIGN_POLICIES} 중 하나여야 합니다.")
+    epochs = []
+    values = []
+    for symbol in symbols:
+        series = series_dict[symbol]
+        if not series.index.is_monotonic_increasing or series.index.has_duplicates:
+            series = series[~series.index.duplicated(keep='last')].sort_index()
+        epochs.append(to_epoch(series.index))
+        values.append(series.to_numpy(dtype=np.float64))
+
+    calendar = intersect_sorted(epochs) if how == 'inner' else union_sorted(epochs)
+    matrix = np.full((len(calendar), len(symbols)), np.nan)
+    for j, (epoch, value) in enumerate(zip(epochs, values)):
+        if how == 'inner':
+            matrix[:, j] = value[np.searchsorted(epoch, calendar)]
+        else:
+            matrix[np.searchsorted(calendar, epoch), j] = value
+
+    if how != 'inner':
+        forward_fill(matrix)
+        if how == 'outer' and len(matrix):
+            first_row = int(np.argmax(~np.isnan(matrix), axis=0).max())
+            calendar = calendar[first_row:]
+            matrix = matrix[first_row:]
+    return pd.DatetimeIndex(calendar.view('datetime64[ns]'), name='Date'), matrix
@@ -1,8 +1,9 @@
 import os
-import sqlite3
 import pandas as pd
 import yfinance as yf
 from datetime import datetime, timedelta
+import price_store
+import price_cache
 
 # 데이터베이스 파일 경로 (backtest 폴더 내에 data.db)
 DB_PATH = os.path.join(os.path.dirname(__file__), 'data.db')
@@ -26,14 +27,43 @@ def download_data(symbol: str, start_date: str = None, end_date: str = None, int
     df.columns = [x[0] for x in df.columns]
     return df
 
+def download_many(symbols: list, start_date: str = None, end_date: str = None, interval: str = '1d') -> dict:
+    """
+    Yahoo Finance에서 여러 종목의 데이터를 한 번의 요청으로 다운로드합니다.
+    (data_sync.sync_universe의 기본 provider; 날짜 기본값은 download_data와 동일)
+    :param symbols: 종목 코드 리스트
+    :return: {종목코드: DataFrame} (데이터가 없는 종목은 빈 DataFrame)
+    """
+    if end_date is None:
+        end_date = (datetime.today() - timedelta(days=1)).strftime('%Y-%m-%d')
+    if start_date is None:
+        start_date = (datetime.today() - timedelta(days=365*10)).strftime('%Y-%m-%d')
+
+    df = yf.download(list(symbols), start=start_date, end=end_date, interval=interval,
+                     group_by='ticker', threads=False, progress=False)
+    frames = {}
+    for symbol in symbols:
+        if df.empty or symbol not in df.columns.get_level_values(0):
+            frames[symbol] = pd.DataFrame()
+            continue
+        frame = df[symbol].dropna(how='all')
+        frame.index = pd.to_datetime(frame.index)
+        frames[symbol] = frame
+    return frames
+
 def save_data_to_db(df: pd.DataFrame, symbol: str, db_path: str = DB_PATH) -> None:
     """
     DataFrame을 SQLite3 데이터베이스에 저장합니다.
-    테이블 이름은 'stock_data'이며, Symbol과 Date를 기본 키로 사용합니다.
+    테이블 이름은 'prices'이며, symbol과 date를 기본 키로 사용합니다. (이미 있는 날짜는 갱신)
+    갱신된 기간이 컬럼 캐시에 이미 포함되어 있으면 해당 종목의 캐시를 무효화합니다.
     :param df: 저장할 DataFrame (index는 Date여야 함)
-    :param symbol: 종목 코드 (파일명에 사용)
+    :param symbol: 종목 코드
     :param db_path: SQLite DB 파일 경로
     """
-    conn = sqlite3.connect(db_path)
-    df.to_sql(symbol, conn, if_exists='append')
-    conn.close()
+    conn = price_store.connect(db_path)
+    try:
+        price_store.upsert_prices(conn, symbol, df)
+    finally:
+        conn.close()
+    if not df.empty:
+        price_cache.invalidate(symbol, df.index.min(), db_path)
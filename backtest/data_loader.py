@@ -1,46 +1,57 @@
-import os
-import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
+import price_store
+import price_cache
+from tracing import traced
 from data_downloader import download_data, save_data_to_db, DB_PATH
 
-def load_data(symbol: str, db_path: str = DB_PATH) -> pd.DataFrame:
+@traced("backtest.load_data")
+def load_data(symbol: str, db_path: str = DB_PATH, use_cache: bool = True,
+              start=None, end=None, columns: list = None) -> pd.DataFrame:
     """
     SQLite3 데이터베이스에서 symbol 데이터를 불러옵니다.
     데이터가 없으면 다운로드 후 저장하며, 최신 데이터(어제까지)가 누락된 경우 추가 다운로드하여 업데이트합니다.
+    최신 여부는 마지막 저장 날짜만 인덱스로 확인하고, 갱신 후 필요한 기간/컬럼만 읽습니다.
     :param symbol: 종목 코드 (예: 'TSLA')
     :param db_path: SQLite DB 파일 경로
+    :param use_cache: True이고 pyarrow가 설치되어 있으면 DB 옆의 Arrow 컬럼 캐시(memory-map)를 통해 읽음
+    :param start: 시작 날짜 (YYYY-MM-DD 또는 datetime, 포함), None이면 전체 기간
+    :param end: 종료 날짜 (YYYY-MM-DD 또는 datetime, 포함), None이면 마지막 날짜까지
+    :param columns: 읽을 컬럼 목록 (예: ['Close']), None이면 전체 (Close, High, Low, Open, Volume)
     :return: 최신 데이터가 반영된 DataFrame (index: Date)
     """
-    conn = sqlite3.connect(db_path)
-    query = f"SELECT * FROM '{symbol}'"
+    conn = price_store.connect(db_path)
     try:
-        df = pd.read_sql(query, conn, index_col='Date')
-        df.index = pd.to_datetime(df.index)
-    except Exception as e:
-        print(f"Error loading data for {symbol}: {e}")
-        df = pd.DataFrame()
-    conn.close()
-    
+        last_date = price_store.last_dates(conn, [symbol]).get(symbol)
+    finally:
+        conn.close()
+
     today = datetime.today() - timedelta(hours=9)
     yesterday = today - timedelta(days=1)
-    
-    if df.empty:
+
+    if last_date is None:
         # 데이터가 없으면 전체 데이터를 다운로드 후 저장
-        df = download_data(symbol)
-        save_data_to_db(df, symbol, db_path)
+        save_data_to_db(download_data(symbol), symbol, db_path)
     else:
-        last_date = df.index.max()
+        last_date = pd.Timestamp(last_date)
         # 만약 마지막 날짜가 어제보다 이전이면, 누락된 기간 데이터 다운로드
         if last_date < yesterday.replace(hour=0, minute=0, second=0, microsecond=0):
             start_date = (last_date + timedelta(days=1)).strftime('%Y-%m-%d')
             end_date = yesterday.strftime('%Y-%m-%d')
             new_df = download_data(symbol, start_date=start_date, end_date=end_date)
             if not new_df.empty:
-                # 기존 데이터와 합치기 전에 중복 제거
-                df = pd.concat([df, new_df])
-                df = df[~df.index.duplicated(keep='last')]
-                df.sort_index(inplace=True)
-                # 새로운 데이터만 DB에 저장 (중복은 기본키 제약에 의해 무시됨)
+                # 새로운 데이터만 DB에 저장 (중복 날짜는 기본키 기준으로 upsert)
                 save_data_to_db(new_df, symbol, db_path)
+
+    conn = price_store.connect(db_path)
+    try:
+        if use_cache and price_cache.is_available():
+            df = price_cache.read_symbol(conn, symbol, db_path, start, end, columns)
+        else:
+            df = price_store.read_symbol(conn, symbol, start, end, columns)
+    except Exception as e:
+        print(f"Error loading data for {symbol}: {e}")
+        df = pd.DataFrame()
+    finally:
+        conn.close()
     return df
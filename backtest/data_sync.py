@@ -0,0 +1,161 @@
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import price_store
+import price_cache
+from data_downloader import DB_PATH
+
+def missing_ranges(conn, symbols: list, today: datetime = None, history_days: int = 365*10) -> dict:
+    """
+    종목별로 저장소에 없는 기간(마지막 저장일 다음 날 ~ 어제)을 계산합니다.
+    데이터가 없는 종목은 history_days 전부터, 이미 최신인 종목은 결과에서 제외합니다.
+    :param conn: 가격 DB 연결 (price_store.connect)
+    :param symbols: 종목 코드 리스트
+    :param today: 기준 시각 (기본: 현재, load_data와 같이 9시간을 빼서 미국 장 기준으로 맞춤)
+    :param history_days: 신규 종목의 다운로드 기간(일)
+    :return: {종목코드: (start_date, end_date)} (YYYY-MM-DD)
+    """
+    if today is None:
+        today = datetime.today() - timedelta(hours=9)
+    yesterday = (today - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    end_date = yesterday.strftime('%Y-%m-%d')
+    stored = price_store.last_dates(conn, symbols)
+    ranges = {}
+    for symbol in symbols:
+        if symbol not in stored:
+            ranges[symbol] = ((today - timedelta(days=history_days)).strftime('%Y-%m-%d'), end_date)
+            continue
+        last_date = pd.Timestamp(stored[symbol])
+        if last_date < yesterday:
+            ranges[symbol] = ((last_date + timedelta(days=1)).strftime('%Y-%m-%d'), end_date)
+    return ranges
+
+def plan_batches(ranges: dict, batch_size: int = 20) -> list:
+    """
+    같은 기간이 필요한 종목끼리 묶어 batch_size 이하의 다중 종목 요청 목록을 만듭니다.
+    :return: [(start_date, end_date, [종목코드, ...]), ...]
+    """
+    groups = {}
+    for symbol, date_range in ranges.items():
+        groups.setdefault(date_range, []).append(symbol)
+    batches = []
+    for (start_date, end_date), symbols in sorted(groups.items()):
+        for i in range(0, len(symbols), batch_size):
+            batches.append((start_date, end_date, symbols[i:i + batch_size]))
+    return batches
+
+def sync_universe(symbols: list, db_path: str = DB_PATH, provider=None, max_workers: int = 4,
+                  batch_size: int = 20, today: datetime = None) -> pd.DataFrame:
+    """
+    여러 종목의 누락 데이터를 한 번에 동기화합니다.
+      1. 저장소에서 종목별 누락 기간을 계산하고
+      2. 같은 기간의 종목을 묶어 다중 종목 요청으로 만들어
+      3. 제한된 스레드 풀에서 병렬로 가져온 뒤
+      4. 배치마다 하나의 트랜잭션으로 저장합니다. (쓰기는 호출 스레드에서만 수행)
+
+    :param symbols: 종목 코드 리스트
+    :param db_path: SQLite DB 파일 경로
+    :param provider: fetch(symbols, start_date, end_date) -> {종목코드: DataFrame} 형태의 callable
+                     (기본: data_downloader.download_many, 테스트에서는 가짜 provider 주입)
+    :param max_workers: 동시에 실행할 최대 요청 수
+    :param batch_size: 요청 하나에 묶을 최대 종목 수
+    :param today: 기준 시각 (기본: 현재)
+    :return: 종목별 동기화 결과 DataFrame
+             (컬럼: symbol, start, end, rows, fetch_sec, write_sec, error)
+    """
+    if provider is None:
+        from data_downloader import download_many
+        provider = download_many
+
+    conn = price_store.connect(db_path)
+    report = []
+    try:
+        batches = plan_batches(missing_ranges(conn, symbols, today), batch_size)
+
+        def fetch(batch):
+            start_date, end_date, batch_symbols = batch
+            started = time.perf_counter()
+            return provider(batch_symbols, start_date, end_date), time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                start_date, end_date, batch_symbols = futures[future]
+                try:
+                    frames, fetch_sec = future.result()
+                except Exception as e:
+                    report.extend({'symbol': symbol, 'start': start_date, 'end': end_date, 'rows': 0,
+                                   'fetch_sec': None, 'write_sec': None, 'error': str(e)}
+                                  for symbol in batch_symbols)
+                    continue
+                started = time.perf_counter()
+                price_store.upsert_many(conn, {symbol: frames.get(symbol, pd.DataFrame())
+                                               for symbol in batch_symbols})
+                write_sec = time.perf_counter() - started
+                for symbol in batch_symbols:
+                    frame = frames.get(symbol, pd.DataFrame())
+                    if not frame.empty:
+                        price_cache.invalidate(symbol, frame.index.min(), db_path)
+                    report.append({'symbol': symbol, 'start': start_date, 'end': end_date,
+                                   'rows': len(frame), 'fetch_sec': fetch_sec, 'write_sec': write_sec,
+                                   'error': None})
+    finally:
+        conn.close()
+    return pd.DataFrame(report, columns=['symbol', 'start', 'end', 'rows', 'fetch_sec', 'write_sec', 'error'])
+
+def fake_provider(symbols: list, start_date: str, end_date: str, latency: float = 0.2) -> dict:
+    """네트워크 없이 합성 OHLCV 데이터를 돌려주는 provider (테스트/벤치마크용)."""
+    import numpy as np
+
+    time.sleep(latency)  # 요청 지연 흉내
+    index = pd.bdate_range(start_date, end_date, name='Date')
+    frames = {}
+    for symbol in symbols:
+        rng = np.random.default_rng(sum(map(ord, symbol)))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index))))
+        frames[symbol] = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                                       'Close': close, 'Volume': 1000}, index=index)
+    return frames
+
+# 단독 실행: config.yaml(또는 인자로 받은) 종목을 일괄 동기화
+#   python data_sync.py [TSLA JPM ...] [--workers 4] [--batch-size 20]
+#   python data_sync.py --demo   (가짜 provider로 임시 DB에 100종목 동기화)
+def main(argv: list = None) -> None:
+    """
+    명령행에서 종목 데이터를 동기화합니다. (python main.py sync-data 에서도 사용)
+    :param argv: 명령행 인자 (None이면 sys.argv)
+    """
+    import argparse
+    import os
+    import tempfile
+    import yaml
+
+    parser = argparse.ArgumentParser(description="백테스트 종목 데이터 일괄 동기화")
+    parser.add_argument('symbols', nargs='*', help="동기화할 종목 (기본: config.yaml의 stocks)")
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--demo', action='store_true', help="가짜 provider와 임시 DB로 실행")
+    args = parser.parse_args(argv)
+
+    if args.demo:
+        with tempfile.TemporaryDirectory() as tmp:
+            universe = [f"S{i:03d}" for i in range(100)]
+            db_path = os.path.join(tmp, 'data.db')
+            started = time.perf_counter()
+            result = sync_universe(universe, db_path, fake_provider, args.workers, args.batch_size)
+            print(f"초기 동기화: {len(result)}종목, {result['rows'].sum()}행, {time.perf_counter() - started:.2f}초")
+            result = sync_universe(universe, db_path, fake_provider, args.workers, args.batch_size)
+            print(f"재실행 (누락 없음): {len(result)}종목")
+    else:
+        symbols = args.symbols
+        if not symbols:
+            with open(args.config, 'r', encoding='utf-8') as f:
+                symbols = list(yaml.safe_load(f).get('stocks', {}))
+        result = sync_universe(symbols, args.db, max_workers=args.workers, batch_size=args.batch_size)
+        print(result.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
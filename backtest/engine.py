@@ -0,0 +1,402 @@
+import numpy as np
+import pandas as pd
+from tracing import traced
+
+# 리밸런싱 주기 매핑: 입력은 'd', 'w', 'm'을 pandas period alias로 변환하여 사용
+FREQ_MAP = {'d': 'D', 'w': 'W', 'm': 'M'}
+
+def resolve_freq_alias(rebalance_freq: str) -> str:
+    """
+    리밸런싱 주기 문자열('d', 'w', 'm', 대소문자 무관)을 pandas period alias로 변환합니다.
+    :param rebalance_freq: 리밸런싱 주기 ('d', 'w', 'm')
+    :return: period alias ('D', 'W', 'M')
+    """
+    rebalance_freq = rebalance_freq.lower()
+    if rebalance_freq not in FREQ_MAP:
+        raise ValueError("rebalance_freq는 'd', 'w', 'm' 중 하나여야 합니다.")
+    return FREQ_MAP[rebalance_freq]
+
+def build_price_matrix(data_dict: dict, symbols: list) -> np.ndarray:
+    """
+    종목별 DataFrame(컬럼명: symbol)을 (날짜 × 종목) float64 행렬로 배치합니다.
+    모든 DataFrame은 이미 같은 날짜 index로 정렬되어 있어야 합니다.
+    :param data_dict: {종목코드: DataFrame} (index: Date, 컬럼: symbol)
+    :param symbols: 행렬의 열 순서가 될 종목 코드 리스트
+    :return: shape (len(index), len(symbols))의 가격 행렬
+    """
+    return np.column_stack([data_dict[symbol][symbol].to_numpy(dtype=np.float64) for symbol in symbols])
+
+def rebalance_mask(index: pd.DatetimeIndex, freq_alias: str) -> np.ndarray:
+    """
+    각 기간(freq_alias)의 첫 거래일에 True가 되는 boolean mask를 반환합니다.
+    :param index: 공통 날짜 index
+    :param freq_alias: period alias ('D', 'W', 'M')
+    :return: shape (len(index),)의 boolean 배열
+    """
+    return ~index.to_period(freq_alias).duplicated()
+
+# drift band 기준: 'absolute'는 |현재 비중 - 목표 비중| (비중 %p), 'relative'는 목표 비중 대비 비율
+BAND_MODES = ('absolute', 'relative')
+
+def _band_deviation(held: np.ndarray, prices: np.ndarray, weights: np.ndarray, mode: str) -> np.ndarray:
+    """
+    보유 수량(held)의 날짜별 비중과 목표 비중의 최대 차이를 계산합니다.
+    목표 비중은 그 날짜에 가격이 있는(상장된) 종목끼리 비례 확대한 비중입니다.
+    :param held: 종목별 보유 수량
+    :param prices: (날짜 × 종목) 가격 행렬
+    :return: 날짜별 최대 비중 차이
+    """
+    listed = ~np.isnan(prices)
+    holdings = held * np.nan_to_num(prices)
+    value = holdings.sum(axis=1, keepdims=True)
+    current = np.divide(holdings, value, out=np.zeros_like(holdings), where=value > 0)
+    target = weights * listed
+    invested = target.sum(axis=1, keepdims=True)
+    target = np.divide(target, invested, out=np.zeros_like(target), where=invested > 0)
+    deviation = np.abs(current - target)
+    if mode == 'relative':
+        deviation = np.divide(deviation, target, out=np.zeros_like(deviation), where=target > 0)
+    return deviation.max(axis=1)
+
+@traced("engine.drift_band_mask")
+def drift_band_mask(prices: np.ndarray, weights: np.ndarray, band: float, mode: str = 'absolute',
+                    check_mask: np.ndarray = None, lookahead: int = 256) -> np.ndarray:
+    """
+    비중 이탈(drift band) 기준 리밸런싱 날짜 mask를 계산합니다.
+    리밸런싱 후 보유 수량이 고정된 동안의 비중 경로를 구간 단위 배열 연산으로 계산하여, 이탈 폭이 band를
+    넘는 첫 점검일을 찾고 그 날짜부터 다시 찾습니다. (반복 횟수 = 리밸런싱 횟수, 날짜별 루프 없음)
+    탐색 구간은 lookahead 거래일부터 시작해 두 배씩 늘려 리밸런싱이 잦을 때도 불필요한 계산을 줄입니다.
+    결과 mask는 simulate_rebalancing/simulate_rebalancing_costs에 그대로 넘길 수 있습니다.
+    (비중 경로는 소수 주 기준으로 계산하므로 정수 주 체결 모델과는 약간 다를 수 있음)
+
+    :param prices: (날짜 × 종목) 가격 행렬
+    :param weights: 종목별 목표 비중 배열
+    :param band: 허용 이탈 폭 (absolute: 비중 차이, 예: 0.05 = 5%p / relative: 목표 비중 대비, 예: 0.25 = 25%)
+    :param mode: 'absolute' 또는 'relative'
+    :param check_mask: 이탈 여부를 점검할 날짜 mask (예: rebalance_mask(index, 'M')이면 매월 첫 거래일에만
+                       점검하는 달력 + band 혼합 방식), None이면 매 거래일 점검
+    :param lookahead: 첫 탐색 구간 길이 (거래일)
+    :return: 리밸런싱 날짜 boolean mask (첫 날짜는 항상 True)
+    """
+    if mode not in BAND_MODES:
+        raise ValueError(f"mode는 {BAND_MODES} 중 하나여야 합니다.")
+    prices = np.asarray(prices, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    check = np.ones(len(prices), dtype=bool) if check_mask is None else np.asarray(check_mask, dtype=bool)
+    mask = np.zeros(len(prices), dtype=bool)
+    if len(prices) == 0:
+        return mask
+
+    rebalance_at = 0
+    while True:
+        mask[rebalance_at] = True
+        base = prices[rebalance_at]
+        listed = ~np.isnan(base)
+        held = np.where(listed, weights, 0.0) / np.where(listed, base, 1.0)  # 가치 1 기준 보유 수량
+        start, window, found = rebalance_at + 1, lookahead, None
+        while start < len(prices) and found is None:
+            stop = min(len(prices), start + window)
+            breached = (_band_deviation(held, prices[start:stop], weights, mode) > band) & check[start:stop]
+            if breached.any():
+                found = start + int(np.argmax(breached))
+            start, window = stop, window * 2
+        if found is None:
+            return mask
+        rebalance_at = found
+
+def _simulate_segments(prices: np.ndarray, weight_matrix: np.ndarray, mask: np.ndarray,
+                       initial_capital: float) -> tuple:
+    """
+    simulate_rebalancing/simulate_rebalancing_batch의 공통 계산.
+
+    리밸런싱 구간 k(시작일 r_k) 안에서는 보유 수량이 고정이므로,
+        value[t] = S_k * sum_i(w_i * p[t, i] / p[r_k, i])
+    이고 구간 시작 가치 S_k는 직전 구간의 성장률을 누적곱하여 구합니다.
+    r_k에서 가격이 NaN인 종목(상장 전)은 그 구간에 편입하지 않고, 나머지 종목의 비중을
+    비례 확대합니다. (편입 가능한 종목이 없으면 현금으로 보유)
+    비중 합이 1보다 작으면 나머지(1 - sum(w))는 리밸런싱마다 현금으로 남깁니다.
+
+    :return: (구간 시작 가치 S (시나리오 × 구간), 날짜별 상대가치 (시나리오 × 날짜),
+              날짜별 구간 번호, 구간별 유효 비중 배율 (시나리오 × 구간) 또는 None, 구간 시작 가격)
+    """
+    mask = np.asarray(mask, dtype=bool).copy()
+    mask[0] = True
+    rebalance_idx = np.flatnonzero(mask)
+    segment = np.cumsum(mask) - 1
+    base_prices = prices[rebalance_idx]
+    active = ~np.isnan(base_prices)
+    residual = 1.0 - weight_matrix.sum(axis=1, keepdims=True)  # 현금으로 남기는 비중
+
+    if active.all():
+        scale = None
+        # 구간 경계에서의 성장률: 직전 리밸런싱 가격 대비 현재 리밸런싱 가격
+        growth = weight_matrix @ (base_prices[1:] / base_prices[:-1]).T + residual
+        relative = weight_matrix @ (prices / base_prices[segment]).T + residual
+    else:
+        total_weight = weight_matrix.sum(axis=1, keepdims=True)
+        invested = weight_matrix @ active.T
+        scale = np.divide(total_weight, invested, out=np.zeros_like(invested), where=invested > 0)
+        cash = np.where(invested > 0, 0.0, total_weight)
+        safe_base = np.where(active, base_prices, 1.0)
+        ratio = np.where(active[:-1], np.nan_to_num(base_prices[1:]) / safe_base[:-1], 0.0)
+        relative_prices = np.where(active[segment], np.nan_to_num(prices) / safe_base[segment], 0.0)
+        growth = (weight_matrix @ ratio.T) * scale[:, :-1] + cash[:, :-1] + residual
+        relative = (weight_matrix @ relative_prices.T) * scale[:, segment] + cash[:, segment] + residual
+
+    segment_start = initial_capital * np.concatenate(
+        (np.ones((weight_matrix.shape[0], 1)), np.cumprod(growth, axis=1)), axis=1)
+    return segment_start, relative, segment, scale, base_prices
+
+@traced("engine.simulate_rebalancing")
+def simulate_rebalancing(prices: np.ndarray, weights: np.ndarray, mask: np.ndarray,
+                         initial_capital: float) -> tuple:
+    """
+    가격 행렬과 리밸런싱 mask로 포트폴리오 가치와 보유 수량을 NumPy로 계산합니다.
+    첫 날짜는 항상 리밸런싱(초기 배분) 시점으로 취급하며, 상장 전(NaN) 종목은
+    상장 후 첫 리밸런싱 시점부터 편입됩니다.
+
+    :param prices: (날짜 × 종목) 가격 행렬
+    :param weights: 종목별 비중 배열 (prices의 열 순서와 동일)
+    :param mask: 리밸런싱 날짜 boolean mask
+    :param initial_capital: 초기 투자금
+    :return: (날짜별 포트폴리오 가치 배열, (날짜 × 종목) 보유 수량 행렬)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    segment_start, relative, segment, scale, base_prices = _simulate_segments(
+        prices, weights[None, :], mask, initial_capital)
+
+    if scale is None:
+        shares_by_segment = weights * segment_start[0][:, None] / base_prices
+    else:
+        active = ~np.isnan(base_prices)
+        effective = np.where(active, weights * scale[0][:, None], 0.0)
+        shares_by_segment = effective * segment_start[0][:, None] / np.where(active, base_prices, 1.0)
+    shares = shares_by_segment[segment]
+    values = segment_start[0][segment] * relative[0]
+    return values, shares
+
+@traced("engine.simulate_rebalancing_batch")
+def simulate_rebalancing_batch(prices: np.ndarray, weight_matrix: np.ndarray, mask: np.ndarray,
+                               initial_capital: float) -> np.ndarray:
+    """
+    여러 비중 시나리오를 한 번에 시뮬레이션합니다. (simulate_rebalancing의 다중 시나리오 버전)
+    가격 행렬과 리밸런싱 구간은 모든 시나리오가 공유하므로, 구간 시작가 대비 상대가격을
+    한 번만 계산하고 (시나리오 × 종목) 비중 행렬과의 행렬곱으로 가치를 구합니다.
+
+    :param prices: (날짜 × 종목) 가격 행렬
+    :param weight_matrix: (시나리오 × 종목) 비중 행렬
+    :param mask: 리밸런싱 날짜 boolean mask
+    :param initial_capital: 초기 투자금
+    :return: (시나리오 × 날짜) 포트폴리오 가치 행렬
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    weight_matrix = np.atleast_2d(np.asarray(weight_matrix, dtype=np.float64))
+    segment_start, relative, segment, _, _ = _simulate_segments(prices, weight_matrix, mask, initial_capital)
+    return segment_start[:, segment] * relative
+
+class ExecutionModel:
+    """
+    백테스트 리밸런싱 체결 모델.
+      - whole_shares: 목표 수량을 정수 주로 내림 (RebalancingStrategy.calculate_orders와 같은 floor 규칙)
+      - commission_bps: 체결 금액 대비 수수료 (bp, 1bp = 0.01%)
+      - min_fee: 주문(종목별 매수/매도 1건)당 최소 수수료
+      - slippage: 당일 (High - Low) 범위 대비 불리한 체결 비율 (매수는 종가 + slippage × 범위, 매도는 종가 - slippage × 범위)
+    다른 체결 규칙이 필요하면 fill_prices/fees를 재정의한 하위 클래스를 simulate_rebalancing_costs에 넘기면 됩니다.
+    """
+    def __init__(self, whole_shares: bool = True, commission_bps: float = 0.0, min_fee: float = 0.0,
+                 slippage: float = 0.0):
+        """
+        :param whole_shares: True이면 정수 주 단위로 매매
+        :param commission_bps: 수수료율 (bp)
+        :param min_fee: 주문당 최소 수수료
+        :param slippage: (High - Low) 범위 대비 슬리피지 비율 (0이면 종가 체결)
+        """
+        self.whole_shares = whole_shares
+        self.commission_bps = commission_bps
+        self.min_fee = min_fee
+        self.slippage = slippage
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'ExecutionModel':
+        """config.yaml의 execution 항목(dict)으로 체결 모델을 생성합니다."""
+        return cls(**(config or {}))
+
+    @property
+    def needs_range(self) -> bool:
+        """슬리피지 계산에 High/Low 가격이 필요한지 여부"""
+        return self.slippage > 0
+
+    def fill_prices(self, price: np.ndarray, high: np.ndarray = None, low: np.ndarray = None) -> tuple:
+        """
+        리밸런싱일의 종목별 체결 가격을 계산합니다.
+        :param price: 종목별 종가
+        :param high: 종목별 고가 (슬리피지 사용 시 필수)
+        :param low: 종목별 저가 (슬리피지 사용 시 필수)
+        :return: (매수 체결가, 매도 체결가)
+        """
+        if not self.needs_range:
+            return price, price
+        if high is None or low is None:
+            raise ValueError("slippage를 사용하려면 High/Low 가격이 필요합니다.")
+        spread = self.slippage * np.nan_to_num(high - low)
+        return price + spread, np.maximum(price - spread, 0.0)
+
+    def fees(self, notional: np.ndarray) -> np.ndarray:
+        """
+        주문 금액별 수수료를 계산합니다. (주문 금액이 0인 종목은 수수료 없음)
+        :param notional: (시나리오 × 종목) 매수 또는 매도 체결 금액
+        :return: 같은 shape의 수수료
+        """
+        commission = notional * self.commission_bps / 10000
+        return np.where(notional > 0, np.maximum(commission, self.min_fee), 0.0)
+
+# 매수 금액을 가용 현금에 맞출 때의 최대 반복 횟수
+FUNDING_ROUNDS = 8
+
+@traced("engine.simulate_rebalancing_costs")
+def simulate_rebalancing_costs(prices: np.ndarray, weight_matrix: np.ndarray, mask: np.ndarray,
+                               initial_capital: float, model: ExecutionModel = None,
+                               high: np.ndarray = None, low: np.ndarray = None) -> tuple:
+    """
+    체결 모델(정수 주, 수수료, 슬리피지)과 잔여 현금을 반영한 리밸런싱 시뮬레이션.
+    정수 주 내림과 수수료 때문에 구간 시작 가치가 직전 구간의 체결 결과에 의존하므로 리밸런싱 시점 수(K)만큼은
+    순서대로 계산하되, 각 시점의 주문 계산은 (시나리오 × 종목) 배열 연산이고 구간 안의 날짜별 가치는
+    (보유 수량 @ 가격 행렬) 행렬곱으로 한 번에 구합니다. (날짜별 루프 없음)
+
+    리밸런싱 시점마다:
+        가치 V = 보유 수량 · 종가 + 현금
+        목표 수량 = floor(V × 유효 비중 / 종가)  (whole_shares=False이면 내림 없음)
+        매수 수량은 (매수 체결가 × 수량 + 수수료)가 현금 + 매도 대금 - 매도 수수료를 넘지 않도록 같은 비율로 줄임
+        현금 += 매도 수량 × 매도 체결가 - 매수 수량 × 매수 체결가 - 수수료
+    상장 전(NaN) 종목은 simulate_rebalancing과 같이 제외하고 나머지 종목에 비중을 나눕니다.
+    매수는 가용 현금 안에서만 하므로 현금은 음수가 되지 않습니다. (미수 없음)
+    체결 비용이 없고 whole_shares=False이면 simulate_rebalancing_batch와 같은 결과를 냅니다.
+
+    :param prices: (날짜 × 종목) 종가 행렬
+    :param weight_matrix: (시나리오 × 종목) 비중 행렬 (1차원이면 시나리오 하나)
+    :param mask: 리밸런싱 날짜 boolean mask
+    :param initial_capital: 초기 투자금
+    :param model: 체결 모델 (None이면 ExecutionModel() 기본값: 정수 주, 비용 없음)
+    :param high: (날짜 × 종목) 고가 행렬 (슬리피지 사용 시)
+    :param low: (날짜 × 종목) 저가 행렬 (슬리피지 사용 시)
+    :return: ((시나리오 × 날짜) 포트폴리오 가치,
+              {'cash': (시나리오 × 구간) 리밸런싱 후 현금, 'fees': (시나리오 × 구간) 수수료,
+               'slippage': (시나리오 × 구간) 슬리피지 비용, 'shares': (시나리오 × 종목) 최종 보유 수량})
+    """
+    model = model or ExecutionModel()
+    prices = np.asarray(prices, dtype=np.float64)
+    weight_matrix = np.atleast_2d(np.asarray(weight_matrix, dtype=np.float64))
+    mask = np.asarray(mask, dtype=bool).copy()
+    mask[0] = True
+    rebalance_idx = np.flatnonzero(mask)
+    bounds = np.append(rebalance_idx, len(prices))
+    n_scenarios = weight_matrix.shape[0]
+    total_weight = weight_matrix.sum(axis=1)
+    filled_prices = np.nan_to_num(prices)
+
+    shares = np.zeros(weight_matrix.shape)
+    cash = np.full(n_scenarios, float(initial_capital))
+    values = np.empty((n_scenarios, len(prices)))
+    ledger = {key: np.zeros((n_scenarios, len(rebalance_idx))) for key in ('cash', 'fees', 'slippage')}
+
+    for k, r in enumerate(rebalance_idx):
+        price = prices[r]
+        active = ~np.isnan(price)
+        safe_price = np.where(active, price, 1.0)
+        value = shares @ filled_prices[r] + cash
+
+        invested = weight_matrix[:, active].sum(axis=1)
+        scale = np.divide(total_weight, invested, out=np.zeros_like(invested), where=invested > 0)
+        target = np.where(active, weight_matrix * scale[:, None], 0.0) * value[:, None] / safe_price
+        if model.whole_shares:
+            target = np.floor(target)
+
+        trade = target - shares
+        bought = np.clip(trade, 0, None)
+        sold = np.clip(-trade, 0, None)
+        buy_price, sell_price = model.fill_prices(
+            safe_price, None if high is None else high[r], None if low is None else low[r])
+        sell_notional = sold * sell_price
+        sell_fees = model.fees(sell_notional).sum(axis=1)
+        available = np.maximum(cash + sell_notional.sum(axis=1) - sell_fees, 0.0)
+        # 목표 수량은 종가 기준이므로 매수 체결가(슬리피지)와 수수료를 더하면 가용 현금을 넘을 수 있음:
+        # 넘는 시나리오는 매수 수량을 같은 비율로 줄임 (최소 수수료는 비례하지 않으므로 몇 번 반복)
+        for _ in range(FUNDING_ROUNDS):
+            buy_notional = bought * buy_price
+            buy_fees = model.fees(buy_notional).sum(axis=1)
+            cost = buy_notional.sum(axis=1) + buy_fees
+            over = cost > available
+            if not over.any():
+                break
+            ratio = np.divide(available, cost, out=np.zeros_like(cost), where=over)
+            bought = bought * np.where(over, ratio, 1.0)[:, None]
+            if model.whole_shares:
+                bought = np.floor(bought)
+        fees = buy_fees + sell_fees
+        cash = cash + sell_notional.sum(axis=1) - buy_notional.sum(axis=1) - fees
+        shares = shares + bought - sold
+
+        ledger['cash'][:, k] = cash
+        ledger['fees'][:, k] = fees
+        ledger['slippage'][:, k] = (bought * (buy_price - safe_price) + sold * (safe_price - sell_price)).sum(axis=1)
+        segment = slice(r, bounds[k + 1])
+        values[:, segment] = shares @ filled_prices[segment].T + cash[:, None]
+
+    ledger['shares'] = shares
+    return values, ledger
+
+# 모듈 단독 실행 테스트: 기존 날짜별 루프와 결과가 같은지 합성 데이터로 확인
+if __name__ == "__main__":
+    from rebalancing_backtest import _loop_rebalancing_simulation
+
+    rng = np.random.default_rng(0)
+    symbols = ['AAA', 'BBB', 'CCC']
+    weights = {'AAA': 0.5, 'BBB': 0.3, 'CCC': 0.2}
+    index = pd.bdate_range('2015-01-01', periods=2500)
+    data_dict = {}
+    for symbol in symbols:
+        path = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index))))
+        data_dict[symbol] = pd.DataFrame({symbol: path}, index=index)
+
+    for freq in FREQ_MAP:
+        freq_alias = resolve_freq_alias(freq)
+        mask = rebalance_mask(index, freq_alias)
+        expected = _loop_rebalancing_simulation(symbols, weights, data_dict, index, index[mask], 10000)
+        prices = build_price_matrix(data_dict, symbols)
+        weight_vector = np.array([weights[s] for s in symbols])
+        values, _ = simulate_rebalancing(prices, weight_vector, mask, 10000)
+        assert np.allclose(values, expected, rtol=1e-10), freq
+        batch = simulate_rebalancing_batch(prices, weight_vector[None, :], mask, 10000)
+        assert np.allclose(batch[0], expected, rtol=1e-10), freq
+        print(f"[{freq}] loop 결과와 일치 (최종 가치 {values[-1]:.2f})")
+
+        # 비용 없는 소수 주 체결 모델은 배열 엔진과 같아야 함
+        frictionless, _ = simulate_rebalancing_costs(prices, weight_vector, mask, 10000,
+                                                     ExecutionModel(whole_shares=False))
+        assert np.allclose(frictionless[0], expected, rtol=1e-10), freq
+        costed, ledger = simulate_rebalancing_costs(prices, weight_vector, mask, 10000,
+                                                    ExecutionModel(commission_bps=5, min_fee=1.0, slippage=0.1),
+                                                    prices * 1.01, prices * 0.99)
+        print(f"[{freq}] 정수 주 + 비용 반영 최종 가치 {costed[0, -1]:.2f} "
+              f"(수수료 {ledger['fees'].sum():.2f}, 슬리피지 {ledger['slippage'].sum():.2f}, 잔여 현금 {ledger['cash'][0, -1]:.2f})")
+
+    # drift band: 날짜별로 보유 비중을 따라가며 band를 넘을 때 리밸런싱하는 루프와 같은 날짜를 골라야 함
+    prices = build_price_matrix(data_dict, symbols)
+    weight_vector = np.array([weights[s] for s in symbols])
+    for mode, band in (('absolute', 0.05), ('relative', 0.25)):
+        for check_mask in (None, rebalance_mask(index, 'W')):
+            mask = drift_band_mask(prices, weight_vector, band, mode, check_mask, lookahead=16)
+            expected = np.zeros(len(index), dtype=bool)
+            held = weight_vector / prices[0]
+            expected[0] = True
+            for t in range(1, len(index)):
+                current = held * prices[t] / (held * prices[t]).sum()
+                deviation = np.abs(current - weight_vector)
+                if mode == 'relative':
+                    deviation = deviation / weight_vector
+                if deviation.max() > band and (check_mask is None or check_mask[t]):
+                    expected[t] = True
+                    held = weight_vector / prices[t]
+            assert (mask == expected).all(), (mode, band)
+            print(f"[band {mode} {band}{' + 주간 점검' if check_mask is not None else ''}] 리밸런싱 {mask.sum()}회")
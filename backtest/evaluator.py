@@ -0,0 +1,208 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from alignment import forward_fill
+from engine import resolve_freq_alias, rebalance_mask, simulate_rebalancing
+
+class IncrementalEvaluator:
+    """
+    포트폴리오 성과를 새로 추가된 날짜만 반영하여 갱신하는 상태 기반 평가기.
+      - 처음 실행 시 전체 기간을 배열 엔진(simulate_rebalancing)으로 한 번 계산하고,
+      - 이후에는 보유 수량, 현금, 최고 가치(MDD 계산용), 마지막 리밸런싱 기간, 마지막 가격을 상태로 유지하여
+        마지막 평가일 이후의 새 거래일만 반영합니다. (O(새 거래일 수))
+      - 새 거래일에 가격이 없는 종목은 마지막 가격으로 채웁니다. (전체 기간을 'outer'/'listing'으로 정렬한 것과 같음)
+      - 상태는 JSON 파일로 저장/복원합니다.
+    리밸런싱 규칙은 multi_stock_rebalancing_backtest와 같습니다. (각 기간의 첫 거래일에 목표 비중으로 재배분,
+    가격이 없는(상장 전) 종목은 제외하고 나머지 종목에 비중을 나눔, 비중 합이 1보다 작으면 나머지는 현금)
+    """
+    def __init__(self, symbols: list, weights: dict, initial_capital: float = 100000,
+                 rebalance_freq: str = 'w', state_path: str = None, how: str = 'inner'):
+        """
+        :param symbols: 종목 코드 리스트
+        :param weights: 종목별 비중 dict
+        :param initial_capital: 초기 투자금
+        :param rebalance_freq: 리밸런싱 주기 ('d', 'w', 'm')
+        :param state_path: 상태 JSON 파일 경로 (None이면 저장하지 않음)
+        :param how: 날짜 정렬 정책 ('inner', 'outer', 'listing')
+        """
+        self.symbols = list(symbols)
+        self.weights = {symbol: float(weights[symbol]) for symbol in self.symbols}
+        self.initial_capital = float(initial_capital)
+        self.rebalance_freq = rebalance_freq.lower()
+        self.freq_alias = resolve_freq_alias(rebalance_freq)
+        self.state_path = state_path
+        self.how = how
+        self.start_date = None
+        self.last_date = None
+        self.last_period = None
+        self.shares = np.zeros(len(self.symbols))
+        self.cash = 0.0
+        self.last_prices = None  # 마지막 평가일의 종목별 가격 (forward-fill 기준, 상장 전이면 NaN)
+        self.value = self.initial_capital
+        self.peak = 0.0  # 첫 평가일부터의 최고 가치 (compute_portfolio_performance와 동일한 기준)
+        self.max_drawdown = 0.0
+
+    @classmethod
+    def load(cls, state_path: str) -> 'IncrementalEvaluator':
+        """저장된 상태 JSON에서 평가기를 복원합니다."""
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        evaluator = cls(state['symbols'], state['weights'], state['initial_capital'],
+                        state['rebalance_freq'], state_path, state.get('how', 'inner'))
+        evaluator.start_date = pd.Timestamp(state['start_date']) if state['start_date'] else None
+        evaluator.last_date = pd.Timestamp(state['last_date']) if state['last_date'] else None
+        evaluator.last_period = state['last_period']
+        evaluator.shares = np.array(state['shares'], dtype=np.float64)
+        evaluator.cash = state.get('cash', 0.0)
+        if state.get('last_prices') is not None:
+            evaluator.last_prices = np.array(state['last_prices'], dtype=np.float64)  # None → NaN
+        evaluator.value = state['value']
+        evaluator.peak = state['peak']
+        evaluator.max_drawdown = state['max_drawdown']
+        return evaluator
+
+    def save(self, state_path: str = None) -> None:
+        """현재 상태를 JSON 파일로 저장합니다. (임시 파일에 쓴 뒤 교체)"""
+        state_path = state_path or self.state_path
+        if state_path is None:
+            raise ValueError("state_path가 지정되지 않았습니다.")
+        state = {
+            'symbols': self.symbols,
+            'weights': self.weights,
+            'initial_capital': self.initial_capital,
+            'rebalance_freq': self.rebalance_freq,
+            'how': self.how,
+            'start_date': self.start_date.strftime('%Y-%m-%d') if self.start_date is not None else None,
+            'last_date': self.last_date.strftime('%Y-%m-%d') if self.last_date is not None else None,
+            'last_period': self.last_period,
+            'shares': self.shares.tolist(),
+            'cash': self.cash,
+            'last_prices': None if self.last_prices is None else
+                           [None if np.isnan(price) else float(price) for price in self.last_prices],
+            'value': self.value,
+            'peak': self.peak,
+            'max_drawdown': self.max_drawdown,
+        }
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, state_path)
+
+    def _rebalance(self, price: np.ndarray, value: float) -> None:
+        weights = np.array([self.weights[symbol] for symbol in self.symbols])
+        active = ~np.isnan(price)
+        invested = weights[active].sum()
+        if invested <= 0:
+            self.shares = np.zeros(len(self.symbols))
+            self.cash = value
+            return
+        effective = np.where(active, weights * weights.sum() / invested, 0.0)
+        self.shares = np.where(active, effective * value / np.where(active, price, 1.0), 0.0)
+        self.cash = (1.0 - weights.sum()) * value
+
+    def update(self, index: pd.DatetimeIndex, prices: np.ndarray) -> int:
+        """
+        가격 행렬에서 마지막 평가일 이후의 거래일만 반영합니다.
+        처음 호출(상태 없음)이면 전체 기간을 배열 엔진으로 계산합니다.
+        새 거래일의 NaN(그날 거래가 없는 종목)은 마지막 평가일 가격부터 이어서 forward-fill합니다.
+        :param index: 가격 행렬의 날짜 index
+        :param prices: (날짜 × 종목) 가격 행렬 (열 순서: symbols)
+        :return: 새로 반영한 거래일 수
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if self.last_date is not None:
+            new_rows = index > self.last_date
+            index, prices = index[new_rows], prices[new_rows]
+        if len(index) == 0:
+            return 0
+        if self.last_prices is not None and np.isnan(prices).any():
+            prices = forward_fill(np.vstack((self.last_prices, prices)))[1:]
+
+        periods = index.to_period(self.freq_alias).astype(str)
+        if self.last_date is None:
+            weights = np.array([self.weights[symbol] for symbol in self.symbols])
+            values, shares = simulate_rebalancing(prices, weights, rebalance_mask(index, self.freq_alias),
+                                                  self.initial_capital)
+            self.start_date = index[0]
+            self.shares = shares[-1]
+            self.cash = float(values[-1] - np.sum(self.shares * np.nan_to_num(prices[-1])))
+            running_max = np.maximum.accumulate(np.concatenate(([self.peak], values)))[1:]
+            self.max_drawdown = min(self.max_drawdown, float((values / running_max - 1).min()))
+            self.peak = float(running_max[-1])
+            self.value = float(values[-1])
+        else:
+            for t in range(len(index)):
+                price = prices[t]
+                if periods[t] != self.last_period:
+                    self._rebalance(price, float(np.sum(self.shares * np.nan_to_num(price))) + self.cash)
+                    self.last_period = periods[t]
+                self.value = float(np.sum(self.shares * np.nan_to_num(price))) + self.cash
+                self.peak = max(self.peak, self.value)
+                self.max_drawdown = min(self.max_drawdown, self.value / self.peak - 1)
+        self.last_period = periods[-1]
+        self.last_date = index[-1]
+        self.last_prices = prices[-1].copy()
+        return len(index)
+
+    def refresh(self, db_path: str = None) -> int:
+        """
+        load_data로 마지막 평가일 이후의 가격만 불러와 반영하고, state_path가 있으면 상태를 저장합니다.
+        이어서 불러오는 구간은 'outer'여도 앞부분을 잘라내지 않도록 'listing'으로 정렬하고,
+        비어 있는 가격은 update()에서 마지막 가격으로 채웁니다.
+        :param db_path: SQLite DB 파일 경로 (None이면 기본 DB)
+        :return: 새로 반영한 거래일 수
+        """
+        from rebalancing_backtest import DB_PATH, load_aligned_columns
+
+        if self.last_date is None:
+            start, how = None, self.how
+        else:
+            start, how = self.last_date + pd.Timedelta(days=1), 'inner' if self.how == 'inner' else 'listing'
+        index, matrices = load_aligned_columns(self.symbols, start=start, how=how, db_path=db_path or DB_PATH)
+        folded = self.update(index, matrices['Close'])
+        if self.state_path is not None:
+            self.save()
+        return folded
+
+    def performance(self) -> dict:
+        """
+        현재까지의 성과를 반환합니다. (compute_portfolio_performance와 같은 단위)
+        :return: {'start', 'end', 'value', 'return': %, 'MDD': %}
+        """
+        return {
+            'start': self.start_date,
+            'end': self.last_date,
+            'value': self.value,
+            'return': (self.value / self.initial_capital - 1) * 100,
+            'MDD': self.max_drawdown * 100,
+        }
+
+# 모듈 단독 실행 테스트: 전체 기간 계산과 나눠서 갱신한 결과가 같은지 합성 데이터로 확인
+if __name__ == "__main__":
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    symbols = ['AAA', 'BBB', 'CCC']
+    weights = {'AAA': 0.5, 'BBB': 0.3, 'CCC': 0.2}
+    index = pd.bdate_range('2015-01-01', periods=2500)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(index), len(symbols))), axis=0))
+
+    full = IncrementalEvaluator(symbols, weights, 10000, 'm')
+    full.update(index, prices)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = os.path.join(tmp, 'state.json')
+        evaluator = IncrementalEvaluator(symbols, weights, 10000, 'm', state_path)
+        evaluator.update(index[:2000], prices[:2000])
+        evaluator.save()
+        for day in range(2000, len(index)):  # 하루씩 복원 → 반영 → 저장
+            evaluator = IncrementalEvaluator.load(state_path)
+            evaluator.update(index[:day + 1], prices[:day + 1])
+            evaluator.save()
+
+    expected, actual = full.performance(), evaluator.performance()
+    assert np.isclose(expected['value'], actual['value'], rtol=1e-10)
+    assert np.isclose(expected['MDD'], actual['MDD'], rtol=1e-10)
+    print("전체 계산:", expected)
+    print("증분 갱신:", actual)
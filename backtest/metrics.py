@@ -0,0 +1,227 @@
+import numpy as np
+import pandas as pd
+from tracing import traced
+
+# 성과 지표 컬럼 (단위)
+#   return: 누적 수익률(%)         CAGR: 연환산 수익률(%)       volatility: 연환산 변동성(%)
+#   Sharpe / Sortino: 연환산 비율   MDD: 최대 낙폭(%, 음수)      MDD_duration: 최장 고점 회복 기간(거래일)
+#   turnover: 연환산 회전율(%, 리밸런싱마다 0.5 * sum|목표 비중 - 변동된 비중|의 합, 현금 비중 포함)
+METRIC_COLUMNS = ['return', 'CAGR', 'volatility', 'Sharpe', 'Sortino', 'MDD', 'MDD_duration', 'turnover']
+TRADING_DAYS = 252
+
+def _first_valid(values: np.ndarray) -> np.ndarray:
+    """열마다 첫 번째 NaN이 아닌 값을 반환합니다. (상장 전 NaN 구간 처리)"""
+    rows = np.argmax(~np.isnan(values), axis=0)
+    return values[rows, np.arange(values.shape[1])]
+
+def _max_underwater_duration(values: np.ndarray, running_max: np.ndarray) -> np.ndarray:
+    """열마다 직전 고점 아래에 머문 최장 기간(행 수)을 계산합니다."""
+    positions = np.arange(len(values))[:, None]
+    at_peak = ~(values < running_max)
+    last_peak = np.maximum.accumulate(np.where(at_peak, positions, 0), axis=0)
+    return (positions - last_peak).max(axis=0)
+
+def _summarize(total_return, count, mean, m2, downside_sq, downside_count, mdd, duration,
+               periods_per_year, risk_free) -> dict:
+    """누적 통계량으로부터 지표를 계산합니다. (compute_metrics/StreamingMetrics 공통)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        years = count / periods_per_year
+        cagr = np.where(years > 0, np.power(1 + total_return, 1 / years) - 1, np.nan)
+        std = np.sqrt(m2 / (count - 1))
+        excess = mean - risk_free / periods_per_year
+        downside = np.sqrt(downside_sq / downside_count)
+        sharpe = excess / std * np.sqrt(periods_per_year)
+        sortino = excess / downside * np.sqrt(periods_per_year)
+    return {
+        'return': total_return * 100,
+        'CAGR': cagr * 100,
+        'volatility': std * np.sqrt(periods_per_year) * 100,
+        'Sharpe': sharpe,
+        'Sortino': sortino,
+        'MDD': mdd * 100,
+        'MDD_duration': duration,
+    }
+
+@traced("metrics.compute_metrics")
+def compute_metrics(values: np.ndarray, names: list = None, initial_values: np.ndarray = None,
+                    turnover: np.ndarray = None, periods_per_year: int = TRADING_DAYS,
+                    risk_free: float = 0.0) -> pd.DataFrame:
+    """
+    여러 가치 시계열(종목 가격, 포트폴리오 가치)의 성과 지표를 한 번에 벡터 연산으로 계산합니다.
+    각 열의 앞쪽 NaN(상장 전 구간)은 제외합니다.
+
+    :param values: (날짜 × 시계열) 가치 행렬 (1차원이면 시계열 하나로 취급)
+    :param names: 시계열 이름 목록 (결과 DataFrame의 index)
+    :param initial_values: 수익률 기준값 (예: 초기 투자금); None 또는 NaN이면 첫 유효값 사용
+    :param turnover: 시계열별 연환산 회전율(%) (compute_turnover 결과); None이면 0 (단순 보유)
+    :param periods_per_year: 연간 기간 수 (일간 데이터: 252)
+    :param risk_free: 연 무위험 수익률 (예: 0.03)
+    :return: index가 names이고 컬럼이 METRIC_COLUMNS인 DataFrame
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    first = _first_valid(values)
+    if initial_values is not None:
+        initial_values = np.broadcast_to(np.asarray(initial_values, dtype=np.float64), first.shape)
+        first = np.where(np.isnan(initial_values), first, initial_values)
+    last = values[-1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = values[1:] / values[:-1] - 1
+    count = (~np.isnan(returns)).sum(axis=0)
+    mean = np.nanmean(returns, axis=0) if len(returns) else np.full(values.shape[1], np.nan)
+    m2 = np.nansum((returns - mean) ** 2, axis=0)
+    downside = np.minimum(returns - risk_free / periods_per_year, 0)
+    downside_sq = np.nansum(downside ** 2, axis=0)
+
+    running_max = np.fmax.accumulate(values, axis=0)
+    drawdown = np.fmin.reduce(values / running_max - 1, axis=0)
+    duration = _max_underwater_duration(values, running_max)
+
+    result = _summarize(last / first - 1, count, mean, m2, downside_sq, count, drawdown, duration,
+                        periods_per_year, risk_free)
+    result['turnover'] = np.zeros(values.shape[1]) if turnover is None else np.asarray(turnover, dtype=np.float64)
+    return pd.DataFrame(result, index=names, columns=METRIC_COLUMNS)
+
+@traced("metrics.compute_turnover")
+def compute_turnover(prices: np.ndarray, weight_matrix: np.ndarray, mask: np.ndarray,
+                     periods_per_year: int = TRADING_DAYS, chunk_size: int = 64) -> np.ndarray:
+    """
+    리밸런싱 시나리오별 연환산 회전율(%)을 계산합니다.
+    리밸런싱 시점마다 직전 구간 동안 가격 변동으로 달라진 비중과 목표 비중의 차이(편도 기준)를 더합니다.
+    비중 합이 1보다 작으면 나머지 현금 비중의 차이도 함께 더합니다. (엔진과 같이 현금은 가격 변동 없음)
+    메모리 사용량을 제한하기 위해 시나리오를 chunk_size 단위로 나누어 계산합니다.
+
+    :param prices: (날짜 × 종목) 가격 행렬
+    :param weight_matrix: (시나리오 × 종목) 비중 행렬
+    :param mask: 리밸런싱 날짜 boolean mask
+    :return: 시나리오별 연환산 회전율(%)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    weight_matrix = np.atleast_2d(np.asarray(weight_matrix, dtype=np.float64))
+    mask = np.asarray(mask, dtype=bool).copy()
+    mask[0] = True
+    base_prices = prices[np.flatnonzero(mask)]
+    years = max(len(prices) - 1, 1) / periods_per_year
+    if len(base_prices) < 2:
+        return np.zeros(len(weight_matrix))
+    active = ~np.isnan(base_prices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.nan_to_num(base_prices[1:] / base_prices[:-1])  # (구간 - 1) × 종목
+
+    # 구간 k의 목표 비중 = w * a_k * s_k (a: 상장 여부, s: 엔진과 같은 비중 배율), 목표 현금 c_k = 1 - sum(목표 비중)이고
+    # 변동된 비중 = 직전 목표 비중 * R / G, 변동된 현금 = c_(k-1) / G (G = 직전 목표 비중 · R + c_(k-1))입니다.
+    # 종목 비중은 w의 배수로 계산하고, 비중 합이 1보다 작을 때 남는 현금도 한 종목처럼 회전율에 더합니다.
+    turnover = np.empty(len(weight_matrix))
+    for start in range(0, len(weight_matrix), chunk_size):
+        weights = weight_matrix[start:start + chunk_size]
+        total = weights.sum(axis=1, keepdims=True)
+        invested = weights @ active.T
+        scale = np.divide(total, invested, out=np.zeros_like(invested), where=invested > 0)  # 시나리오 × 구간
+        cash = 1 - scale * invested
+        drifted = scale[:, :-1, None] * active[None, :-1, :] * ratio[None, :, :]
+        grown = np.einsum('sn,skn->sk', weights, drifted) + cash[:, :-1]
+        inverse = np.divide(1.0, grown, out=np.zeros_like(grown), where=grown > 0)
+        drifted *= inverse[:, :, None]
+        cash_traded = np.abs(cash[:, 1:] - cash[:, :-1] * inverse).sum(axis=1)
+        np.subtract(scale[:, 1:, None] * active[None, 1:, :], drifted, out=drifted)
+        np.abs(drifted, out=drifted)
+        traded = 0.5 * (np.einsum('sn,skn->s', weights, drifted) + cash_traded)
+        turnover[start:start + chunk_size] = traded / years * 100
+    return turnover
+
+class StreamingMetrics:
+    """
+    매우 긴 시계열을 메모리에 모두 올리지 않고 구간(chunk)별로 한 번씩만 읽어 지표를 계산합니다.
+    평균/분산은 chunk 단위 통계를 병합(Chan의 병렬 분산 공식)하고, 고점/낙폭/고점 회복 기간은
+    직전 chunk의 상태를 이어받아 계산하므로 compute_metrics와 같은 결과를 냅니다.
+    """
+    def __init__(self, n_series: int, names: list = None, periods_per_year: int = TRADING_DAYS,
+                 risk_free: float = 0.0):
+        """
+        :param n_series: 시계열 수
+        :param names: 시계열 이름 목록
+        :param periods_per_year: 연간 기간 수
+        :param risk_free: 연 무위험 수익률
+        """
+        self.names = names
+        self.periods_per_year = periods_per_year
+        self.risk_free = risk_free
+        self.first = np.full(n_series, np.nan)
+        self.last = np.full(n_series, np.nan)
+        self.count = np.zeros(n_series)
+        self.mean = np.zeros(n_series)
+        self.m2 = np.zeros(n_series)
+        self.downside_sq = np.zeros(n_series)
+        self.peak = np.full(n_series, np.nan)
+        self.mdd = np.zeros(n_series)
+        self.rows = 0
+        self.last_peak = np.zeros(n_series, dtype=np.int64)
+        self.duration = np.zeros(n_series, dtype=np.int64)
+
+    def update(self, chunk: np.ndarray) -> None:
+        """
+        다음 구간의 가치를 반영합니다.
+        :param chunk: (날짜 × 시계열) 가치 행렬
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if chunk.ndim == 1:
+            chunk = chunk[:, None]
+        if len(chunk) == 0:
+            return
+        self.first = np.where(np.isnan(self.first), _first_valid(chunk), self.first)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.vstack((self.last[None, :], chunk))
+            returns = returns[1:] / returns[:-1] - 1
+        count = (~np.isnan(returns)).sum(axis=0)
+        with np.errstate(invalid='ignore'):
+            mean = np.where(count > 0, np.nansum(returns, axis=0) / np.maximum(count, 1), 0.0)
+        m2 = np.nansum((returns - mean) ** 2, axis=0)
+        total = self.count + count
+        delta = mean - self.mean
+        with np.errstate(invalid='ignore'):
+            self.mean = np.where(total > 0, self.mean + delta * count / np.maximum(total, 1), 0.0)
+            self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / np.maximum(total, 1)
+        self.count = total
+        downside = np.minimum(returns - self.risk_free / self.periods_per_year, 0)
+        self.downside_sq += np.nansum(downside ** 2, axis=0)
+
+        running_max = np.fmax.accumulate(np.vstack((self.peak[None, :], chunk)), axis=0)[1:]
+        with np.errstate(invalid='ignore'):
+            self.mdd = np.fmin(self.mdd, np.fmin.reduce(chunk / running_max - 1, axis=0))
+        positions = self.rows + np.arange(len(chunk))[:, None]
+        at_peak = ~(chunk < running_max)
+        last_peak = np.maximum.accumulate(
+            np.vstack((self.last_peak[None, :], np.where(at_peak, positions, 0))), axis=0)[1:]
+        self.duration = np.maximum(self.duration, (positions - last_peak).max(axis=0))
+        self.last_peak = last_peak[-1]
+        self.peak = running_max[-1]
+        self.last = chunk[-1]
+        self.rows += len(chunk)
+
+    def result(self, turnover: np.ndarray = None) -> pd.DataFrame:
+        """현재까지 반영한 구간의 지표를 compute_metrics와 같은 형태로 반환합니다."""
+        result = _summarize(self.last / self.first - 1, self.count, self.mean, self.m2, self.downside_sq,
+                            self.count, self.mdd, self.duration, self.periods_per_year, self.risk_free)
+        result['turnover'] = np.zeros(len(self.first)) if turnover is None else np.asarray(turnover, dtype=np.float64)
+        return pd.DataFrame(result, index=self.names, columns=METRIC_COLUMNS)
+
+# 모듈 단독 실행 테스트: 1,000개 시계열 일괄 계산 및 스트리밍 결과 비교
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    values = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (2520, 1000)), axis=0))
+    values[:500, 0] = np.nan  # 늦게 상장한 종목
+
+    started = time.perf_counter()
+    batch = compute_metrics(values)
+    print(f"1,000개 시계열 지표 계산: {time.perf_counter() - started:.3f}초")
+
+    streaming = StreamingMetrics(values.shape[1])
+    for start in range(0, len(values), 300):
+        streaming.update(values[start:start + 300])
+    assert np.allclose(batch.to_numpy(), streaming.result().to_numpy(), rtol=1e-9, equal_nan=True)
+    print(batch.head())
@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+import price_store
+
+# pyarrow는 선택 의존성입니다. 설치되어 있지 않으면 캐시 없이 SQLite에서 바로 읽습니다.
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:
+    pa = None
+
+# 캐시 파일에 기록하는 메타데이터 키: 캐시 생성 시점의 SQLite 행 수와 마지막 날짜
+_META_ROWS = b'rows'
+_META_LAST_DATE = b'last_date'
+CACHE_COLUMNS = ['Close', 'High', 'Low', 'Open', 'Volume']
+
+def is_available() -> bool:
+    """pyarrow가 설치되어 있어 캐시를 사용할 수 있는지 여부를 반환합니다."""
+    return pa is not None
+
+def cache_dir(db_path: str) -> str:
+    """
+    DB 파일 옆에 위치하는 캐시 디렉터리 경로를 반환합니다. (예: backtest/data_cache/)
+    :param db_path: SQLite DB 파일 경로
+    """
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), f"{stem}_cache")
+
+def cache_path(db_path: str, symbol: str) -> str:
+    """종목별 Arrow IPC 캐시 파일 경로를 반환합니다."""
+    return os.path.join(cache_dir(db_path), f"{symbol}.arrow")
+
+def _store_state(conn: sqlite3.Connection, symbol: str) -> tuple:
+    """SQLite에 저장된 종목의 (행 수, 마지막 날짜)를 기본 키 인덱스만으로 조회합니다."""
+    rows, last_date = conn.execute(
+        f"SELECT count(*), max(date) FROM {price_store.PRICES_TABLE} WHERE symbol = ?", (symbol,)
+    ).fetchone()
+    return rows, last_date
+
+def _open_table(path: str):
+    """
+    캐시 파일을 memory-map으로 열어 (복사 없이) Arrow Table과 메타데이터를 반환합니다.
+    파일 핸들은 바로 닫으며, 매핑된 메모리는 Table의 버퍼가 참조하는 동안 유지됩니다.
+    """
+    with pa.memory_map(path, 'r') as source:
+        table = pa_ipc.open_file(source).read_all()
+    metadata = table.schema.metadata or {}
+    return table, int(metadata.get(_META_ROWS, -1)), metadata.get(_META_LAST_DATE, b'').decode()
+
+def _to_table(df: pd.DataFrame):
+    frame = df.reset_index()
+    frame['Date'] = pd.to_datetime(frame['Date']).astype('datetime64[ns]')
+    return pa.Table.from_pandas(frame[['Date'] + CACHE_COLUMNS], preserve_index=False)
+
+def _with_state(table, rows: int, last_date: str):
+    """캐시 무효화 판단에 쓰는 (행 수, 마지막 날짜)를 스키마 메타데이터로 기록합니다."""
+    return table.replace_schema_metadata({_META_ROWS: str(rows).encode(), _META_LAST_DATE: last_date.encode()})
+
+def _write_table(path: str, table) -> None:
+    """임시 파일에 쓴 뒤 교체하여, 읽는 중인 다른 프로세스가 깨진 파일을 보지 않도록 합니다."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+def _sync(conn: sqlite3.Connection, symbol: str, db_path: str):
+    """
+    캐시 파일을 SQLite 상태와 맞춥니다.
+      - 행 수와 마지막 날짜가 같으면 그대로 사용
+      - 마지막 날짜 이후 행만 추가된 경우 새 행만 읽어 캐시 스키마로 변환한 뒤 이어 붙임
+      - 그 밖의 경우(과거 날짜 수정, 새 행을 캐시 스키마로 변환할 수 없는 경우 등)는 해당 종목 캐시를 다시 생성
+    :return: 최신 Arrow Table (SQLite에 데이터가 없으면 None)
+    """
+    rows, last_date = _store_state(conn, symbol)
+    if rows == 0:
+        return None
+    path = cache_path(db_path, symbol)
+    table = None
+    if os.path.exists(path):
+        try:
+            table, cached_rows, cached_last = _open_table(path)
+        except (OSError, pa.ArrowInvalid):
+            table = None
+    if table is not None:
+        if cached_rows == rows and cached_last == last_date:
+            return table
+        if cached_last and cached_last < last_date:
+            appended = price_store.read_symbol(conn, symbol, start=_next_day(cached_last))
+            if cached_rows + len(appended) == rows:
+                cached = table.replace_schema_metadata(None)
+                try:
+                    # upsert 후 Volume 등의 dtype이 캐시와 달라질 수 있음 (예: int ↔ float)
+                    table = pa.concat_tables([cached, _to_table(appended).cast(cached.schema)])
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    table = None
+                if table is not None:
+                    table = _with_state(table, rows, last_date)
+                    _write_table(path, table)
+                    return table
+    table = _with_state(_to_table(price_store.read_symbol(conn, symbol)), rows, last_date)
+    _write_table(path, table)
+    return table
+
+def _next_day(date: str) -> str:
+    return (pd.Timestamp(date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+def read_symbol(conn: sqlite3.Connection, symbol: str, db_path: str, start=None,
+                end=None, columns: list = None) -> pd.DataFrame:
+    """
+    캐시를 통해 단일 종목 가격을 읽습니다. 결과 형태는 price_store.read_symbol과 같습니다.
+    날짜 범위는 정렬된 Date 열에서 이진 탐색 후 slice(복사 없음)로, 컬럼은 select로 잘라냅니다.
+    :param conn: 가격 DB 연결 (price_store.connect)
+    :param symbol: 종목 코드
+    :param db_path: SQLite DB 파일 경로 (캐시 위치 결정)
+    :param start: 시작 날짜 (YYYY-MM-DD 또는 datetime, 포함)
+    :param end: 종료 날짜 (YYYY-MM-DD 또는 datetime, 포함)
+    :param columns: 읽을 컬럼 목록 (None이면 전체)
+    :return: index가 Date인 DataFrame
+    """
+    table = _sync(conn, symbol, db_path)
+    if table is None:
+        return price_store.read_symbol(conn, symbol, start, end, columns)
+    if start is not None or end is not None:
+        dates = table.column('Date').to_numpy()
+        lo = 0 if start is None else np.searchsorted(dates, pd.Timestamp(start).to_datetime64(), side='left')
+        hi = len(dates) if end is None else np.searchsorted(dates, pd.Timestamp(end).to_datetime64(), side='right')
+        table = table.slice(lo, max(hi - lo, 0))
+    table = table.select(['Date'] + (list(columns) if columns is not None else CACHE_COLUMNS))
+    df = table.to_pandas(split_blocks=True)
+    return df.set_index('Date')
+
+def invalidate(symbol: str, first_date, db_path: str) -> None:
+    """
+    종목 데이터가 first_date부터 갱신되었을 때 호출합니다.
+    캐시의 마지막 날짜 이후만 바뀐 경우에는 다음 읽기에서 새 행만 이어 붙이므로 그대로 두고,
+    이미 캐시된 기간이 바뀐 경우에만 캐시 파일을 삭제합니다.
+    :param symbol: 종목 코드
+    :param first_date: 갱신된 데이터의 가장 이른 날짜
+    :param db_path: SQLite DB 파일 경로
+    """
+    if pa is None:
+        return
+    path = cache_path(db_path, symbol)
+    if not os.path.exists(path):
+        return
+    try:
+        _, _, cached_last = _open_table(path)
+    except (OSError, pa.ArrowInvalid):
+        cached_last = ''
+    if not cached_last or pd.Timestamp(first_date).strftime('%Y-%m-%d') <= cached_last:
+        os.remove(path)
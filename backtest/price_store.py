@@ -0,0 +1,171 @@
+import sqlite3
+import pandas as pd
+
+# 통합 가격 테이블: (symbol, date) 복합 기본 키로 중복 행을 원천적으로 막습니다.
+# date는 'YYYY-MM-DD' 문자열로 저장하여 기본 키 인덱스로 기간 조회가 가능하도록 합니다.
+PRICES_TABLE = 'prices'
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+SCHEMA_VERSION = 1
+
+_CREATE_PRICES_SQL = f"""
+CREATE TABLE IF NOT EXISTS {PRICES_TABLE} (
+    symbol TEXT NOT NULL,
+    date   TEXT NOT NULL,
+    open   REAL,
+    high   REAL,
+    low    REAL,
+    close  REAL,
+    volume INTEGER,
+    PRIMARY KEY (symbol, date)
+) WITHOUT ROWID
+"""
+
+_UPSERT_SQL = f"""
+INSERT INTO {PRICES_TABLE} (symbol, date, open, high, low, close, volume)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(symbol, date) DO UPDATE SET
+    open = excluded.open, high = excluded.high, low = excluded.low,
+    close = excluded.close, volume = excluded.volume
+"""
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """
+    가격 DB에 연결합니다. WAL 모드를 켜고, 통합 테이블이 없으면 생성하며,
+    기존 종목별 테이블이 남아 있으면 한 번만 통합 테이블로 이전(migration)합니다.
+    :param db_path: SQLite DB 파일 경로
+    :return: sqlite3 Connection
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(_CREATE_PRICES_SQL)
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        migrate_legacy_tables(conn)
+    return conn
+
+def _legacy_tables(conn: sqlite3.Connection) -> list:
+    """'Date' 컬럼을 가진 기존 종목별 테이블 이름 목록을 반환합니다."""
+    tables = []
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+    for (name,) in rows.fetchall():
+        if name == PRICES_TABLE:
+            continue
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{name}")')}
+        if 'Date' in columns:
+            tables.append(name)
+    return tables
+
+def migrate_legacy_tables(conn: sqlite3.Connection) -> list:
+    """
+    테이블 이름이 종목 코드인 기존 테이블(df.to_sql로 생성)을 통합 테이블로 옮기고 삭제합니다.
+    중복 행은 upsert로 합쳐지며, 전체 과정은 하나의 트랜잭션으로 처리됩니다.
+    :param conn: sqlite3 Connection
+    :return: 이전된 종목 코드 리스트
+    """
+    migrated = _legacy_tables(conn)
+    with conn:
+        for name in migrated:
+            conn.execute(f"""
+                INSERT INTO {PRICES_TABLE} (symbol, date, open, high, low, close, volume)
+                SELECT ?, substr(Date, 1, 10), Open, High, Low, Close, Volume FROM "{name}" WHERE true
+                ON CONFLICT(symbol, date) DO UPDATE SET
+                    open = excluded.open, high = excluded.high, low = excluded.low,
+                    close = excluded.close, volume = excluded.volume
+            """, (name,))
+            conn.execute(f'DROP TABLE "{name}"')
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return migrated
+
+def _price_rows(symbol: str, df: pd.DataFrame) -> list:
+    """OHLCV DataFrame을 통합 테이블 upsert용 튜플 리스트로 변환합니다."""
+    frame = df.rename(columns=str.lower).reindex(columns=PRICE_COLUMNS)
+    dates = pd.to_datetime(frame.index).strftime('%Y-%m-%d')
+    frame = frame.astype(object).where(frame.notna(), None)
+    return [
+        (symbol, date, o, h, l, c, None if v is None else int(v))
+        for date, (o, h, l, c, v) in zip(dates, frame.itertuples(index=False, name=None))
+    ]
+
+def upsert_prices(conn: sqlite3.Connection, symbol: str, df: pd.DataFrame) -> int:
+    """
+    종목의 OHLCV DataFrame을 통합 테이블에 upsert합니다. 같은 (symbol, date)는 덮어씁니다.
+    :param conn: sqlite3 Connection
+    :param symbol: 종목 코드
+    :param df: index가 Date이고 'Open', 'High', 'Low', 'Close', 'Volume' 컬럼을 가진 DataFrame
+    :return: 처리한 행 수
+    """
+    return upsert_many(conn, {symbol: df})
+
+def upsert_many(conn: sqlite3.Connection, frames: dict) -> int:
+    """
+    여러 종목의 DataFrame을 하나의 트랜잭션으로 upsert합니다.
+    :param conn: sqlite3 Connection
+    :param frames: {종목코드: OHLCV DataFrame}
+    :return: 처리한 전체 행 수
+    """
+    rows = [row for symbol, df in frames.items() if not df.empty for row in _price_rows(symbol, df)]
+    if not rows:
+        return 0
+    with conn:
+        conn.executemany(_UPSERT_SQL, rows)
+    return len(rows)
+
+def last_dates(conn: sqlite3.Connection, symbols: list) -> dict:
+    """
+    종목별 마지막 저장 날짜를 기본 키 인덱스로 한 번에 조회합니다.
+    :return: {종목코드: 'YYYY-MM-DD'} (데이터가 없는 종목은 포함되지 않음)
+    """
+    placeholders = ', '.join('?' for _ in symbols)
+    rows = conn.execute(
+        f"SELECT symbol, max(date) FROM {PRICES_TABLE} WHERE symbol IN ({placeholders}) GROUP BY symbol",
+        list(symbols))
+    return dict(rows.fetchall())
+
+# load_data가 반환하는 컬럼명 → 통합 테이블 컬럼명 (반환 순서는 기존 종목별 테이블과 동일)
+OUTPUT_COLUMNS = {'Close': 'close', 'High': 'high', 'Low': 'low', 'Open': 'open', 'Volume': 'volume'}
+
+def _date_param(value) -> str:
+    """'YYYY-MM-DD' 문자열, datetime, Timestamp를 통합 테이블의 date 형식으로 변환합니다."""
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+def read_prices(conn: sqlite3.Connection, symbols: list, start=None, end=None,
+                columns: list = None) -> pd.DataFrame:
+    """
+    여러 종목의 가격을 한 번의 인덱스 조회로 읽어 long 포맷 DataFrame으로 반환합니다.
+    날짜 범위는 WHERE 절, 컬럼은 SELECT 절로 내려보내 기본 키 인덱스를 사용합니다.
+    :param conn: sqlite3 Connection
+    :param symbols: 종목 코드 리스트
+    :param start: 시작 날짜 (YYYY-MM-DD 또는 datetime, 포함), None이면 제한 없음
+    :param end: 종료 날짜 (YYYY-MM-DD 또는 datetime, 포함), None이면 제한 없음
+    :param columns: 읽을 컬럼 목록 (예: ['Close']), None이면 Close, High, Low, Open, Volume 전체
+    :return: 컬럼 symbol, Date, (columns) 의 DataFrame (symbol, Date 순 정렬)
+    """
+    if columns is None:
+        columns = list(OUTPUT_COLUMNS)
+    unknown = [column for column in columns if column not in OUTPUT_COLUMNS]
+    if unknown:
+        raise ValueError(f"지원하지 않는 컬럼입니다: {unknown}")
+    placeholders = ', '.join('?' for _ in symbols)
+    selected = ', '.join(f"{OUTPUT_COLUMNS[column]} AS {column}" for column in columns)
+    query = f"""
+        SELECT symbol, date AS Date, {selected}
+        FROM {PRICES_TABLE} WHERE symbol IN ({placeholders})
+    """
+    params = list(symbols)
+    if start is not None:
+        query += " AND date >= ?"
+        params.append(_date_param(start))
+    if end is not None:
+        query += " AND date <= ?"
+        params.append(_date_param(end))
+    query += " ORDER BY symbol, date"
+    df = pd.read_sql(query, conn, params=params)
+    df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
+    return df
+
+def read_symbol(conn: sqlite3.Connection, symbol: str, start=None, end=None, columns: list = None) -> pd.DataFrame:
+    """
+    단일 종목의 가격을 기존 load_data와 같은 형태(index: Date, 컬럼: OHLCV)로 반환합니다.
+    """
+    df = read_prices(conn, [symbol], start, end, columns)
+    return df.drop(columns='symbol').set_index('Date')
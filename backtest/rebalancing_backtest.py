@@ -2,78 +2,155 @@ import pandas as pd
 import numpy as np
 from datetime import timedelta
 import yaml
-from data_loader import load_data
+from data_loader import load_data, DB_PATH
+from engine import (resolve_freq_alias, rebalance_mask, simulate_rebalancing, simulate_rebalancing_costs,
+                    ExecutionModel, drift_band_mask)
+from alignment import align_prices
+from metrics import compute_metrics, compute_turnover
+from tracing import traced
 
+def load_aligned_columns(symbols: list, start=None, end=None, how: str = 'inner',
+                         columns: list = ('Close',), db_path: str = DB_PATH) -> tuple:
+    """
+    각 종목의 지정한 컬럼들을 불러와 컬럼별 (날짜 × 종목) 가격 행렬로 정렬합니다.
+    종목마다 load_data는 한 번만 호출하며, 모든 컬럼은 같은 날짜 index를 공유합니다.
+    :param symbols: 종목 코드 리스트
+    :param start: 시작 날짜 (YYYY-MM-DD, 포함), None이면 전체 기간
+    :param end: 종료 날짜 (YYYY-MM-DD, 포함), None이면 마지막 날짜까지
+    :param how: 날짜 정렬 정책 ('inner', 'outer', 'listing') - alignment.py 참고
+    :param columns: 불러올 컬럼 목록 (예: ['Close', 'High', 'Low'])
+    :param db_path: SQLite DB 파일 경로
+    :return: (공통 날짜 DatetimeIndex, {컬럼: (날짜 × 종목) 가격 행렬})
+    """
+    # load_data는 요청한 컬럼과 기간만 DB에서 잘라 읽음
+    frames = {symbol: load_data(symbol, db_path, start=start, end=end, columns=list(columns)) for symbol in symbols}
+    matrices = {}
+    common_index = None
+    for column in columns:
+        common_index, matrices[column] = align_prices({symbol: frames[symbol][column] for symbol in symbols},
+                                                      symbols, how)
+    return common_index, matrices
+
+def load_aligned_data(symbols: list, start=None, end=None, how: str = 'inner') -> tuple:
+    """
+    각 종목의 'Close' 데이터를 불러와 하나의 (날짜 × 종목) 가격 행렬로 정렬합니다.
+    백테스트와 파라미터 스윕이 같은 정렬 결과를 공유하도록 분리한 함수입니다.
+    :param symbols: 종목 코드 리스트
+    :param start: 시작 날짜 (YYYY-MM-DD, 포함), None이면 전체 기간
+    :param end: 종료 날짜 (YYYY-MM-DD, 포함), None이면 마지막 날짜까지
+    :param how: 날짜 정렬 정책 ('inner': 공통 날짜, 'outer': 합집합 + forward-fill,
+                'listing': 합집합 + 종목별 상장일부터 편입) - alignment.py 참고
+    :return: (공통 날짜 DatetimeIndex, (날짜 × 종목) 가격 행렬,
+              {종목코드: DataFrame(컬럼: symbol, 상장 전 구간 제외)})
+    """
+    common_index, matrices = load_aligned_columns(symbols, start, end, how, ['Close'])
+    prices = matrices['Close']
+    return common_index, prices, _holding_frames(symbols, common_index, prices, how)
+
+def _holding_frames(symbols: list, common_index: pd.DatetimeIndex, prices: np.ndarray, how: str) -> dict:
+    """종목별 홀딩 성과 계산용 DataFrame (가격 행렬의 열을 그대로 사용)"""
+    data_dict = {}
+    for j, symbol in enumerate(symbols):
+        df = pd.DataFrame({symbol: prices[:, j]}, index=common_index)
+        data_dict[symbol] = df.dropna() if how == 'listing' else df
+    return data_dict
+
+@traced("backtest.multi_stock_rebalancing_backtest")
 def multi_stock_rebalancing_backtest(symbols: list, weights: dict, 
                                        initial_capital: float = 100000,
-                                       rebalance_freq: str = 'W') -> pd.DataFrame:
+                                       rebalance_freq: str = 'W',
+                                       engine: str = 'numpy', start=None, end=None,
+                                       how: str = 'inner', execution: ExecutionModel = None,
+                                       band: float = None, band_mode: str = 'absolute') -> pd.DataFrame:
     """
     여러 종목에 대해, config에 정의된 비중에 맞춰 리밸런싱 백테스트를 수행합니다.
-    각 종목의 데이터는 개별 DataFrame(data_dict에 저장)으로 불러오며,
-    공통 날짜(inner join)를 기준으로 백테스트를 진행합니다.
+    각 종목의 데이터는 하나의 (날짜 × 종목) 가격 행렬로 정렬하며,
+    정렬 정책(how, 기본: 공통 날짜 inner join)에 따른 날짜를 기준으로 백테스트를 진행합니다.
     
     :param symbols: 종목 코드 리스트 (예: ['TSLA', 'JPM', 'JNJ', 'PG', 'PLTR'])
-    :param weights: 종목별 비중 dict (예: {'TSLA':0.2, 'JPM':0.2, ...}); 합은 1.0 이어야 함
+    :param weights: 종목별 비중 dict (예: {'TSLA':0.2, 'JPM':0.2, ...}); 합이 1.0보다 작으면 나머지는 현금으로 보유
     :param initial_capital: 초기 투자금
-    :param rebalance_freq: 리밸런싱 주기 ('d', 'w', 'm')
-    :return: 날짜별 포트폴리오 가치 DataFrame (index: Date, 컬럼: 'Portfolio Value')
-    """
-    # 리밸런싱 주기 매핑: 입력은 'd', 'w', 'm'을 대문자로 변환하여 사용
-    freq_map = {'d': 'D', 'w': 'W', 'm': 'M'}
-    rebalance_freq = rebalance_freq.lower()
-    if rebalance_freq not in freq_map:
-        raise ValueError("rebalance_freq는 'd', 'w', 'm' 중 하나여야 합니다.")
-    freq_alias = freq_map[rebalance_freq]
-    
-    # 각 종목의 데이터를 load_data를 통해 불러오고 'Close' 컬럼만 사용
-    data_dict = {}
-    for symbol in symbols:
-        df = load_data(symbol)  # load_data 함수는 DB에서 불러온 데이터를 반환
-        # 'Close' 컬럼만 사용하고, 컬럼명을 symbol로 변경
-        df = df[['Close']].rename(columns={'Close': symbol})
-        df.sort_index(inplace=True)
-        data_dict[symbol] = df
-
-    # 공통 날짜(inner join): 각 종목의 index 교집합
-    common_dates = None
-    for df in data_dict.values():
-        if common_dates is None:
-            common_dates = set(df.index)
-        else:
-            common_dates = common_dates.intersection(set(df.index))
-    common_dates = sorted(common_dates)
-    common_index = pd.DatetimeIndex(common_dates)
+    :param rebalance_freq: 리밸런싱 주기 ('d', 'w', 'm'); band를 지정하면 비중 이탈을 점검하는 주기
+                           ('d'이면 매 거래일 점검하는 순수 band 방식, 'w'/'m'이면 달력 + band 혼합 방식)
+    :param engine: 시뮬레이션 엔진 ('numpy': 배열 기반 기본 엔진, 'loop': 기존 날짜별 루프)
+    :param start: 백테스트 시작 날짜 (YYYY-MM-DD, 포함), None이면 첫 공통 날짜부터
+    :param end: 백테스트 종료 날짜 (YYYY-MM-DD, 포함), None이면 마지막 공통 날짜까지
+    :param how: 날짜 정렬 정책 ('inner', 'outer', 'listing'); 'listing'이면 늦게 상장한 종목은
+                상장 후 첫 리밸런싱부터 편입되며 그 전에는 나머지 종목에 비중을 나눔
+    :param execution: 체결 모델 (engine.ExecutionModel: 정수 주, 수수료, 슬리피지); None이면 비용 없는 소수 주 체결
+    :param band: 비중 이탈 허용 폭 (예: 0.05); 지정하면 점검일에 이탈 폭이 band를 넘을 때만 리밸런싱
+    :param band_mode: band 기준 ('absolute': 비중 차이, 'relative': 목표 비중 대비 비율)
+    :return: 날짜별 포트폴리오 가치 DataFrame (index: Date, 컬럼: 'Portfolio Value';
+             execution 사용 시 잔여 현금 'Cash'와 누적 체결 비용 'Cost' 컬럼,
+             band 사용 시 리밸런싱 여부 'Rebalance' 컬럼 추가)
+    """
+    if engine not in ('numpy', 'loop'):
+        raise ValueError("engine은 'numpy', 'loop' 중 하나여야 합니다.")
+    if engine == 'loop' and how == 'listing':
+        raise ValueError("how='listing'은 engine='numpy'에서만 지원합니다.")
+    if engine == 'loop' and execution is not None:
+        raise ValueError("execution은 engine='numpy'에서만 지원합니다.")
+    freq_alias = resolve_freq_alias(rebalance_freq)
     
-    # 각 종목 DataFrame을 공통 날짜로 subset
-    for symbol in symbols:
-        data_dict[symbol] = data_dict[symbol].loc[common_index]
+    columns = ['Close', 'High', 'Low'] if execution is not None and execution.needs_range else ['Close']
+    common_index, matrices = load_aligned_columns(symbols, start, end, how, columns)
+    prices = matrices['Close']
+    data_dict = _holding_frames(symbols, common_index, prices, how)
     
     # 리밸런싱 날짜: 공통 날짜에서 선택 (각 기간의 첫 거래일)
-    rebalance_dates = common_index[~common_index.to_period(freq_alias).duplicated()]
+    mask = rebalance_mask(common_index, freq_alias)
+    weight_vector = np.array([weights[symbol] for symbol in symbols], dtype=np.float64)
+    if band is not None:
+        # 각 기간의 첫 거래일 중 비중 이탈 폭이 band를 넘는 날짜만 리밸런싱
+        mask = drift_band_mask(prices, weight_vector, band, band_mode, check_mask=mask)
     
-    # 포트폴리오 시뮬레이션
-    capital = initial_capital
-    shares = {}
+    if execution is not None:
+        values, ledger = simulate_rebalancing_costs(prices, weight_vector, mask, initial_capital, execution,
+                                                    matrices.get('High'), matrices.get('Low'))
+        segment = np.cumsum(mask) - 1  # 날짜별 리밸런싱 구간 번호 (첫 날짜는 항상 리밸런싱)
+        costs = np.cumsum(ledger['fees'][0] + ledger['slippage'][0])
+        result = pd.DataFrame({'Portfolio Value': values[0], 'Cash': ledger['cash'][0][segment],
+                               'Cost': costs[segment]}, index=common_index)
+    else:
+        if engine == 'numpy':
+            portfolio_values, _ = simulate_rebalancing(prices, weight_vector, mask, initial_capital)
+        else:
+            portfolio_values = _loop_rebalancing_simulation(symbols, weights, data_dict, common_index,
+                                                            common_index[mask], initial_capital)
+        result = pd.DataFrame(data=portfolio_values, index=common_index, columns=['Portfolio Value'])
+    if band is not None:
+        result['Rebalance'] = mask
+    return result, data_dict  # data_dict도 반환하여 각 종목의 홀딩 성과 계산에 활용
+
+def _loop_rebalancing_simulation(symbols: list, weights: dict, data_dict: dict,
+                                 common_index: pd.DatetimeIndex, rebalance_dates: pd.DatetimeIndex,
+                                 initial_capital: float) -> list:
+    """
+    기존 날짜별 루프 시뮬레이션 (engine='loop').
+    배열 기반 엔진(engine.simulate_rebalancing)의 결과 검증용 기준 구현으로 유지합니다.
+    :return: 날짜별 포트폴리오 가치 리스트
+    """
+    # 비중 합이 1보다 작으면 나머지는 현금으로 보유
+    cash_weight = 1.0 - sum(weights[symbol] for symbol in symbols)
     # 초기 리밸런싱: 첫 공통 날짜에 초기 자본을 각 종목에 target 비중에 맞게 배분
+    # (첫 날짜도 rebalance_dates에 포함되어 있으면 같은 가치로 다시 배분하므로 결과는 같음)
     first_date = common_index[0]
-    for symbol in symbols:
-        price = data_dict[symbol].loc[first_date, symbol]
-        target_alloc = weights[symbol] * capital
-        shares[symbol] = target_alloc / price
+    shares = {symbol: weights[symbol] * initial_capital / data_dict[symbol].loc[first_date, symbol]
+              for symbol in symbols}
+    cash = cash_weight * initial_capital
 
     portfolio_values = []
     for date in common_index:
         if date in rebalance_dates:
-            current_value = sum(shares[sym] * data_dict[sym].loc[date, sym] for sym in symbols)
+            current_value = sum(shares[sym] * data_dict[sym].loc[date, sym] for sym in symbols) + cash
             for symbol in symbols:
                 price = data_dict[symbol].loc[date, symbol]
                 target_value = weights[symbol] * current_value
                 shares[symbol] = target_value / price
-        daily_value = sum(shares[sym] * data_dict[sym].loc[date, sym] for sym in symbols)
+            cash = cash_weight * current_value
+        daily_value = sum(shares[sym] * data_dict[sym].loc[date, sym] for sym in symbols) + cash
         portfolio_values.append(daily_value)
-    
-    result = pd.DataFrame(data=portfolio_values, index=common_index, columns=['Portfolio Value'])
-    return result, data_dict  # data_dict도 반환하여 각 종목의 홀딩 성과 계산에 활용
+    return portfolio_values
 
 def compute_stock_performance(df: pd.DataFrame, symbol: str) -> dict:
     """
@@ -109,44 +186,104 @@ def generate_report(symbols: list, weights: dict, portfolio_df: pd.DataFrame,
     """
     최종 리포트를 생성합니다.
       - 투자 기간, 종목 개수, 리밸런싱 주기
-      - 포트폴리오 수익률 및 MDD
+      - 포트폴리오 수익률, MDD, CAGR, 변동성, Sharpe/Sortino, MDD 기간, 회전율
       - 각 종목 단순 홀딩 시의 수익률 및 MDD
       - 리밸런싱 결과 대비 홀딩 결과 비교
+    포트폴리오와 종목별 지표는 metrics.compute_metrics로 (날짜 × 시계열) 행렬에서 한 번에 계산합니다.
     """
     start_date = portfolio_df.index[0].strftime('%Y-%m-%d')
     end_date = portfolio_df.index[-1].strftime('%Y-%m-%d')
     num_stocks = len(symbols)
-    portfolio_perf = compute_portfolio_performance(portfolio_df, initial_capital)
+
+    index = portfolio_df.index
+    prices = np.column_stack([data_dict[symbol][symbol].reindex(index).to_numpy(dtype=np.float64)
+                              for symbol in symbols])
+    weight_vector = np.array([weights[symbol] for symbol in symbols], dtype=np.float64)
+    if 'Rebalance' in portfolio_df.columns:
+        mask = portfolio_df['Rebalance'].to_numpy(dtype=bool)
+    else:
+        mask = rebalance_mask(index, resolve_freq_alias(rebalance_freq))
+    turnover = compute_turnover(prices, weight_vector, mask)
+    values = np.column_stack((portfolio_df['Portfolio Value'].to_numpy(dtype=np.float64), prices))
+    initial_values = np.r_[initial_capital, np.full(num_stocks, np.nan)]
+    metrics = compute_metrics(values, ['Portfolio'] + list(symbols), initial_values,
+                              turnover=np.r_[turnover, np.zeros(num_stocks)])
+    portfolio_perf = metrics.loc['Portfolio']
     
     print("========== 최종 백테스트 리포트 ==========")
     print(f"투자 기간       : {start_date} ~ {end_date}")
     print(f"종목 개수       : {num_stocks}")
     print(f"리밸런싱 주기   : {rebalance_freq.upper()}")
+    if 'Rebalance' in portfolio_df.columns:
+        print(f"리밸런싱 횟수   : {int(mask.sum())}회 (drift band)")
     print(f"포트폴리오 수익률: {portfolio_perf['return']:.2f}%")
     print(f"포트폴리오 MDD : {portfolio_perf['MDD']:.2f}%")
+    print(f"CAGR            : {portfolio_perf['CAGR']:.2f}%")
+    print(f"연환산 변동성   : {portfolio_perf['volatility']:.2f}%")
+    print(f"Sharpe / Sortino: {portfolio_perf['Sharpe']:.2f} / {portfolio_perf['Sortino']:.2f}")
+    print(f"MDD 기간        : {int(portfolio_perf['MDD_duration'])}거래일")
+    print(f"연환산 회전율   : {portfolio_perf['turnover']:.2f}%")
+    if 'Cost' in portfolio_df.columns:
+        print(f"누적 체결 비용  : ${portfolio_df['Cost'].iloc[-1]:.2f} (잔여 현금 ${portfolio_df['Cash'].iloc[-1]:.2f})")
     print("\n[개별 종목 단순 홀딩 성과]")
     for symbol in symbols:
-        perf = compute_stock_performance(data_dict[symbol], symbol)
-        print(f"{symbol}: 수익률 {perf['return']:.2f}%, MDD {perf['MDD']:.2f}%")
+        perf = metrics.loc[symbol]
+        print(f"{symbol}: 수익률 {perf['return']:.2f}%, MDD {perf['MDD']:.2f}%, "
+              f"CAGR {perf['CAGR']:.2f}%, Sharpe {perf['Sharpe']:.2f}")
     print("=========================================")
 
-if __name__ == "__main__":
+def main(argv: list = None) -> None:
+    """
+    config.yaml의 종목/비중으로 백테스트를 실행하고 리포트를 출력합니다. (python main.py backtest 에서도 사용)
+    :param argv: 명령행 인자 (None이면 sys.argv)
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="리밸런싱 백테스트")
+    parser.add_argument('--config', default='config.yaml', help="설정 파일 경로")
+    # 리밸런싱 주기: 'd', 'w', 'm'
+    parser.add_argument('--freq', default='M', help="리밸런싱 주기 (d, w, m)")
+    parser.add_argument('--capital', type=float, default=10000, help="초기 자본")
+    # 시작일 민감도: 여러 시작일 × 투자 기간(년)의 수익률/MDD 분포 (walk_forward.py)
+    parser.add_argument('--rolling', action='store_true', help="시작일별 rolling 구간 백테스트")
+    parser.add_argument('--horizons', type=int, nargs='+', default=[1, 3, 5], help="rolling 구간 길이 (년)")
+    parser.add_argument('--start-freq', default='m', help="rolling 구간 시작 간격 (d, w, m)")
+    parser.add_argument('--workers', type=int, default=1, help="rolling 구간 계산 프로세스 수")
+    args = parser.parse_args(argv)
+
     # 예시: config.yaml에서 종목 및 비중 로드 (예: TSLA, JPM, JNJ, PG, PLTR)
-    with open('config.yaml', 'r', encoding='utf-8') as f:
+    with open(args.config, 'r', encoding='utf-8') as f:
         config = yaml.safe_load(f)
     stocks_config = config.get('stocks', {})
     symbols = list(stocks_config.keys())
     weights = stocks_config  # 합계 1.0이라고 가정
 
-    # 리밸런싱 주기: 'd', 'w', 'm' (여기서는 주간 'W' 사용)
-    rebalance_period = 'M'
-    initial_capital = 10000
+    if args.rolling:
+        from walk_forward import run_rolling_backtest, summarize_windows
+        windows = run_rolling_backtest(symbols, weights, args.freq, args.horizons, args.start_freq,
+                                       max_workers=args.workers)
+        print(f"rolling 구간 {len(windows)}개 (시작 간격 {args.start_freq}, 기간 {args.horizons}년)")
+        print(summarize_windows(windows).round(2).T)
+        return
+
+    rebalance_period = args.freq
+    initial_capital = args.capital
+    # 체결 모델 (예: execution: {commission_bps: 5, min_fee: 1.0, slippage: 0.1}); 없으면 비용 없는 소수 주 체결
+    execution = ExecutionModel.from_config(config['execution']) if 'execution' in config else None
+    # 비중 이탈 기준 (예: rebalance: {band: 0.05, band_mode: absolute}); 없으면 매 주기 리밸런싱
+    rebalance_config = config.get('rebalance', {})
 
     portfolio_df, data_dict = multi_stock_rebalancing_backtest(symbols, weights, 
                                                                  initial_capital=initial_capital,
-                                                                 rebalance_freq=rebalance_period)
+                                                                 rebalance_freq=rebalance_period,
+                                                                 execution=execution,
+                                                                 band=rebalance_config.get('band'),
+                                                                 band_mode=rebalance_config.get('band_mode', 'absolute'))
     print("날짜별 포트폴리오 가치 (마지막 5일):")
     print(portfolio_df.tail())
     
     # 최종 리포트 생성
     generate_report(symbols, weights, portfolio_df, data_dict, initial_capital, rebalance_period)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from engine import FREQ_MAP, resolve_freq_alias, rebalance_mask, simulate_rebalancing_batch, simulate_rebalancing_costs
+from metrics import compute_metrics, compute_turnover
+
+# 워커 프로세스에서 공유하는 가격 행렬, 주기별 리밸런싱 mask, 체결 모델과 고가/저가 행렬
+# (initializer에서 한 번만 설정)
+_WORKER_PRICES = None
+_WORKER_MASKS = None
+_WORKER_EXECUTION = None
+_WORKER_RANGE = (None, None)
+
+def _init_worker(prices: np.ndarray, masks: dict, execution=None, price_range: tuple = (None, None)) -> None:
+    global _WORKER_PRICES, _WORKER_MASKS, _WORKER_EXECUTION, _WORKER_RANGE
+    _WORKER_PRICES = prices
+    _WORKER_MASKS = masks
+    _WORKER_EXECUTION = execution
+    _WORKER_RANGE = price_range
+
+def _evaluate_chunk(freq: str, weight_chunk: np.ndarray, initial_capital: float) -> tuple:
+    """
+    한 묶음(chunk)의 비중 시나리오를 평가하여 최종 가치와 성과 지표 DataFrame(metrics.METRIC_COLUMNS)을 반환합니다.
+    """
+    if _WORKER_EXECUTION is None:
+        values = simulate_rebalancing_batch(_WORKER_PRICES, weight_chunk, _WORKER_MASKS[freq], initial_capital)
+    else:
+        values, _ = simulate_rebalancing_costs(_WORKER_PRICES, weight_chunk, _WORKER_MASKS[freq], initial_capital,
+                                               _WORKER_EXECUTION, *_WORKER_RANGE)
+    turnover = compute_turnover(_WORKER_PRICES, weight_chunk, _WORKER_MASKS[freq])
+    metrics = compute_metrics(values.T, initial_values=initial_capital, turnover=turnover)
+    return values[:, -1], metrics
+
+def run_parameter_sweep(symbols: list, weight_matrix, rebalance_freqs: list = ('d', 'w', 'm'),
+                        initial_capital: float = 100000, max_workers: int = None,
+                        chunk_size: int = 250, start=None, end=None, how: str = 'inner',
+                        execution=None) -> pd.DataFrame:
+    """
+    여러 비중 벡터 × 리밸런싱 주기 조합을 한 번의 데이터 로드로 일괄 평가합니다.
+    가격은 load_aligned_data로 한 번만 불러와 정렬하고, 시나리오는 chunk 단위로 나누어
+    프로세스 풀에서 병렬로 계산합니다.
+
+    :param symbols: 종목 코드 리스트 (weight_matrix의 열 순서)
+    :param weight_matrix: (시나리오 × 종목) 비중 행렬 (np.ndarray 또는 columns=symbols인 DataFrame)
+    :param rebalance_freqs: 평가할 리밸런싱 주기 목록 ('d', 'w', 'm')
+    :param initial_capital: 초기 투자금
+    :param max_workers: 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 순차 실행)
+    :param chunk_size: 워커 하나에 한 번에 넘길 시나리오 수
+    :param start: 평가 시작 날짜 (YYYY-MM-DD, 포함), None이면 첫 공통 날짜부터
+    :param end: 평가 종료 날짜 (YYYY-MM-DD, 포함), None이면 마지막 공통 날짜까지
+    :param how: 날짜 정렬 정책 ('inner', 'outer', 'listing')
+    :param execution: 체결 모델 (engine.ExecutionModel); None이면 비용 없는 소수 주 체결
+    :return: 시나리오별 결과 DataFrame
+             (컬럼: scenario, rebalance_freq, 종목별 비중, final_value, metrics.METRIC_COLUMNS)
+    """
+    from rebalancing_backtest import load_aligned_columns
+
+    columns = ['Close', 'High', 'Low'] if execution is not None and execution.needs_range else ['Close']
+    common_index, matrices = load_aligned_columns(symbols, start, end, how, columns)
+    return sweep_price_matrix(matrices['Close'], common_index, symbols, weight_matrix, rebalance_freqs,
+                              initial_capital, max_workers, chunk_size, execution,
+                              (matrices.get('High'), matrices.get('Low')))
+
+def sweep_price_matrix(prices: np.ndarray, index: pd.DatetimeIndex, symbols: list, weight_matrix,
+                       rebalance_freqs: list = ('d', 'w', 'm'), initial_capital: float = 100000,
+                       max_workers: int = None, chunk_size: int = 250, execution=None,
+                       price_range: tuple = (None, None)) -> pd.DataFrame:
+    """
+    이미 정렬된 가격 행렬에 대해 파라미터 스윕을 수행합니다. (run_parameter_sweep 참고)
+    :param prices: (날짜 × 종목) 가격 행렬
+    :param index: 가격 행렬의 날짜 index
+    :param price_range: (고가 행렬, 저가 행렬) - execution의 슬리피지 계산용
+    """
+    if isinstance(weight_matrix, pd.DataFrame):
+        weight_matrix = weight_matrix[symbols].to_numpy(dtype=np.float64)
+    weight_matrix = np.atleast_2d(np.asarray(weight_matrix, dtype=np.float64))
+    if weight_matrix.shape[1] != len(symbols):
+        raise ValueError("weight_matrix의 열 개수가 종목 수와 일치해야 합니다.")
+    freqs = [freq.lower() for freq in rebalance_freqs]
+    masks = {freq: rebalance_mask(index, resolve_freq_alias(freq)) for freq in freqs}
+
+    tasks = []
+    for freq in freqs:
+        for start in range(0, len(weight_matrix), chunk_size):
+            tasks.append((freq, start, weight_matrix[start:start + chunk_size]))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1 or len(tasks) <= 1:
+        _init_worker(prices, masks, execution, price_range)
+        outputs = [_evaluate_chunk(freq, chunk, initial_capital) for freq, _, chunk in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(prices, masks, execution, price_range)) as executor:
+            futures = [executor.submit(_evaluate_chunk, freq, chunk, initial_capital)
+                       for freq, _, chunk in tasks]
+            outputs = [future.result() for future in futures]
+
+    frames = []
+    for (freq, start, chunk), (final_value, metrics) in zip(tasks, outputs):
+        frame = pd.DataFrame(chunk, columns=symbols)
+        frame.insert(0, 'rebalance_freq', freq)
+        frame.insert(0, 'scenario', np.arange(start, start + len(chunk)))
+        frame['final_value'] = final_value
+        for column in metrics.columns:
+            frame[column] = metrics[column].to_numpy()
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+# 모듈 단독 실행 테스트: 합성 가격으로 1,000개 비중 × 3개 주기 스윕 시간 측정
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    symbols = [f"S{i:02d}" for i in range(20)]
+    index = pd.bdate_range('2015-01-01', periods=2520)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(index), len(symbols))), axis=0))
+    weights = rng.dirichlet(np.ones(len(symbols)), size=1000)
+
+    started = time.perf_counter()
+    results = sweep_price_matrix(prices, index, symbols, weights, list(FREQ_MAP))
+    elapsed = time.perf_counter() - started
+    print(f"{len(results)}개 시나리오 평가 완료: {elapsed:.2f}초")
+    print(results.sort_values('return', ascending=False).head())
+
+    # 정수 주 + 수수료 + 슬리피지를 반영한 스윕 (체결 비용에 따른 리밸런싱 주기 비교)
+    from engine import ExecutionModel
+    execution = ExecutionModel(commission_bps=5, min_fee=1.0, slippage=0.1)
+    started = time.perf_counter()
+    results = sweep_price_matrix(prices, index, symbols, weights, list(FREQ_MAP), execution=execution,
+                                 price_range=(prices * 1.01, prices * 0.99))
+    elapsed = time.perf_counter() - started
+    print(f"체결 비용 반영 {len(results)}개 시나리오 평가 완료: {elapsed:.2f}초")
+    print(results.groupby('rebalance_freq')[['return', 'turnover']].mean())
@@ -0,0 +1,17 @@
+import importlib.util
+import os
+import sys
+
+# backtest 모듈은 backtest 폴더 기준으로 실행되므로(평면 import) 상위 폴더의 utils 패키지가 import 경로에 없을 수 있습니다.
+# sys.path를 바꾸지 않고, utils 패키지가 아직 import되지 않았으면 패키지 폴더에서 직접 불러와 'utils'로 등록합니다.
+# utils.telemetry는 등록된 패키지의 __path__로 찾으므로 프로젝트 루트에서 import한 경우와 같은 모듈 객체를 사용합니다.
+UTILS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utils")
+
+if "utils" not in sys.modules:
+    _spec = importlib.util.spec_from_file_location("utils", os.path.join(UTILS_DIR, "__init__.py"),
+                                                   submodule_search_locations=[UTILS_DIR])
+    _utils = importlib.util.module_from_spec(_spec)
+    sys.modules["utils"] = _utils
+    _spec.loader.exec_module(_utils)
+
+from utils.telemetry import traced, span, count  # noqa: E402
@@ -0,0 +1,192 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from engine import resolve_freq_alias, rebalance_mask, simulate_rebalancing
+from metrics import METRIC_COLUMNS, TRADING_DAYS, _summarize
+from tracing import traced
+
+# 구간별 결과 컬럼 (회전율은 구간마다 따로 계산하지 않으므로 제외)
+WINDOW_COLUMNS = ['start', 'end', 'horizon'] + [column for column in METRIC_COLUMNS if column != 'turnover']
+
+# 워커 프로세스에서 공유하는 가격 행렬, 비중, 리밸런싱 mask, 전체 기간 가치 경로
+# (initializer에서 한 번만 설정)
+_WORKER_PRICES = None
+_WORKER_WEIGHTS = None
+_WORKER_MASK = None
+_WORKER_VALUES = None
+
+def _init_worker(prices: np.ndarray, weights: np.ndarray, mask: np.ndarray, values: np.ndarray) -> None:
+    global _WORKER_PRICES, _WORKER_WEIGHTS, _WORKER_MASK, _WORKER_VALUES
+    _WORKER_PRICES = prices
+    _WORKER_WEIGHTS = weights
+    _WORKER_MASK = mask
+    _WORKER_VALUES = values
+
+def _window_path(start: int, stop: int) -> np.ndarray:
+    """
+    start일에 목표 비중으로 매수하고 이후 같은 리밸런싱 일정을 따른 포트폴리오의 가치 경로 (start일 = 1)를 반환합니다.
+    전체 기간 가치 경로 V를 재사용합니다:
+      - start가 리밸런싱 날짜이면 경로는 V[t] / V[start]
+      - 아니면 다음 리밸런싱 날짜 b 전까지는 sum(w * p[t] / p[start]) + 현금 비중이고, b부터는 V[t] / V[b]를 이어 붙임
+    """
+    values = _WORKER_VALUES
+    if _WORKER_MASK[start]:
+        return values[start:stop] / values[start]
+    following = np.flatnonzero(_WORKER_MASK[start + 1:stop])
+    split = start + 1 + following[0] if len(following) else stop
+    residual = 1.0 - _WORKER_WEIGHTS.sum()  # 현금으로 남기는 비중 (engine과 동일)
+    head = _WORKER_WEIGHTS @ (_WORKER_PRICES[start:split] / _WORKER_PRICES[start]).T + residual
+    if split == stop:
+        return head
+    growth = _WORKER_WEIGHTS @ (_WORKER_PRICES[split] / _WORKER_PRICES[start]) + residual
+    return np.concatenate((head, growth * values[split:stop] / values[split]))
+
+def _evaluate_starts(starts: np.ndarray, ends: np.ndarray, periods_per_year: int, risk_free: float) -> dict:
+    """
+    시작 위치마다 가장 긴 구간의 가치 경로를 한 번만 만들고, 누적합/누적 최소값으로 모든 기간(horizon)의 지표를 계산합니다.
+    :param starts: 시작 위치 배열
+    :param ends: (시작 × 기간) 종료 위치 행렬 (포함, 기간을 채우지 못하면 -1)
+    :return: {지표 이름: (시작 × 기간) 배열}
+    """
+    columns = [column for column in METRIC_COLUMNS if column != 'turnover']
+    result = {column: np.full(ends.shape, np.nan) for column in columns}
+    positions = np.arange(ends.max() - starts.min() + 2)
+    for row, start in enumerate(starts):
+        valid = ends[row] > start
+        if not valid.any():
+            continue
+        path = _window_path(start, ends[row].max() + 1)
+        returns = path[1:] / path[:-1] - 1
+        downside = np.minimum(returns - risk_free / periods_per_year, 0)
+        running_max = np.maximum.accumulate(path)
+        at_peak = ~(path < running_max)
+        index = positions[:len(path)]
+        underwater = index - np.maximum.accumulate(np.where(at_peak, index, 0))
+
+        offsets = ends[row][valid] - start  # 구간 마지막 날의 경로 위치 (= 수익률 개수)
+        count = offsets.astype(np.float64)
+        total = np.cumsum(returns)[offsets - 1]
+        mean = total / count
+        m2 = np.cumsum(returns ** 2)[offsets - 1] - count * mean ** 2
+        metrics = _summarize(path[offsets] - 1, count, mean, np.maximum(m2, 0.0),
+                             np.cumsum(downside ** 2)[offsets - 1], count,
+                             np.minimum.accumulate(path / running_max - 1)[offsets],
+                             np.maximum.accumulate(underwater)[offsets], periods_per_year, risk_free)
+        for column in columns:
+            result[column][row, valid] = metrics[column]
+    return result
+
+def run_rolling_backtest(symbols: list, weights: dict, rebalance_freq: str = 'm', horizons: list = (1, 3, 5),
+                         start_freq: str = 'm', start=None, end=None, max_workers: int = 1,
+                         periods_per_year: int = TRADING_DAYS, risk_free: float = 0.0) -> pd.DataFrame:
+    """
+    같은 비중을 여러 시작일 × 투자 기간(horizon)으로 평가합니다. (시작일 민감도 분석)
+    가격은 load_aligned_columns로 한 번만 불러와 정렬합니다. (rolling_price_matrix 참고)
+
+    :param symbols: 종목 코드 리스트
+    :param weights: 종목별 비중 dict (예: {'TSLA': 0.2, ...})
+    :param rebalance_freq: 리밸런싱 주기 ('d', 'w', 'm')
+    :param horizons: 투자 기간 목록 (년)
+    :param start_freq: 시작일 간격 ('d', 'w', 'm'; 각 기간의 첫 거래일에 시작)
+    :param start: 데이터 시작 날짜 (YYYY-MM-DD, 포함), None이면 첫 공통 날짜부터
+    :param end: 데이터 종료 날짜 (YYYY-MM-DD, 포함), None이면 마지막 공통 날짜까지
+    :param max_workers: 프로세스 수 (1이면 현재 프로세스에서 순차 실행, None이면 CPU 수)
+    :return: 구간별 결과 DataFrame (컬럼: WINDOW_COLUMNS)
+    """
+    from rebalancing_backtest import load_aligned_columns
+
+    common_index, matrices = load_aligned_columns(symbols, start, end, 'inner')
+    weight_vector = np.array([weights[symbol] for symbol in symbols], dtype=np.float64)
+    return rolling_price_matrix(matrices['Close'], common_index, weight_vector, rebalance_freq, horizons,
+                                start_freq, max_workers, periods_per_year=periods_per_year, risk_free=risk_free)
+
+@traced("walk_forward.rolling_price_matrix")
+def rolling_price_matrix(prices: np.ndarray, index: pd.DatetimeIndex, weights: np.ndarray,
+                         rebalance_freq: str = 'm', horizons: list = (1, 3, 5), start_freq: str = 'm',
+                         max_workers: int = 1, chunk_size: int = 32, periods_per_year: int = TRADING_DAYS,
+                         risk_free: float = 0.0) -> pd.DataFrame:
+    """
+    이미 정렬된 가격 행렬에 대해 시작일 × 기간별 백테스트를 수행합니다. (run_rolling_backtest 참고)
+    전체 기간의 가치 경로를 simulate_rebalancing으로 한 번만 계산하고, 각 구간은 그 경로를 시작일 기준으로
+    다시 나누어 구합니다. (비용 없는 소수 주 체결, 구간 시작일에 목표 비중으로 매수)
+
+    :param prices: (날짜 × 종목) 가격 행렬 (inner 정렬, NaN 없음)
+    :param index: 가격 행렬의 날짜 index
+    :param weights: 종목별 비중 배열 (prices의 열 순서와 동일)
+    :param chunk_size: 워커 하나에 한 번에 넘길 시작일 수
+    :return: 구간별 결과 DataFrame (컬럼: WINDOW_COLUMNS, 기간을 채우지 못하는 구간은 제외)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if np.isnan(prices).any():
+        raise ValueError("rolling backtest는 NaN이 없는(inner 정렬) 가격 행렬만 지원합니다.")
+    mask = rebalance_mask(index, resolve_freq_alias(rebalance_freq))
+    mask[0] = True
+    values, _ = simulate_rebalancing(prices, weights, mask, 1.0)
+
+    starts = np.flatnonzero(rebalance_mask(index, resolve_freq_alias(start_freq)))
+    horizons = list(horizons)
+    ends = np.full((len(starts), len(horizons)), -1)
+    for column, horizon in enumerate(horizons):
+        end_dates = index[starts] + pd.DateOffset(years=horizon)
+        positions = index.searchsorted(end_dates, side='right') - 1
+        ends[:, column] = np.where(end_dates <= index[-1], positions, -1)
+    keep = (ends > -1).any(axis=1)
+    starts, ends = starts[keep], ends[keep]
+    if not len(starts):
+        return pd.DataFrame(columns=WINDOW_COLUMNS)
+
+    tasks = [(starts[i:i + chunk_size], ends[i:i + chunk_size]) for i in range(0, len(starts), chunk_size)]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1 or len(tasks) <= 1:
+        _init_worker(prices, weights, mask, values)
+        outputs = [_evaluate_starts(chunk_starts, chunk_ends, periods_per_year, risk_free)
+                   for chunk_starts, chunk_ends in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(prices, weights, mask, values)) as executor:
+            futures = [executor.submit(_evaluate_starts, chunk_starts, chunk_ends, periods_per_year, risk_free)
+                       for chunk_starts, chunk_ends in tasks]
+            outputs = [future.result() for future in futures]
+
+    frames = []
+    for column, horizon in enumerate(horizons):
+        valid = ends[:, column] > -1
+        frame = pd.DataFrame({'start': index[starts[valid]], 'end': index[ends[valid, column]], 'horizon': horizon})
+        for metric in WINDOW_COLUMNS[3:]:
+            frame[metric] = np.concatenate([output[metric][:, column] for output in outputs])[valid]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)[WINDOW_COLUMNS]
+
+def summarize_windows(results: pd.DataFrame, columns: list = ('return', 'CAGR', 'MDD')) -> pd.DataFrame:
+    """
+    기간(horizon)별 지표 분포를 요약합니다.
+    :param results: rolling_price_matrix 결과
+    :param columns: 요약할 지표 컬럼
+    :return: index가 horizon이고 컬럼이 (지표, 통계량)인 DataFrame (count, mean, std, min, 5%, 25%, 50%, 75%, 95%, max)
+    """
+    return results.groupby('horizon')[list(columns)].describe(percentiles=[0.05, 0.25, 0.5, 0.75, 0.95])
+
+# 모듈 단독 실행 테스트: 합성 가격으로 매월 시작 × 1/3/5년 구간 평가 시간 측정
+# (구간별 재시뮬레이션과의 비교는 tests/test_walk_forward.py)
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    n_symbols = 10
+    index = pd.bdate_range('2010-01-01', periods=252 * 15)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (len(index), n_symbols)), axis=0))
+    weights = rng.dirichlet(np.ones(n_symbols))
+
+    for rebalance_freq in ('m', 'w', 'd'):
+        started = time.perf_counter()
+        results = rolling_price_matrix(prices, index, weights, rebalance_freq, (1, 3, 5), 'm')
+        print(f"[{rebalance_freq}] {len(results)}개 구간: {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    # 시작일을 주 단위로 늘리고 프로세스 풀로 나누어 계산
+    started = time.perf_counter()
+    weekly = rolling_price_matrix(prices, index, weights, 'm', (1, 3, 5), 'w', max_workers=4)
+    print(f"주 단위 시작 {len(weekly)}개 구간 (프로세스 4개): {time.perf_counter() - started:.2f}초")
+    print(summarize_windows(results).round(2).T)
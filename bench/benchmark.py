@@ -0,0 +1,357 @@
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+# backtest 모듈은 backtest 폴더 기준의 평면 import를 사용하므로 경로를 추가
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKTEST_DIR = os.path.join(ROOT_DIR, 'backtest')
+if BACKTEST_DIR not in sys.path:
+    sys.path.insert(0, BACKTEST_DIR)
+
+import price_cache
+import price_store
+from alignment import align_prices
+from data_loader import load_data
+from engine import (rebalance_mask, simulate_rebalancing, simulate_rebalancing_batch, simulate_rebalancing_costs,
+                    drift_band_mask, ExecutionModel)
+from metrics import compute_metrics, compute_turnover, StreamingMetrics
+from services.order_service import OrderService
+from services.quotation_service import QuotationService
+from strategies.rebalancing import RebalancingStrategy
+
+# 기준 결과 대비 최소 소요 시간이 (1 + tolerance)배를 넘고 차이가 min_delta_ms 이상이면 성능 저하로 판단
+# (수 ms 이하 측정의 잡음으로 오탐하지 않도록 절대 차이 하한을 둠)
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA_MS = 5.0
+# 실거래 진입점(main.py) import 시간 예산과, 그 경로에서 import되면 안 되는 무거운 모듈
+DEFAULT_IMPORT_BUDGET_MS = 250.0
+HEAVY_MODULES = ('pandas', 'numpy', 'yfinance', 'pyarrow')
+
+def generate_store(db_path: str, n_symbols: int, years: int, seed: int = 0) -> list:
+    """
+    합성 OHLCV 가격 이력을 SQLite 저장소에 생성합니다.
+    마지막 날짜를 어제로 맞추어 load_data가 추가 다운로드를 시도하지 않게 하고,
+    종목의 1/5은 중간에 상장한 것으로 만들어 상장일 정렬 경로도 측정합니다.
+
+    :param db_path: SQLite DB 파일 경로
+    :param n_symbols: 종목 수
+    :param years: 기간 (년, 연 252거래일)
+    :param seed: 난수 seed
+    :return: 생성한 종목 코드 리스트
+    """
+    rng = np.random.default_rng(seed)
+    yesterday = pd.Timestamp((datetime.today() - timedelta(hours=9) - timedelta(days=1)).date())
+    dates = pd.bdate_range(end=yesterday, periods=years * 252).union([yesterday])[-years * 252:]
+    symbols = [f"B{i:04d}" for i in range(n_symbols)]
+    frames = {}
+    for i, symbol in enumerate(symbols):
+        listed = dates[int(len(dates) * rng.uniform(0.1, 0.5)):] if i % 5 == 4 else dates
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(listed))))
+        spread = np.abs(rng.normal(0, 0.01, len(listed)))
+        frames[symbol] = pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.005, len(listed))),
+            'High': close * (1 + spread),
+            'Low': close * (1 - spread),
+            'Close': close,
+            'Volume': rng.integers(1e5, 1e7, len(listed)),
+        }, index=pd.DatetimeIndex(listed, name='Date'))
+    conn = price_store.connect(db_path)
+    try:
+        price_store.upsert_many(conn, frames)
+    finally:
+        conn.close()
+    return symbols
+
+class LatencyQuotationService(QuotationService):
+    """get_quote마다 지정한 지연 시간 후 고정 시세를 돌려주는 시세 서비스 (get_quotes의 병렬 조회 경로는 그대로 사용)"""
+    def __init__(self, prices: dict, latency: float, max_concurrency: int = 8):
+        super().__init__("http://bench.invalid", "BENCH", max_concurrency=max_concurrency)
+        self.prices = prices
+        self.latency = latency
+
+    def get_quote(self, symbol: str) -> dict:
+        time.sleep(self.latency)
+        return {"price": str(self.prices[symbol])}
+
+class LatencyOrderService(OrderService):
+    """HTTP 요청(_post)마다 지정한 지연 시간 후 성공 응답을 돌려주는 주문 서비스"""
+    def __init__(self, latency: float, pool_size: int = 8):
+        super().__init__("http://bench.invalid", "BENCH", "BENCH", pool_size=pool_size)
+        self.latency = latency
+
+    def _post(self, url: str, body: dict, headers: dict) -> dict:
+        time.sleep(self.latency)
+        if url.endswith("/balance"):
+            return {"rt_cd": "0", "output1": []}
+        return {"rt_cd": "0", "msg_cd": "APBK0013", "msg1": "주문 전송 완료"}
+
+def measure(func, repeat: int, setup=None) -> dict:
+    """
+    func를 repeat번 실행하여 소요 시간을 측정하고, tracemalloc을 켠 상태로 한 번 더 실행하여 최대 메모리를 구합니다.
+    (tracemalloc 오버헤드가 시간 측정에 섞이지 않도록 분리)
+
+    :param func: 측정할 함수 (인자 없음)
+    :param repeat: 반복 횟수
+    :param setup: 매 실행 전에 호출할 준비 함수 (시간 측정에서 제외)
+    :return: {'median_s', 'min_s', 'max_s', 'repeat', 'peak_mb'}
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'median_s': statistics.median(times),
+        'min_s': min(times),
+        'max_s': max(times),
+        'repeat': repeat,
+        'peak_mb': peak / 2 ** 20,
+    }
+
+def measure_import(module: str = 'main', repeat: int = 5) -> dict:
+    """
+    새 인터프리터에서 module을 import하는 데 걸리는 시간을 측정합니다. (-X importtime의 누적 시간, 인터프리터 기동 제외)
+    같은 프로세스에서는 이미 import된 모듈이 캐시되므로 매번 하위 프로세스를 띄웁니다.
+
+    :param module: 측정할 모듈 이름 (저장소 루트 기준)
+    :param repeat: 반복 횟수
+    :return: {'median_s', 'min_s', 'max_s', 'repeat', 'heavy_modules': module import 후 로드된 HEAVY_MODULES}
+    """
+    times = []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                   cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+        # 형식: "import time: self [us] | cumulative | imported package"
+        for line in completed.stderr.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module:
+                times.append(int(fields[1]) / 1e6)
+    if len(times) != repeat:
+        raise RuntimeError(f"{module}의 import 시간을 읽지 못했습니다.")
+    check = (f"import sys, {module}; "
+             f"print(' '.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))")
+    completed = subprocess.run([sys.executable, '-c', check], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    return {
+        'median_s': statistics.median(times),
+        'min_s': min(times),
+        'max_s': max(times),
+        'repeat': repeat,
+        'heavy_modules': completed.stdout.split(),
+    }
+
+def run_suite(n_symbols: int = 50, years: int = 10, scenarios: int = 1000, repeat: int = 5,
+              latency: float = 0.02, strategy_symbols: int = 20, order_rate: float = 20, seed: int = 0,
+              log=print) -> dict:
+    """
+    합성 저장소를 만들고 핫 패스별 소요 시간과 최대 메모리를 측정합니다.
+      - load_data (Arrow 캐시 생성/재사용, SQLite 직접 읽기)
+      - 날짜 정렬 (multi_stock_rebalancing_backtest가 사용하는 align_prices, inner/listing)
+      - 시뮬레이션 (배열 엔진 d/m, 체결 비용 모델, drift band, 다중 시나리오)
+      - 성과 지표 (compute_metrics, compute_turnover, StreamingMetrics)
+      - RebalancingStrategy.execute (지연 시간을 주입한 시세/주문 서비스)
+      - 실거래 진입점(main.py)의 import 시간 (새 인터프리터)
+
+    :param n_symbols: 종목 수
+    :param years: 기간 (년)
+    :param scenarios: 다중 시나리오(스윕) 측정에 사용할 비중 벡터 수
+    :param repeat: 측정별 반복 횟수
+    :param latency: 주입할 API 응답 지연 (초)
+    :param strategy_symbols: RebalancingStrategy에 사용할 종목 수
+    :param order_rate: 초당 주문 건수 제한 (config의 order.rate_per_sec)
+    :param seed: 난수 seed
+    :return: {'meta': 실행 환경/파라미터, 'results': {측정 이름: measure 결과}}
+    """
+    params = {'n_symbols': n_symbols, 'years': years, 'scenarios': scenarios, 'repeat': repeat,
+              'latency': latency, 'strategy_symbols': strategy_symbols, 'order_rate': order_rate, 'seed': seed}
+    results = {}
+
+    def record(name, func, setup=None, times=repeat):
+        results[name] = measure(func, times, setup)
+        log(f"{name:<28} {results[name]['median_s'] * 1000:10.2f}ms  (peak {results[name]['peak_mb']:.1f}MB)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        started = time.perf_counter()
+        symbols = generate_store(db_path, n_symbols, years, seed)
+        log(f"합성 저장소 생성: {n_symbols}종목 × {years}년, {time.perf_counter() - started:.2f}초")
+
+        def load_all(use_cache=True):
+            return {symbol: load_data(symbol, db_path, use_cache=use_cache, columns=['Close'])['Close']
+                    for symbol in symbols}
+
+        def drop_cache():
+            shutil.rmtree(price_cache.cache_dir(db_path), ignore_errors=True)
+
+        if price_cache.is_available():
+            record('load_data.cold_cache', load_all, setup=drop_cache)
+            record('load_data.warm_cache', load_all)
+        record('load_data.sqlite', lambda: load_all(use_cache=False))
+
+        closes = load_all()
+        record('align.inner', lambda: align_prices(closes, symbols, 'inner'))
+        record('align.listing', lambda: align_prices(closes, symbols, 'listing'))
+
+    index, prices = align_prices(closes, symbols, 'listing')
+    weights = np.full(n_symbols, 1 / n_symbols)
+    monthly = rebalance_mask(index, 'M')
+    daily = rebalance_mask(index, 'D')
+    execution = ExecutionModel(commission_bps=5, min_fee=1.0, slippage=0.1)
+    record('simulate.numpy[m]', lambda: simulate_rebalancing(prices, weights, monthly, 100000))
+    record('simulate.numpy[d]', lambda: simulate_rebalancing(prices, weights, daily, 100000))
+    record('simulate.costs[m]', lambda: simulate_rebalancing_costs(prices, weights, monthly, 100000, execution,
+                                                                   prices * 1.01, prices * 0.99))
+    record('simulate.band[m]', lambda: drift_band_mask(prices, weights, 0.05, check_mask=monthly))
+
+    weight_matrix = np.random.default_rng(seed).dirichlet(np.ones(n_symbols), size=scenarios)
+    record('simulate.batch[m]', lambda: simulate_rebalancing_batch(prices, weight_matrix, monthly, 100000))
+    values = simulate_rebalancing_batch(prices, weight_matrix, monthly, 100000).T
+    record('metrics.compute', lambda: compute_metrics(values, initial_values=100000))
+    record('metrics.turnover[m]', lambda: compute_turnover(prices, weight_matrix, monthly))
+
+    def streaming():
+        tracker = StreamingMetrics(values.shape[1])
+        for start in range(0, len(values), 252):
+            tracker.update(values[start:start + 252])
+        return tracker.result()
+    record('metrics.streaming', streaming)
+
+    strategy_universe = symbols[:strategy_symbols]
+    config = {'stocks': {symbol: 1 / len(strategy_universe) for symbol in strategy_universe},
+              'order': {'rate_per_sec': order_rate}}
+    last_prices = {symbol: float(closes[symbol].iloc[-1]) for symbol in strategy_universe}
+    quotation_service = LatencyQuotationService(last_prices, latency)
+    order_service = LatencyOrderService(latency)
+    strategy = RebalancingStrategy(config, order_service, quotation_service, 1000000)
+    logging.disable(logging.INFO)  # 종목별 주문 로그가 측정 출력에 섞이지 않도록 억제
+    try:
+        record('strategy.execute', strategy.execute, times=max(1, min(repeat, 3)))
+    finally:
+        logging.disable(logging.NOTSET)
+    quotation_service.close()
+    order_service.close()
+
+    results['import.main'] = measure_import('main', repeat)
+    log(f"{'import.main':<28} {results['import.main']['median_s'] * 1000:10.2f}ms  "
+        f"(무거운 모듈: {', '.join(results['import.main']['heavy_modules']) or '없음'})")
+
+    meta = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': params,
+    }
+    try:
+        import resource
+        # Linux의 ru_maxrss 단위는 KB
+        meta['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        pass
+    return {'meta': meta, 'results': results}
+
+def compare(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE,
+            min_delta_ms: float = DEFAULT_MIN_DELTA_MS, log=print) -> list:
+    """
+    현재 결과를 저장된 기준 결과와 비교합니다. (측정 이름이 같은 항목의 최소 소요 시간 비교)
+    :param current: run_suite 결과
+    :param baseline: 기준 결과 (run_suite 결과를 저장한 JSON)
+    :param tolerance: 허용 증가율 (0.25 = 25%)
+    :param min_delta_ms: 성능 저하로 판단할 최소 절대 차이 (ms)
+    :return: 성능 저하 항목 이름 리스트
+    """
+    if baseline['meta'].get('params') != current['meta'].get('params'):
+        log(f"경고: 기준 결과와 측정 파라미터가 다릅니다. (기준: {baseline['meta'].get('params')})")
+    regressions = []
+    log(f"{'측정':<28} {'기준(ms)':>10} {'현재(ms)':>10} {'비율':>7}")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            log(f"{name:<28} {'-':>10} {result['min_s'] * 1000:10.2f} {'new':>7}")
+            continue
+        ratio = result['min_s'] / base['min_s'] if base['min_s'] > 0 else float('inf')
+        delta_ms = (result['min_s'] - base['min_s']) * 1000
+        flag = ''
+        if ratio > 1 + tolerance and delta_ms >= min_delta_ms:
+            regressions.append(name)
+            flag = '  << 성능 저하'
+        log(f"{name:<28} {base['min_s'] * 1000:10.2f} {result['min_s'] * 1000:10.2f} {ratio:6.2f}x{flag}")
+    return regressions
+
+def main(argv: list = None) -> int:
+    """
+    벤치마크를 실행하고 결과를 저장합니다. (python main.py bench 에서도 사용)
+    기준 결과 대비 성능 저하가 있거나, main.py import 시간이 예산을 넘거나 무거운 모듈을 import하면 1을 반환합니다.
+    :param argv: 명령행 인자 (None이면 sys.argv)
+    :return: 종료 코드
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="백테스트/데이터 로더/전략 핫 패스 벤치마크")
+    parser.add_argument('--symbols', type=int, default=50, help="합성 종목 수")
+    parser.add_argument('--years', type=int, default=10, help="합성 가격 기간 (년)")
+    parser.add_argument('--scenarios', type=int, default=1000, help="다중 시나리오 비중 벡터 수")
+    parser.add_argument('--repeat', type=int, default=5, help="측정별 반복 횟수")
+    parser.add_argument('--latency', type=float, default=0.02, help="주입할 API 응답 지연 (초)")
+    parser.add_argument('--strategy-symbols', type=int, default=20, help="전략 실행 측정에 사용할 종목 수")
+    parser.add_argument('--order-rate', type=float, default=20, help="초당 주문 건수 제한")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json', help="결과 JSON 경로")
+    parser.add_argument('--baseline', help="비교할 기준 결과 JSON 경로")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="허용 증가율 (0.25 = 25%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="성능 저하로 판단할 최소 절대 차이 (ms)")
+    parser.add_argument('--import-budget-ms', type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+                        help="main.py import 시간 예산 (ms)")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.symbols, args.years, args.scenarios, args.repeat, args.latency,
+                       args.strategy_symbols, args.order_rate, args.seed)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.output}")
+
+    failed = False
+    import_result = report['results']['import.main']
+    if import_result['min_s'] * 1000 > args.import_budget_ms:
+        print(f"main.py import 시간 {import_result['min_s'] * 1000:.1f}ms가 예산 {args.import_budget_ms:.0f}ms를 넘었습니다.")
+        failed = True
+    if import_result['heavy_modules']:
+        print(f"main.py가 무거운 모듈을 import합니다: {', '.join(import_result['heavy_modules'])}")
+        failed = True
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"성능 저하 {len(regressions)}건: {', '.join(regressions)}")
+            failed = True
+        else:
+            print("성능 저하 없음")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,179 @@
+import argparse
 import logging
+import os
+import sys
 from config.config import load_config
 from services.order_service import OrderService
 from services.quotation_service import QuotationService
 from strategies.rebalancing import RebalancingStrategy
 from utils.logger import setup_logger
+from utils import telemetry
 
-def main():
+# 실행 진입점 (cron 등에서 호출)
+#   python main.py [rebalance] [--resume]   실거래 리밸런싱 (하위 명령을 생략하면 rebalance)
+#   python main.py backtest [...]           백테스트 (backtest/rebalancing_backtest.py)
+#   python main.py sync-data [...]          백테스트 가격 데이터 동기화 (backtest/data_sync.py)
+#   python main.py bench [...]              벤치마크 (bench/benchmark.py)
+# rebalance 경로는 pandas/numpy/yfinance를 import하지 않습니다. 나머지 하위 명령과 설정에 따라서만 쓰는
+# 모듈(websockets, 토큰 캐시, 일괄 실행기, 주문 저널)은 필요할 때 import하여 장 시작 직후 실행의 기동 시간을 줄입니다.
+# (bench 하위 명령이 main.py의 import 시간과 무거운 모듈 import 여부를 점검)
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKTEST_DIR = os.path.join(ROOT_DIR, "backtest")
+
+def rebalance(args) -> None:
+    """설정 파일에 따라 실거래 리밸런싱을 실행합니다."""
     # 로깅 설정
     logger = setup_logger("main", level=logging.INFO)
     logger.info("프로젝트 시작")
 
     # 설정 파일 로드 (config.yaml)
-    config = load_config()
+    config = load_config(args.config)
     logger.info("설정 로드 완료: %s", config)
 
+    # config.yaml에 telemetry 항목(jsonl, prometheus 파일 경로)이 있으면 구간별 소요 시간/HTTP 호출 수를 기록
+    telemetry_config = config.get("telemetry")
+    if telemetry_config:
+        telemetry.configure(telemetry_config.get("jsonl"), telemetry_config.get("prometheus"))
+
     # API 관련 기본 정보 (실제 값은 문서를 참고하여 수정하세요)
     base_url = "https://apiportal.koreainvestment.com/apiservice"
     token = "DUMMY_APPROVAL_KEY"       # 실제 API 승인 키 또는 토큰으로 교체
     account_id = "YOUR_ACCOUNT_ID"       # 실제 계좌 번호로 교체
 
-    # 서비스 인스턴스 생성
-    order_service = OrderService(base_url, token, account_id)
-    quotation_service = QuotationService(base_url, token)
+    # config.yaml에 broker 항목(app_key, app_secret, token_cache 등)이 있으면 공유 BrokerClient를 사용
+    # (연결 풀 하나를 두 서비스가 함께 쓰고, 접근 토큰/approval_key를 디스크에 캐시하여 실행마다 재발급하지 않음)
+    broker_config = config.get("broker")
+    client = None
+    if broker_config:
+        from services.broker_client import BrokerClient
+        base_url = broker_config.get("base_url", base_url)
+        client = BrokerClient(base_url, broker_config["app_key"], broker_config["app_secret"],
+                              cache_path=broker_config.get("token_cache", ".broker_token.json"),
+                              pool_size=broker_config.get("pool_size", 16))
+
+    # config.yaml에 accounts 리스트가 있으면 여러 계좌를 한 번의 시세 조회로 일괄 리밸런싱
+    # (계좌별 name, account_id, portfolio_value와 선택적으로 stocks/rebalance/order 항목)
+    accounts = config.get("accounts")
+    if accounts:
+        from strategies.batch_runner import BatchRebalancer
+        batch = BatchRebalancer(config, accounts, None,
+                                lambda account: OrderService(base_url, token, account["account_id"], client=client),
+                                max_accounts=config.get("batch", {}).get("max_accounts", 8))
+        symbols = batch.symbols()
+    else:
+        symbols = list(config.get("stocks", {}))
+        # 서비스 인스턴스 생성 (일괄 실행은 계좌마다 order_service_factory로 생성)
+        order_service = OrderService(base_url, token, account_id, client=client)
+    # 시세 조회 동시 요청 수/타임아웃은 config.yaml의 quotation 항목으로 조정 (예: max_concurrency, timeout)
+    quotation_service = QuotationService(base_url, token, client=client, **config.get("quotation", {}))
+
+    # config.yaml에 realtime 항목(url, stale_after, ready_timeout)이 있으면 WebSocket 실시간 시세를 사용
+    # (실시간 시세가 없거나 오래된 종목만 HTTP 시세 조회로 대체)
+    realtime_config = config.get("realtime")
+    if realtime_config:
+        from services.realtime_quotation_service import RealtimeQuotationService
+        # 실시간 접속키(approval_key)는 WebSocket을 쓸 때만 발급
+        quotation_service = RealtimeQuotationService(
+            realtime_config["url"], client.approval_key() if client is not None else token, symbols, fallback=quotation_service,
+            stale_after=realtime_config.get("stale_after", 5.0))
+        quotation_service.start()
+        if not quotation_service.wait_until_ready(realtime_config.get("ready_timeout", 10.0)):
+            logger.warning("일부 종목의 실시간 시세를 받지 못했습니다. 해당 종목은 HTTP로 조회합니다.")
+
+    # config.yaml에 journal 항목(path)이 있거나 --resume이면 주문 전송/응답을 저널 파일에 기록
+    journal_config = config.get("journal")
+    journal = None
+    if journal_config is not None or args.resume:
+        from strategies.order_journal import OrderJournal
+        journal = OrderJournal((journal_config or {}).get("path", "order_journal.jsonl"), resume=args.resume)
+        logger.info("주문 저널: %s (run_id=%s)", journal.path, journal.run_id)
 
     # 전체 투자 금액 설정 (예: 1,000,000)
     portfolio_value = 1000000
 
-    # 리밸런싱 전략 인스턴스 생성
-    strategy = RebalancingStrategy(config, order_service, quotation_service, portfolio_value)
-    
-    logger.info("리밸런싱 전략 실행 시작...")
-    results = strategy.execute()
-    logger.info("리밸런싱 전략 실행 완료.")
+    if accounts:
+        batch.quotation_service = quotation_service
+        batch.journal = journal
+        logger.info("일괄 리밸런싱 실행 시작 (%d계좌)...", len(accounts))
+        summary = batch.run()
+        logger.info("일괄 리밸런싱 실행 완료: 시세 조회 %.1fms, 총 %.1fms", summary["quote_ms"], summary["total_ms"])
+        if realtime_config:
+            quotation_service.stop()
+        for name, result in summary["accounts"].items():
+            logger.info("계좌: %s, %s, 주문 %d건 (%.1fms)%s", name, result["status"], result["orders"],
+                        result["elapsed_ms"], f" - {result['error']}" if result["error"] else "")
+        results = {}
+    else:
+        # 리밸런싱 전략 인스턴스 생성
+        strategy = RebalancingStrategy(config, order_service, quotation_service, portfolio_value, journal=journal)
+
+        logger.info("리밸런싱 전략 실행 시작...")
+        results = strategy.execute()
+        logger.info("리밸런싱 전략 실행 완료.")
+        if realtime_config:
+            quotation_service.stop()
+
+    if journal is not None:
+        journal.close()
+    if client is not None:
+        client.close()
 
     # 각 종목별 주문 결과 출력
-    for symbol, response in results.items():
-        logger.info("종목: %s, 주문 결과: %s", symbol, response)
+    for symbol, result in results.items():
+        logger.info("종목: %s, %s %d주, 주문 결과: %s (%.1fms, 시도 %d회)", symbol, result["side"],
+                    result["quantity"], result["response"], result["latency_ms"], result["attempts"])
+
+    if telemetry.is_enabled():
+        telemetry.flush()
+        spans = telemetry.snapshot()["spans"]
+        for name, stats in sorted(spans.items(), key=lambda item: -item[1]["total_ms"]):
+            logger.info("구간 %s: %d회, 합계 %.1fms, 최대 %.1fms", name, stats["count"], stats["total_ms"], stats["max_ms"])
+
+def _backtest_module(name: str):
+    """backtest 폴더 기준의 평면 import를 사용하는 백테스트 모듈을 불러옵니다."""
+    if BACKTEST_DIR not in sys.path:
+        sys.path.insert(0, BACKTEST_DIR)
+    import importlib
+    return importlib.import_module(name)
+
+def backtest(args) -> None:
+    _backtest_module("rebalancing_backtest").main(args.args)
+
+def sync_data(args) -> None:
+    _backtest_module("data_sync").main(args.args)
+
+def bench(args) -> None:
+    from bench import benchmark
+    sys.exit(benchmark.main(args.args))
+
+def main(argv: list = None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    commands = {"rebalance", "backtest", "sync-data", "bench"}
+    if not argv or (argv[0] not in commands and argv[0] not in ("-h", "--help")):
+        argv.insert(0, "rebalance")
+
+    parser = argparse.ArgumentParser(description="해외주식 포트폴리오 리밸런싱")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebalance_parser = subparsers.add_parser("rebalance", help="실거래 리밸런싱 (기본)")
+    rebalance_parser.add_argument("--config", default="config.yaml", help="설정 파일 경로")
+    rebalance_parser.add_argument("--resume", action="store_true",
+                                  help="주문 저널의 마지막 실행을 이어서 실행 (이미 성공했거나 결과가 불명인 주문은 다시 보내지 않음)")
+    rebalance_parser.set_defaults(func=rebalance)
+    # 나머지 하위 명령의 인자는 각 모듈의 main(argv)이 해석 (예: python main.py bench --repeat 3)
+    for name, func, help_text in (("backtest", backtest, "백테스트 실행"),
+                                  ("sync-data", sync_data, "백테스트 가격 데이터 동기화"),
+                                  ("bench", bench, "벤치마크 실행")):
+        subparser = subparsers.add_parser(name, help=help_text, add_help=False)
+        subparser.set_defaults(func=func)
+
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "rebalance":
+        if extra:
+            parser.error(f"알 수 없는 인자: {' '.join(extra)}")
+    else:
+        args.args = extra
+    args.func(args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from utils import telemetry
+
+# 접근 토큰 발급(/oauth2/tokenP) 응답에 유효 시간이 없을 때 사용할 기본값(초)
+ACCESS_TOKEN_TTL = 86400
+# 실시간 접속키 발급(/oauth2/Approval) 응답에는 유효 시간이 없으므로 하루로 가정
+APPROVAL_KEY_TTL = 86400
+
+class BrokerClient:
+    """
+    OrderService/QuotationService가 함께 사용하는 증권사 API 클라이언트.
+      - keep-alive 연결 풀을 가진 requests 세션 하나를 공유합니다.
+      - REST 요청용 접근 토큰(access_token)과 WebSocket용 실시간 접속키(approval_key)를 필요할 때 발급받아 만료 시각과 함께 디스크에 캐시하고,
+        다음 실행에서는 캐시를 재사용합니다. (증권사의 토큰 발급 횟수 제한에 걸리지 않도록)
+      - 만료 refresh_margin초 전부터는 요청 시점에 미리 새로 발급받습니다.
+    참고: https://apiportal.koreainvestment.com/apiservice/oauth2
+    """
+    def __init__(self, base_url: str, app_key: str, app_secret: str, cache_path: str = ".broker_token.json",
+                 pool_size: int = 16, timeout: float = 5.0, refresh_margin: float = 600.0):
+        """
+        :param base_url: API 기본 URL (예: "https://openapi.koreainvestment.com:9443")
+        :param app_key: 앱 키
+        :param app_secret: 앱 시크릿
+        :param cache_path: 토큰 캐시 파일 경로 (None이면 메모리에만 보관)
+        :param pool_size: 연결 풀 크기 (시세 조회 동시 요청 수 + 동시 주문 수 이상 권장)
+        :param timeout: 토큰 발급 요청 타임아웃(초)
+        :param refresh_margin: 만료 몇 초 전부터 토큰을 새로 발급받을지
+        """
+        self.base_url = base_url
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self.refresh_margin = refresh_margin
+        self.logger = logging.getLogger(__name__)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # 캐시 파일은 앱 키의 해시로 구분 (다른 앱 키로 발급된 토큰은 재사용하지 않음)
+        self._key_id = hashlib.sha256(app_key.encode()).hexdigest()[:16]
+        self._tokens = self._load_cache()  # {"access_token"|"approval_key": {"value", "expires_at"}}
+        self._lock = threading.Lock()
+
+    def access_token(self) -> str:
+        """유효한 접근 토큰을 반환합니다. (만료가 가까우면 새로 발급)"""
+        return self._token("access_token")
+
+    def approval_key(self) -> str:
+        """유효한 실시간 접속키(approval_key)를 반환합니다. (만료가 가까우면 새로 발급)"""
+        return self._token("approval_key")
+
+    def rest_headers(self) -> dict:
+        """REST API 요청 인증 헤더: 접근 토큰(Bearer)과 앱 키/시크릿 (실시간 접속키는 WebSocket 전용)"""
+        return {"authorization": f"Bearer {self.access_token()}", "appkey": self.app_key, "appsecret": self.app_secret}
+
+    def _token(self, kind: str) -> str:
+        with self._lock:
+            cached = self._tokens.get(kind)
+            if cached and cached["expires_at"] - self.refresh_margin > time.time():
+                return cached["value"]
+            value, ttl = self._issue(kind)
+            self._tokens[kind] = {"value": value, "expires_at": time.time() + ttl}
+            self._save_cache()
+            return value
+
+    @telemetry.traced("broker.issue_token")
+    def _issue(self, kind: str) -> tuple:
+        """증권사에서 토큰을 새로 발급받아 (값, 유효 시간(초))을 반환합니다."""
+        self.logger.info(f"{kind} 발급 요청")
+        telemetry.count("token_issued_total", kind=kind)
+        if kind == "access_token":
+            url = f"{self.base_url}/oauth2/tokenP"
+            body = {"grant_type": "client_credentials", "appkey": self.app_key, "appsecret": self.app_secret}
+        else:
+            url = f"{self.base_url}/oauth2/Approval"
+            body = {"grant_type": "client_credentials", "appkey": self.app_key, "secretkey": self.app_secret}
+        response = self.session.post(url, json=body, timeout=self.timeout)
+        telemetry.record_http("oauth", response)
+        response.raise_for_status()
+        data = response.json()
+        if kind not in data:
+            raise RuntimeError(f"{kind} 발급 실패: {data}")
+        ttl = float(data.get("expires_in", ACCESS_TOKEN_TTL)) if kind == "access_token" else APPROVAL_KEY_TTL
+        return data[kind], ttl
+
+    def _load_cache(self) -> dict:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            self.logger.warning(f"토큰 캐시를 읽지 못했습니다: {self.cache_path}")
+            return {}
+        return cache.get(self._key_id, {})
+
+    def _save_cache(self) -> None:
+        """토큰 캐시를 임시 파일에 쓴 뒤 교체합니다. (소유자만 읽을 수 있는 권한)"""
+        if not self.cache_path:
+            return
+        cache = {}
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, encoding="utf-8") as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+        cache[self._key_id] = self._tokens
+        tmp_path = f"{self.cache_path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def close(self) -> None:
+        """세션의 연결 풀을 닫습니다."""
+        self.session.close()
+
+# 모듈 단독 실행 테스트: 로컬 스텁 서버로 토큰 발급/디스크 캐시 재사용/만료 전 재발급 확인
+if __name__ == "__main__":
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    issued = []
+
+    class StubOAuthHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            issued.append(self.path)
+            if self.path.endswith("tokenP"):
+                payload = {"access_token": f"token-{len(issued)}", "expires_in": 86400}
+            else:
+                payload = {"approval_key": f"approval-{len(issued)}"}
+            payload = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOAuthHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "token.json")
+        first = BrokerClient(base_url, "APP_KEY", "APP_SECRET", cache_path)
+        print(first.access_token(), first.approval_key(), first.access_token())
+        # 다음 실행(새 인스턴스)은 디스크 캐시를 사용하므로 발급 요청을 보내지 않음
+        second = BrokerClient(base_url, "APP_KEY", "APP_SECRET", cache_path)
+        print(second.access_token(), second.approval_key(), f"발급 요청 {len(issued)}회")
+        # 만료까지 refresh_margin보다 적게 남으면 미리 재발급
+        second._tokens["access_token"]["expires_at"] = time.time() + 60
+        print(second.access_token(), f"발급 요청 {len(issued)}회")
+        first.close()
+        second.close()
+    server.shutdown()
@@ -1,21 +1,59 @@
 import requests
+from requests.adapters import HTTPAdapter
+from utils import telemetry
+
+# 초당 거래건수 초과 시 증권사가 돌려주는 메시지 코드 (HTTP 429도 같은 코드로 변환)
+THROTTLE_MSG_CD = "EGW00201"
 
 class OrderService:
     """
     해외주식 주문 API 연동 모듈.
     참고: https://apiportal.koreainvestment.com/apiservice/apiservice-oversea-stock-order
     """
-    def __init__(self, base_url: str, token: str, account_id: str):
+    def __init__(self, base_url: str, token: str, account_id: str, pool_size: int = 8, timeout: float = 5.0,
+                 client=None):
         """
         :param base_url: API 기본 URL (예: "https://apiportal.koreainvestment.com/apiservice")
-        :param token: API 접근 토큰(또는 approval_key)
+        :param token: API 접근 토큰(또는 approval_key). client를 주면 무시됩니다.
         :param account_id: 주문에 사용할 계좌 번호
+        :param pool_size: 동시 주문에 사용할 연결 풀 크기 (client를 주면 client의 연결 풀 사용)
+        :param timeout: 요청당 타임아웃(초)
+        :param client: 공유 BrokerClient (세션과 캐시된 접근 토큰을 사용)
         """
         self.base_url = base_url
-        self.token = token
+        self._token = token
         self.account_id = account_id
+        self.timeout = timeout
+        self.client = client
+        if client is not None:
+            self.session = client.session
+        else:
+            # 병렬 주문이 keep-alive 연결을 공유하도록 세션 하나를 사용
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
 
-    def place_order(self, symbol: str, order_type: str, quantity: int, price: float = None) -> dict:
+    def auth_headers(self) -> dict:
+        """
+        요청 인증 헤더를 반환합니다.
+        client가 있으면 접근 토큰(authorization: Bearer)과 appkey/appsecret (만료 전에 자동으로 재발급된 토큰),
+        없으면 생성자에서 받은 token을 approval_key 헤더로 보냅니다.
+        """
+        if self.client is not None:
+            return self.client.rest_headers()
+        return {"approval_key": self._token}
+
+    def _post(self, url: str, body: dict, headers: dict) -> dict:
+        response = self.session.post(url, json=body, headers=headers, timeout=self.timeout)
+        telemetry.record_http("order", response)
+        if response.status_code == 429:
+            return {"rt_cd": "1", "msg_cd": THROTTLE_MSG_CD, "msg1": response.text}
+        return response.json()
+
+    @telemetry.traced("order.place_order")
+    def place_order(self, symbol: str, order_type: str, quantity: int, price: float = None,
+                    side: str = "buy") -> dict:
         """
         해외 주식 주문 실행 함수.
         
@@ -23,10 +61,13 @@ class OrderService:
         :param order_type: 주문 유형 ("market" 또는 "limit")
         :param quantity: 주문 수량
         :param price: 지정가 주문 시 단가 (order_type이 "limit"인 경우 필수)
+        :param side: 매매 구분 ("buy" 또는 "sell")
         :return: API 응답 JSON
         """
+        if side not in ("buy", "sell"):
+            raise ValueError("side는 'buy' 또는 'sell'이어야 합니다.")
         headers = {
-            "approval_key": self.token,
+            **self.auth_headers(),
             "custtype": "P",         # 개인 고객으로 가정
             "tr_type": "1",          # 주문 등록 (등록: "1")
             "content-type": "utf-8"
@@ -43,6 +84,7 @@ class OrderService:
             "orderDetails": {
                 "account": self.account_id,
                 "orderType": order_type,
+                "side": side,
                 "quantity": quantity
             }
         }
@@ -53,9 +95,9 @@ class OrderService:
             body["orderDetails"]["price"] = price
 
         url = f"{self.base_url}/order"  # 실제 주문 API 엔드포인트 (문서 참고 후 수정)
-        response = requests.post(url, json=body, headers=headers)
-        return response.json()
+        return self._post(url, body, headers)
 
+    @telemetry.traced("order.cancel_order")
     def cancel_order(self, order_id: str) -> dict:
         """
         해외 주식 주문 취소 실행 함수.
@@ -64,7 +106,7 @@ class OrderService:
         :return: API 응답 JSON
         """
         headers = {
-            "approval_key": self.token,
+            **self.auth_headers(),
             "custtype": "P",
             "tr_type": "1",  # 주문 취소 관련 거래 ID를 사용 (예시)
             "content-type": "utf-8"
@@ -76,5 +118,64 @@ class OrderService:
             }
         }
         url = f"{self.base_url}/cancel_order"  # 실제 주문 취소 API 엔드포인트 (문서 참고 후 수정)
-        response = requests.post(url, json=body, headers=headers)
-        return response.json()
+        return self._post(url, body, headers)
+
+    @telemetry.traced("order.balance")
+    def _balance_items(self) -> list:
+        """
+        해외 주식 잔고 조회 응답의 output1 목록(보유 종목별 항목)을 반환합니다.
+        조회 실패(rt_cd가 "0"이 아님, 초당 거래건수 초과 포함)나 output1이 없는 응답은 빈 잔고로 보지 않고
+        RuntimeError를 발생시킵니다. (빈 잔고로 처리하면 delta 모드가 보유 종목을 다시 매수함)
+        """
+        headers = {
+            **self.auth_headers(),
+            "custtype": "P",
+            "tr_type": "1",
+            "content-type": "utf-8"
+        }
+        body = {
+            "input": {
+                "tr_id": "TTTS3012R",  # 해외주식 잔고 조회 거래 ID (예시; 실제 값은 문서 확인)
+                "account": self.account_id
+            }
+        }
+        url = f"{self.base_url}/balance"  # 실제 잔고 조회 API 엔드포인트 (문서 참고 후 수정)
+        response = self._post(url, body, headers)
+        if str(response.get("rt_cd")) != "0" or "output1" not in response:
+            raise RuntimeError(f"잔고 조회 실패: {response.get('msg_cd')} {response.get('msg1', response)}")
+        return response["output1"]
+
+    def get_positions(self) -> dict:
+        """
+        해외 주식 잔고(보유 종목 및 수량)를 조회합니다.
+        
+        응답 JSON의 output1 목록에서 종목 코드(ovrs_pdno)와 잔고 수량(ovrs_cblc_qty)을 읽습니다.
+        :return: {종목코드: 보유수량, ...}
+        :raises RuntimeError: 잔고 조회 실패
+        """
+        positions = {}
+        for item in self._balance_items():
+            quantity = int(float(item.get("ovrs_cblc_qty", 0)))
+            if quantity:
+                positions[item["ovrs_pdno"]] = quantity
+        return positions
+
+    def get_position_values(self) -> dict:
+        """
+        해외 주식 잔고의 종목별 평가금액을 조회합니다. (시세 조회 없이 현재 비중을 계산할 때 사용)
+        
+        응답 JSON의 output1 목록에서 종목 코드(ovrs_pdno)와 해외주식 평가금액(ovrs_stck_evlu_amt)을 읽습니다.
+        :return: {종목코드: 평가금액, ...}
+        :raises RuntimeError: 잔고 조회 실패
+        """
+        values = {}
+        for item in self._balance_items():
+            value = float(item.get("ovrs_stck_evlu_amt", 0) or 0)
+            if value:
+                values[item["ovrs_pdno"]] = value
+        return values
+
+    def close(self) -> None:
+        """세션의 연결 풀을 닫습니다. (공유 client의 세션은 client.close()로 닫음)"""
+        if self.client is None:
+            self.session.close()
@@ -1,33 +1,67 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from utils import telemetry
+
+def quote_tr_key(symbol: str) -> str:
+    """
+    시세 조회/실시간 구독에 사용하는 tr_key를 만듭니다.
+    예시: 'D' 접두사로 시세 조회 시, 거래소 구분(NAS: 나스닥)을 사용 (실제 형식은 문서 참고)
+    """
+    return f"DNASA{symbol}"  # "D" + "NAS" + symbol
 
 class QuotationService:
     """
     해외주식 시세 조회 API 연동 모듈.
     참고: https://apiportal.koreainvestment.com/apiservice/apiservice-oversea-stock-quotations
     """
-    def __init__(self, base_url: str, token: str):
+    def __init__(self, base_url: str, token: str, max_concurrency: int = 8, timeout: float = 5.0, client=None):
         """
         :param base_url: API 기본 URL (예: "https://apiportal.koreainvestment.com/apiservice")
-        :param token: API 접근 토큰(또는 approval_key)
+        :param token: API 접근 토큰(또는 approval_key). client를 주면 무시됩니다.
+        :param max_concurrency: get_quotes()에서 동시에 보낼 최대 요청 수 (연결 풀 크기와 동일)
+        :param timeout: 요청당 타임아웃(초)
+        :param client: 공유 BrokerClient (세션과 캐시된 접근 토큰을 사용)
         """
         self.base_url = base_url
-        self.token = token
+        self._token = token
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.client = client
+        if client is not None:
+            self.session = client.session
+        else:
+            # keep-alive 연결을 재사용하기 위한 세션 (요청마다 TCP/TLS 연결을 새로 맺지 않음)
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
 
+    def auth_headers(self) -> dict:
+        """
+        요청 인증 헤더를 반환합니다.
+        client가 있으면 접근 토큰(authorization: Bearer)과 appkey/appsecret (만료 전에 자동으로 재발급된 토큰),
+        없으면 생성자에서 받은 token을 approval_key 헤더로 보냅니다.
+        """
+        if self.client is not None:
+            return self.client.rest_headers()
+        return {"approval_key": self._token}
+
+    @telemetry.traced("quotation.get_quote")
     def get_quote(self, symbol: str) -> dict:
         """
         해외 주식의 현재체결가(시세)를 조회합니다.
-        
+
         :param symbol: 종목 코드 (예: TSLA)
         :return: API 응답 JSON
         """
         headers = {
-            "approval_key": self.token,
+            **self.auth_headers(),
             "custtype": "P",
             "tr_type": "1",
             "content-type": "utf-8"
         }
-        # 예시: 'D' 접두사로 시세 조회 시, 거래소 구분(NAS: 나스닥)을 사용 (실제 형식은 문서 참고)
-        tr_key = f"DNASA{symbol}"  # "D" + "NAS" + symbol
+        tr_key = quote_tr_key(symbol)
 
         body = {
             "input": {
@@ -36,5 +70,32 @@ class QuotationService:
             }
         }
         url = f"{self.base_url}/quotation"  # 실제 시세 조회 API 엔드포인트 (문서 참고 후 수정)
-        response = requests.post(url, json=body, headers=headers)
+        response = self.session.post(url, json=body, headers=headers, timeout=self.timeout)
+        telemetry.record_http("quotation", response)
         return response.json()
+
+    @telemetry.traced("quotation.get_quotes")
+    def get_quotes(self, symbols: list) -> dict:
+        """
+        여러 종목의 현재가를 동시에 조회합니다. (최대 max_concurrency개 요청을 병렬 실행)
+        개별 종목 조회가 실패하면 해당 종목의 값은 {"error": 오류 메시지}가 됩니다.
+
+        :param symbols: 종목 코드 리스트
+        :return: {종목코드: API 응답 JSON, ...}
+        """
+        def fetch(symbol):
+            try:
+                return self.get_quote(symbol)
+            except (requests.RequestException, ValueError) as e:
+                return {"error": str(e)}
+
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(symbols))) as executor:
+            return dict(zip(symbols, executor.map(fetch, symbols)))
+
+    def close(self) -> None:
+        """세션의 연결 풀을 닫습니다. (공유 client의 세션은 client.close()로 닫음)"""
+        if self.client is None:
+            self.session.close()
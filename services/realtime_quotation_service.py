@@ -0,0 +1,264 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import websockets
+from services.quotation_service import quote_tr_key
+from utils import telemetry
+
+# 해외주식 실시간 체결가(HDFSCNT0) 데이터의 필드 수와 위치 (SYMB: 종목코드, LAST: 현재가)
+HDFSCNT0_FIELD_COUNT = 26
+HDFSCNT0_SYMBOL_INDEX = 1
+HDFSCNT0_LAST_INDEX = 11
+
+class RealtimeQuotationService:
+    """
+    해외주식 실시간 시세(WebSocket) 구독 모듈.
+      - 설정된 모든 종목을 하나의 WebSocket 연결로 구독하고, 수신한 체결가를 메모리의 최신가 테이블에 보관합니다.
+      - get_quote()/get_quotes()는 QuotationService와 같은 형태({"price": ...})로 로컬 테이블을 읽으므로
+        RebalancingStrategy의 quotation_service로 그대로 사용할 수 있습니다.
+      - 연결이 끊기면 지수 백오프로 재연결 후 전체 종목을 다시 구독합니다.
+      - stale_after초 이상 갱신되지 않은 시세는 fallback(HTTP QuotationService)으로 조회하거나 오류로 반환합니다.
+    참고: https://apiportal.koreainvestment.com/apiservice/apiservice-oversea-stock-real2
+    """
+    def __init__(self, ws_url: str, token: str, symbols: list, fallback=None,
+                 stale_after: float = 5.0, max_backoff: float = 30.0):
+        """
+        :param ws_url: WebSocket 접속 URL (예: "ws://ops.koreainvestment.com:21000")
+        :param token: 실시간 접속키(approval_key)
+        :param symbols: 구독할 종목 코드 리스트
+        :param fallback: 시세가 없거나 오래된 경우 사용할 HTTP 시세 서비스 (없으면 오류 반환)
+        :param stale_after: 시세를 유효하다고 볼 최대 경과 시간(초)
+        :param max_backoff: 재연결 대기 시간의 최대값(초)
+        """
+        self.ws_url = ws_url
+        self.token = token
+        self.symbols = list(symbols)
+        self.fallback = fallback
+        self.stale_after = stale_after
+        self.max_backoff = max_backoff
+        self.logger = logging.getLogger(__name__)
+        # {종목코드: (현재가, 수신 시각(monotonic))}
+        self._prices = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._loop = None
+        self._stop = None
+        self._thread = None
+
+    def start(self) -> None:
+        """백그라운드 스레드에서 WebSocket 구독을 시작합니다."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._thread_main, name="realtime-quotation", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """구독을 중단하고 백그라운드 스레드가 끝날 때까지 기다립니다."""
+        if self._thread is None:
+            return
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        """
+        모든 종목의 첫 시세를 받을 때까지 기다립니다.
+        :return: timeout 안에 모든 종목 시세를 받았으면 True
+        """
+        return self._ready.wait(timeout)
+
+    def _thread_main(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._stop = asyncio.Event()
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+
+    def _subscribe_message(self, symbol: str) -> str:
+        return json.dumps({
+            "header": {
+                "approval_key": self.token,
+                "custtype": "P",
+                "tr_type": "1",  # 실시간 등록
+                "content-type": "utf-8"
+            },
+            "body": {
+                "input": {
+                    "tr_id": "HDFSCNT0",
+                    "tr_key": quote_tr_key(symbol)
+                }
+            }
+        })
+
+    async def _run(self) -> None:
+        """연결 → 전체 종목 구독 → 수신 루프를 반복하며, 끊기면 백오프 후 재연결합니다."""
+        backoff = 0.5
+        while not self._stop.is_set():
+            try:
+                async with websockets.connect(self.ws_url) as ws:
+                    for symbol in self.symbols:
+                        await ws.send(self._subscribe_message(symbol))
+                    backoff = 0.5
+                    await self._receive(ws)
+            except (OSError, websockets.WebSocketException) as e:
+                self.logger.warning(f"실시간 시세 연결 끊김: {e}, {backoff:.1f}초 후 재연결")
+            if self._stop.is_set():
+                break
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _receive(self, ws) -> None:
+        stop_task = asyncio.ensure_future(self._stop.wait())
+        try:
+            while True:
+                recv_task = asyncio.ensure_future(ws.recv())
+                done, _ = await asyncio.wait({recv_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+                if stop_task in done:
+                    recv_task.cancel()
+                    return
+                await self._handle_message(ws, recv_task.result())
+        finally:
+            stop_task.cancel()
+
+    async def _handle_message(self, ws, message: str) -> None:
+        """
+        수신 메시지 처리:
+          - '0|HDFSCNT0|건수|필드^필드^...' 형태의 실시간 데이터는 최신가 테이블에 반영
+            (건수나 현재가를 숫자로 읽을 수 없는 프레임은 경고만 남기고 건너뜀, 수신 루프는 계속 실행)
+          - JSON 메시지 중 PINGPONG은 그대로 돌려보내 연결을 유지
+        """
+        telemetry.count("ws_messages_total")
+        telemetry.count("ws_bytes_total", len(message))
+        if message[:1] in ("0", "1"):
+            parts = message.split("|", 3)
+            if len(parts) < 4 or parts[1] != "HDFSCNT0":
+                return
+            if parts[0] == "1":
+                self.logger.warning("암호화된 실시간 데이터는 지원하지 않습니다: %s", parts[1])
+                return
+            fields = parts[3].split("^")
+            updates = []
+            try:
+                for start in range(0, int(parts[2]) * HDFSCNT0_FIELD_COUNT, HDFSCNT0_FIELD_COUNT):
+                    record = fields[start:start + HDFSCNT0_FIELD_COUNT]
+                    if len(record) <= HDFSCNT0_LAST_INDEX:
+                        break
+                    float(record[HDFSCNT0_LAST_INDEX])  # 현재가가 숫자인지 확인
+                    updates.append((record[HDFSCNT0_SYMBOL_INDEX], record[HDFSCNT0_LAST_INDEX]))
+            except ValueError as e:
+                self.logger.warning("잘못된 실시간 데이터를 건너뜁니다: %s (%r)", e, message[:80])
+                telemetry.count("ws_malformed_total")
+                return
+            received_at = time.monotonic()
+            with self._lock:
+                for symbol, price in updates:
+                    self._prices[symbol] = (price, received_at)
+                if all(symbol in self._prices for symbol in self.symbols):
+                    self._ready.set()
+            return
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return
+        header = payload.get("header") if isinstance(payload, dict) else None
+        if not isinstance(header, dict):
+            # JSON이지만 {"header": {...}} 형태가 아닌 메시지 (리스트, 숫자, null 등)
+            self.logger.warning("알 수 없는 실시간 메시지를 건너뜁니다: %r", message[:80])
+            telemetry.count("ws_malformed_total")
+            return
+        if header.get("tr_id") == "PINGPONG":
+            await ws.send(message)
+
+    def get_quote(self, symbol: str) -> dict:
+        """
+        메모리의 최신가 테이블에서 현재가를 읽습니다. (네트워크 호출 없음)
+        시세가 없거나 stale_after보다 오래되었으면 fallback 서비스로 조회합니다.
+        :param symbol: 종목 코드
+        :return: {"price": 현재가, "age": 경과 시간(초)} 또는 {"error": 오류 메시지}
+        """
+        with self._lock:
+            entry = self._prices.get(symbol)
+        if entry is not None:
+            price, received_at = entry
+            age = time.monotonic() - received_at
+            if age <= self.stale_after:
+                return {"price": price, "age": age}
+        if self.fallback is not None:
+            return self.fallback.get_quote(symbol)
+        return {"error": f"{symbol} 실시간 시세 없음 또는 {self.stale_after}초 이상 갱신되지 않음"}
+
+    def get_quotes(self, symbols: list) -> dict:
+        """
+        여러 종목의 현재가를 메모리에서 읽습니다. 오래된 종목만 fallback으로 일괄 조회합니다.
+        :param symbols: 종목 코드 리스트
+        :return: {종목코드: {"price": ...} 또는 {"error": ...}, ...}
+        """
+        quotes = {}
+        stale = []
+        now = time.monotonic()
+        with self._lock:
+            for symbol in symbols:
+                entry = self._prices.get(symbol)
+                if entry is not None and now - entry[1] <= self.stale_after:
+                    quotes[symbol] = {"price": entry[0], "age": now - entry[1]}
+                else:
+                    stale.append(symbol)
+        if stale:
+            self.logger.warning(f"실시간 시세가 없거나 오래된 종목: {stale}")
+            telemetry.count("realtime_fallback_total", len(stale))
+            if self.fallback is not None and hasattr(self.fallback, "get_quotes"):
+                quotes.update(self.fallback.get_quotes(stale))
+            else:
+                quotes.update({symbol: self.get_quote(symbol) for symbol in stale})
+        return quotes
+
+# 모듈 단독 실행 테스트: 로컬 가짜 WebSocket 서버로 구독/재연결/최신가 조회를 확인
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    def make_frame(symbol: str, price: float) -> str:
+        fields = [""] * HDFSCNT0_FIELD_COUNT
+        fields[HDFSCNT0_SYMBOL_INDEX] = symbol
+        fields[HDFSCNT0_LAST_INDEX] = f"{price:.2f}"
+        return "0|HDFSCNT0|001|" + "^".join(fields)
+
+    async def fake_broker(ws):
+        symbols = []
+        async for message in ws:
+            symbol = json.loads(message)["body"]["input"]["tr_key"][5:]
+            symbols.append(symbol)
+            await ws.send(make_frame(symbol, 100 + len(symbols)))
+            if len(symbols) == 3:
+                break
+        await ws.send(json.dumps({"header": {"tr_id": "PINGPONG"}}))
+        await asyncio.sleep(0.2)
+        await ws.close()  # 연결 끊김 → 클라이언트 재연결 확인
+
+    def serve(ready: threading.Event, port_holder: list):
+        async def main():
+            async with websockets.serve(fake_broker, "127.0.0.1", 0) as server:
+                port_holder.append(server.sockets[0].getsockname()[1])
+                ready.set()
+                await asyncio.sleep(3)
+        asyncio.run(main())
+
+    server_ready = threading.Event()
+    port = []
+    threading.Thread(target=serve, args=(server_ready, port), daemon=True).start()
+    server_ready.wait()
+
+    service = RealtimeQuotationService(f"ws://127.0.0.1:{port[0]}", "DUMMY_APPROVAL_KEY",
+                                       ["TSLA", "JPM", "XOM"], stale_after=2.0)
+    service.start()
+    print("모든 종목 수신:", service.wait_until_ready(timeout=2))
+    print(service.get_quotes(["TSLA", "JPM", "XOM", "PLTR"]))
+    time.sleep(1.5)
+    service.stop()
@@ -0,0 +1,167 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from strategies.rebalancing import RebalancingStrategy
+from utils import telemetry
+from utils.rate_limiter import TokenBucket
+
+# 계좌별 설정에서 전역 config를 덮어쓸 수 있는 항목
+ACCOUNT_OVERRIDE_KEYS = ("stocks", "rebalance", "order")
+
+class QuoteSnapshot:
+    """
+    한 번 조회한 시세를 여러 계좌의 RebalancingStrategy가 공유하도록 감싼 읽기 전용 시세 서비스.
+    get_quote/get_quotes는 네트워크 호출 없이 스냅샷에서 값을 돌려줍니다.
+    """
+    def __init__(self, quotes: dict):
+        """
+        :param quotes: {종목코드: 시세 응답 dict}
+        """
+        self.quotes = quotes
+
+    def get_quote(self, symbol: str) -> dict:
+        return self.quotes.get(symbol, {"error": f"{symbol} 시세 스냅샷에 없음"})
+
+    def get_quotes(self, symbols: list) -> dict:
+        return {symbol: self.get_quote(symbol) for symbol in symbols}
+
+class BatchRebalancer:
+    """
+    여러 계좌(포트폴리오)를 한 번의 시세 조회로 리밸런싱하는 일괄 실행기:
+      - 모든 계좌의 종목 합집합을 quotation_service로 한 번만 조회하여 시세 스냅샷을 만들고,
+      - 계좌마다 그 스냅샷으로 RebalancingStrategy를 실행(주문 수량 산출 + 주문 전송)합니다.
+      - 계좌들은 스레드 풀에서 동시에 실행되며, 한 계좌의 실패(예외)는 해당 계좌 결과에만 기록됩니다.
+      - 모든 계좌가 같은 앱 키로 주문하므로 초당 주문 건수 제한(전역 order.rate_per_sec)은 하나의 TokenBucket을
+        모든 계좌의 OrderDispatcher가 공유하여 지킵니다. (계좌별 order 설정의 rate_per_sec는 사용하지 않음)
+    """
+    def __init__(self, config: dict, accounts: list, quotation_service, order_service_factory,
+                 max_accounts: int = 8, journal=None):
+        """
+        :param config: 전역 설정 dict (계좌 설정에 없는 stocks/rebalance/order 항목의 기본값)
+        :param accounts: 계좌 설정 리스트
+                         (예: [{"name": "A", "account_id": "1234", "portfolio_value": 100000,
+                                "stocks": {...}, "rebalance": {...}, "order": {...}}, ...])
+        :param quotation_service: 시세 조회 서비스 (get_quotes 또는 get_quote 제공)
+        :param order_service_factory: 계좌 설정 dict를 받아 그 계좌의 주문 서비스를 만드는 함수
+        :param max_accounts: 동시에 실행할 최대 계좌 수
+        :param journal: 모든 계좌가 공유하는 주문 저널 (계좌 번호로 leg를 구분)
+        """
+        self.config = config
+        self.accounts = accounts
+        self.quotation_service = quotation_service
+        self.order_service_factory = order_service_factory
+        self.max_accounts = max_accounts
+        self.journal = journal
+        self.rate_limiter = TokenBucket(config.get("order", {}).get("rate_per_sec", 20))
+        self.logger = logging.getLogger(__name__)
+
+    def account_config(self, account: dict) -> dict:
+        """계좌 설정의 stocks/rebalance/order 항목으로 전역 설정을 덮어쓴 전략 설정을 만듭니다."""
+        config = dict(self.config)
+        config.update({key: account[key] for key in ACCOUNT_OVERRIDE_KEYS if key in account})
+        return config
+
+    def symbols(self) -> list:
+        """모든 계좌 종목의 합집합 (처음 등장한 순서 유지)"""
+        symbols = {}
+        for account in self.accounts:
+            for symbol in self.account_config(account).get("stocks", {}):
+                symbols.setdefault(symbol, None)
+        return list(symbols)
+
+    @telemetry.traced("batch.fetch_quotes")
+    def fetch_snapshot(self) -> QuoteSnapshot:
+        """종목 합집합의 시세를 한 번에 조회하여 스냅샷을 만듭니다."""
+        symbols = self.symbols()
+        if hasattr(self.quotation_service, "get_quotes"):
+            quotes = self.quotation_service.get_quotes(symbols)
+        else:
+            quotes = {symbol: self.quotation_service.get_quote(symbol) for symbol in symbols}
+        return QuoteSnapshot(quotes)
+
+    def _run_account(self, account: dict, snapshot: QuoteSnapshot) -> dict:
+        name = account.get("name", account.get("account_id"))
+        started = time.perf_counter()
+        with telemetry.span("batch.account", account=name):
+            try:
+                order_service = self.order_service_factory(account)
+                strategy = RebalancingStrategy(self.account_config(account), order_service, snapshot,
+                                               account["portfolio_value"], journal=self.journal,
+                                               rate_limiter=self.rate_limiter)
+                results = strategy.execute()
+                status, error = "ok", None
+            except Exception as e:
+                self.logger.exception(f"[{name}] 리밸런싱 실패")
+                results, status, error = {}, "error", str(e)
+        return {
+            "status": status,
+            "error": error,
+            "orders": len(results),
+            "results": results,
+            "elapsed_ms": (time.perf_counter() - started) * 1000,
+        }
+
+    @telemetry.traced("batch.run")
+    def run(self) -> dict:
+        """
+        모든 계좌를 리밸런싱합니다.
+        :return: {"symbols": 조회 종목 수, "quote_ms": 시세 조회 시간, "total_ms": 전체 소요 시간,
+                  "accounts": {계좌 이름: {"status", "error", "orders", "results", "elapsed_ms"}}}
+        """
+        started = time.perf_counter()
+        snapshot = self.fetch_snapshot()
+        quote_ms = (time.perf_counter() - started) * 1000
+        self.logger.info(f"시세 스냅샷: {len(snapshot.quotes)}종목, {quote_ms:.1f}ms")
+
+        names = [account.get("name", account.get("account_id")) for account in self.accounts]
+        if len(set(names)) != len(names):
+            raise ValueError("계좌 이름(name 또는 account_id)이 중복되었습니다.")
+        summary = {"symbols": len(snapshot.quotes), "quote_ms": quote_ms, "accounts": {}}
+        if self.accounts:
+            with ThreadPoolExecutor(max_workers=min(self.max_accounts, len(self.accounts))) as executor:
+                futures = {name: executor.submit(self._run_account, account, snapshot)
+                           for name, account in zip(names, self.accounts)}
+                for name, future in futures.items():
+                    summary["accounts"][name] = future.result()
+        summary["total_ms"] = (time.perf_counter() - started) * 1000
+
+        for name, result in summary["accounts"].items():
+            self.logger.info(f"[{name}] {result['status']}: 주문 {result['orders']}건, {result['elapsed_ms']:.1f}ms"
+                             + (f" ({result['error']})" if result["error"] else ""))
+        failed = sum(result["status"] != "ok" for result in summary["accounts"].values())
+        self.logger.info(f"전체 {len(self.accounts)}계좌 (실패 {failed}), 총 {summary['total_ms']:.1f}ms")
+        return summary
+
+# 모듈 단독 실행 테스트: 지연 시간이 있는 목업 서비스로 20개 계좌를 한 번의 시세 조회로 실행
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    latency = 0.05
+    quote_calls = []
+
+    class MockQuotationService:
+        def get_quotes(self, symbols):
+            quote_calls.append(len(symbols))
+            time.sleep(latency)
+            return {symbol: {"price": "100"} for symbol in symbols}
+
+    class MockOrderService:
+        def __init__(self, account):
+            if account["account_id"] == "FAIL":
+                raise ConnectionError("계좌 인증 실패")
+
+        def place_order(self, symbol, order_type, quantity, price=None, side="buy"):
+            time.sleep(latency)
+            return {"rt_cd": "0", "symbol": symbol, "side": side, "quantity": quantity}
+
+    base_config = {"stocks": {"TSLA": 0.2, "JPM": 0.2, "JNJ": 0.2, "PG": 0.2, "PLTR": 0.2},
+                   "order": {"rate_per_sec": 100}}
+    accounts = [{"name": f"acct{i:02d}", "account_id": f"{i:04d}", "portfolio_value": 10000 * (i + 1)}
+                for i in range(19)]
+    accounts.append({"name": "broken", "account_id": "FAIL", "portfolio_value": 10000})
+    accounts[0]["stocks"] = {"AAPL": 0.5, "MSFT": 0.5}
+
+    runner = BatchRebalancer(base_config, accounts, MockQuotationService(), MockOrderService)
+    summary = runner.run()
+    print(f"시세 조회 {len(quote_calls)}회 ({quote_calls[0]}종목), 전체 {summary['total_ms']:.0f}ms")
+    for name, result in list(summary["accounts"].items())[:3] + [("broken", summary["accounts"]["broken"])]:
+        print(name, result["status"], result["orders"], f"{result['elapsed_ms']:.0f}ms", result["error"] or "")
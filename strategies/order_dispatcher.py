@@ -0,0 +1,158 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from services.order_service import THROTTLE_MSG_CD
+from utils import telemetry
+from utils.rate_limiter import TokenBucket
+
+class OrderDispatcher:
+    """
+    주문 병렬 전송기:
+      - 매도 주문을 먼저 모두 보낸 뒤(확보된 현금 활용) 매수 주문을 보냅니다.
+      - 각 단계의 주문은 스레드 풀에서 병렬로 전송되며, order_service의 세션(연결 풀)을 공유합니다.
+      - 토큰 버킷으로 초당 주문 건수를 증권사 TR 제한 이하로 유지합니다.
+      - 초당 거래건수 초과 응답을 받으면 지수 백오프 후 재시도합니다.
+      - journal(OrderJournal)이 있으면 전송 전에 바스켓 전체의 intent를 디스크에 기록하고, 전송/응답을 leg마다 기록합니다.
+        submitted는 place_order 호출 전에 디스크에 반영하므로, 전송 직후 프로세스가 죽어도 그 leg는 결과 불명으로 남습니다.
+        전송 예외(타임아웃, 연결 끊김 등)는 증권사가 주문을 받았는지 알 수 없으므로 결과 불명(in_doubt)으로 기록합니다.
+        이어서 실행(resume)하는 저널이면 계좌, 종목, 매매구분, 수량이 같은 leg 중 이미 성공했거나 결과가 불명인 것은 다시 보내지 않습니다.
+    """
+    def __init__(self, order_service, rate_per_sec: float = 20, max_workers: int = 8,
+                 max_retries: int = 3, backoff: float = 0.2, journal=None, rate_limiter=None):
+        """
+        :param order_service: 주문 서비스 인스턴스 (services/order_service.py)
+        :param rate_per_sec: 초당 최대 주문 건수 (증권사 TR 제한: 실계좌 20, 모의투자 2)
+        :param max_workers: 동시에 전송할 최대 주문 수
+        :param max_retries: 초당 거래건수 초과 시 최대 재시도 횟수
+        :param backoff: 첫 재시도 대기 시간(초), 재시도마다 2배로 증가
+        :param journal: 주문 저널 (strategies/order_journal.py, 없으면 기록하지 않음)
+        :param rate_limiter: 공유 TokenBucket (같은 앱 키로 여러 계좌를 동시에 주문할 때, 없으면 rate_per_sec로 생성)
+        """
+        self.order_service = order_service
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket(rate_per_sec)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.journal = journal
+        # 저널에서 계좌를 구분하는 값 (여러 계좌가 한 저널을 공유할 때)
+        self.account = str(getattr(order_service, "account_id", ""))
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def is_throttled(response) -> bool:
+        """응답이 초당 거래건수 초과(throttling)인지 판별합니다."""
+        return isinstance(response, dict) and response.get("msg_cd") == THROTTLE_MSG_CD
+
+    @classmethod
+    def is_success(cls, response) -> bool:
+        """응답이 정상 접수인지 판별합니다. (전송 예외, 초당 거래건수 초과, rt_cd가 "0"이 아닌 응답은 실패)"""
+        return (isinstance(response, dict) and "error" not in response and not cls.is_throttled(response)
+                and str(response.get("rt_cd", "0")) == "0")
+
+    def _send(self, symbol: str, side: str, quantity: int) -> dict:
+        """
+        주문 한 건을 전송하고 결과와 지연 시간 정보를 반환합니다.
+        :return: {"side", "quantity", "response", "attempts", "submitted_at", "completed_at", "latency_ms"}
+        """
+        submitted_at = time.time()
+        started = time.perf_counter()
+        response = None
+        attempts = 0
+        in_doubt = False
+        for attempt in range(self.max_retries + 1):
+            attempts = attempt + 1
+            if attempt:
+                telemetry.count("order_retries_total", side=side)
+            waited = self.rate_limiter.acquire()
+            if waited:
+                telemetry.count("rate_limit_wait_seconds_total", waited)
+            if self.journal is not None:
+                # 전송 직전 이 한 줄만 바로 디스크에 기록 (다른 leg의 기록은 백그라운드에서 묶어서 처리)
+                self.journal.record_durable("submitted", self.account, symbol, side, quantity, attempt=attempts)
+            try:
+                response = self.order_service.place_order(symbol, order_type="market",
+                                                          quantity=quantity, side=side)
+            except Exception as e:
+                self.logger.error(f"{symbol} {side} 주문 전송 실패: {e}")
+                telemetry.count("order_errors_total", side=side)
+                response = {"error": str(e)}
+                in_doubt = True
+                break
+            if not self.is_throttled(response):
+                break
+            telemetry.count("order_throttled_total")
+            if attempt == self.max_retries:
+                self.logger.warning(f"{symbol} 초당 거래건수 초과, 재시도 횟수({self.max_retries}회)를 모두 사용했습니다.")
+                break
+            delay = self.backoff * (2 ** attempt)
+            self.logger.warning(f"{symbol} 초당 거래건수 초과, {delay:.2f}초 후 재시도 ({attempts}/{self.max_retries})")
+            time.sleep(delay)
+        if self.journal is not None:
+            self.journal.record("response", self.account, symbol, side, quantity,
+                                response=response, ok=self.is_success(response), in_doubt=in_doubt)
+        return {
+            "side": side,
+            "quantity": quantity,
+            "response": response,
+            "attempts": attempts,
+            "submitted_at": submitted_at,
+            "completed_at": time.time(),
+            "latency_ms": (time.perf_counter() - started) * 1000,
+        }
+
+    @telemetry.traced("order.dispatch")
+    def dispatch(self, orders: dict) -> dict:
+        """
+        주문을 매도 → 매수 순서로 병렬 전송합니다.
+        :param orders: {종목코드: 부호 있는 주문 수량} (양수: 매수, 음수: 매도, 0은 무시)
+        :return: {종목코드: _send() 결과 dict, ...}
+        """
+        sells = [(symbol, "sell", -quantity) for symbol, quantity in orders.items() if quantity < 0]
+        buys = [(symbol, "buy", quantity) for symbol, quantity in orders.items() if quantity > 0]
+        results = {}
+        if self.journal is not None:
+            sells = self._pending(sells, results)
+            buys = self._pending(buys, results)
+            for symbol, side, quantity in sells + buys:
+                self.journal.record("intent", self.account, symbol, side, quantity)
+            # 바스켓의 intent는 주문 전송 전에 디스크에 반영 (이후 전송/응답 기록은 백그라운드에서 묶어서 처리)
+            self.journal.flush()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for legs in (sells, buys):
+                futures = {symbol: executor.submit(self._send, symbol, side, quantity)
+                           for symbol, side, quantity in legs}
+                for symbol, future in futures.items():
+                    results[symbol] = future.result()
+                    self.logger.info(f"{symbol} 주문 결과: {results[symbol]['response']} "
+                                     f"({results[symbol]['latency_ms']:.1f}ms)")
+        return results
+
+    def _pending(self, legs: list, results: dict) -> list:
+        """
+        이어서 실행하는 저널에서 이미 성공했거나 결과가 불명인 leg를 걸러냅니다.
+        걸러낸 leg는 이전 기록으로 results에 채웁니다. (attempts 0, skipped에 사유)
+        """
+        pending = []
+        for symbol, side, quantity in legs:
+            status = self.journal.status(self.account, symbol, side, quantity)
+            if status is None:
+                pending.append((symbol, side, quantity))
+                continue
+            previous = self.journal.previous(self.account, symbol, side, quantity)
+            if status == "in_doubt":
+                self.logger.warning(f"{symbol} {side} 주문은 전송 후 응답 기록이 없어 다시 보내지 않습니다. "
+                                    f"잔고를 확인하세요. ({previous['client_order_id']})")
+            else:
+                self.logger.info(f"{symbol} {side} 주문은 이전 실행에서 성공하여 건너뜁니다. ({previous['client_order_id']})")
+            telemetry.count("order_resume_skipped_total", status=status)
+            results[symbol] = {
+                "side": side,
+                "quantity": previous["quantity"],
+                "response": previous.get("response"),
+                "attempts": 0,
+                "submitted_at": previous["time"],
+                "completed_at": previous["time"],
+                "latency_ms": 0.0,
+                "skipped": status,
+            }
+        return pending
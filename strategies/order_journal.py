@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+class OrderJournal:
+    """
+    주문 선기록(write-ahead) 저널. 주문 한 건(leg)마다 다음 이벤트를 JSON-lines 파일에 한 줄씩 추가합니다.
+      - intent: 전송할 주문 (바스켓 전체를 주문 전송 전에 기록하고 flush()로 디스크에 반영)
+      - submitted: place_order 호출 직전 (재시도마다 한 줄, record_durable()로 그 줄만 바로 쓰고 fsync)
+      - response: 증권사 응답과 성공 여부 (전송 예외로 접수 여부를 알 수 없으면 in_doubt=True)
+    record()는 큐에 넣기만 하고, 파일 쓰기는 백그라운드 스레드가 모아서 묶음마다 fsync 한 번만 호출합니다.
+    record_durable()은 큐를 거치지 않고 같은 파일(O_APPEND)에 os.write 한 번과 fsync로 한 줄을 기록하므로,
+    다른 스레드/계좌의 이벤트를 기다리지 않습니다. (전송 지연은 이 한 줄의 fsync뿐)
+    resume=True로 열면 파일의 마지막 실행(run_id)을 이어받아, 이미 성공한 leg와
+    전송했지만 응답을 기록하지 못했거나 전송 예외로 접수 여부를 모르는(결과 불명) leg를 건너뛸 수 있게 합니다.
+    증권사가 거부한 응답(rt_cd가 "0"이 아님, 초당 거래건수 초과)만 확정 실패로 보아 다시 보냅니다.
+    """
+    def __init__(self, path: str = "order_journal.jsonl", resume: bool = False):
+        """
+        :param path: 저널 파일 경로
+        :param resume: True이면 마지막 실행의 run_id와 leg 상태를 불러옴
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self.run_id = None
+        self._completed = {}   # {(계좌, 종목, 매매구분, 수량): response 이벤트}
+        self._in_doubt = {}    # {(계좌, 종목, 매매구분, 수량): submitted 또는 in_doubt response 이벤트}
+        if resume:
+            self._load()
+        if self.run_id is None:
+            self.run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self._queue = queue.Queue()
+        # 백그라운드 스레드와 record_durable()이 함께 쓰는 append 전용 fd (한 번의 os.write는 줄 단위로 섞이지 않음)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._thread = threading.Thread(target=self._writer, name="order-journal", daemon=True)
+        self._thread.start()
+
+    def _load(self) -> None:
+        """저널 파일에서 마지막 run_id의 leg별 최종 상태를 읽습니다. (마지막 줄이 잘렸으면 무시)"""
+        if not os.path.exists(self.path):
+            self.logger.warning(f"이어서 실행할 주문 저널이 없습니다: {self.path}")
+            return
+        events = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    self.logger.warning(f"주문 저널의 손상된 줄을 건너뜁니다: {line[:80]!r}")
+        if not events:
+            return
+        self.run_id = events[-1]["run_id"]
+        for event in events:
+            if event["run_id"] != self.run_id:
+                continue
+            key = (event["account"], event["symbol"], event["side"], event["quantity"])
+            if event["event"] == "submitted":
+                self._in_doubt[key] = event
+            elif event["event"] == "response":
+                if event.get("in_doubt"):
+                    self._in_doubt[key] = event
+                    continue
+                self._in_doubt.pop(key, None)
+                if event["ok"]:
+                    self._completed[key] = event
+        self.logger.info(f"주문 저널 이어서 실행: run_id={self.run_id}, 성공 {len(self._completed)}건, "
+                         f"결과 불명 {len(self._in_doubt)}건")
+
+    @staticmethod
+    def client_order_id(run_id: str, account: str, symbol: str, side: str, quantity: int) -> str:
+        """같은 실행(run_id) 안에서 leg마다 고정된 주문 식별자 (이어서 실행해도 동일)"""
+        return f"{run_id}:{account}:{symbol}:{side}:{quantity}"
+
+    def status(self, account: str, symbol: str, side: str, quantity: int):
+        """
+        이어서 실행할 때의 leg 상태를 반환합니다.
+        수량까지 같은 leg만 같은 주문으로 보므로, 이어서 실행할 때 다시 계산한 주문 수량(delta)이 바뀌었으면
+        새 주문으로 보고 None을 반환합니다.
+        :return: "done"(이미 성공), "in_doubt"(전송 후 응답 기록 없음 또는 전송 예외) 또는 None(전송 필요)
+        """
+        key = (account, symbol, side, quantity)
+        if key in self._completed:
+            return "done"
+        if key in self._in_doubt:
+            return "in_doubt"
+        return None
+
+    def previous(self, account: str, symbol: str, side: str, quantity: int) -> dict:
+        """이전 실행에서 기록된 leg의 마지막 이벤트 (없으면 None)"""
+        key = (account, symbol, side, quantity)
+        return self._completed.get(key) or self._in_doubt.get(key)
+
+    def record(self, event: str, account: str, symbol: str, side: str, quantity: int, **fields) -> None:
+        """
+        이벤트 한 줄을 기록 큐에 넣습니다. (파일 쓰기는 백그라운드 스레드에서 처리)
+        :param event: "intent" | "submitted" | "response"
+        :param fields: 추가 필드 (예: response=응답 dict, ok=성공 여부, in_doubt=결과 불명 여부, attempt=시도 번호)
+        """
+        self._queue.put(self._event(event, account, symbol, side, quantity, fields))
+
+    def record_durable(self, event: str, account: str, symbol: str, side: str, quantity: int, **fields) -> None:
+        """
+        이벤트 한 줄을 큐를 거치지 않고 바로 기록하고 fsync합니다. (큐에 쌓인 다른 이벤트는 기다리지 않음)
+        주문 전송 직전의 submitted처럼, 전송 전에 디스크에 있어야 하는 이벤트에 사용합니다.
+        """
+        line = json.dumps(self._event(event, account, symbol, side, quantity, fields),
+                          ensure_ascii=False, default=str) + "\n"
+        try:
+            self._write(line.encode("utf-8"))
+        except OSError as e:
+            self.logger.error(f"주문 저널 기록 실패: {e}")
+
+    def flush(self) -> None:
+        """지금까지 record()한 이벤트가 모두 디스크에 기록(fsync)될 때까지 기다립니다."""
+        self._queue.join()
+
+    def _event(self, event: str, account: str, symbol: str, side: str, quantity: int, fields: dict) -> dict:
+        return dict(fields, event=event, run_id=self.run_id,
+                    client_order_id=self.client_order_id(self.run_id, account, symbol, side, quantity),
+                    account=account, symbol=symbol, side=side, quantity=quantity, time=time.time())
+
+    def _write(self, data: bytes) -> None:
+        """append fd에 os.write 한 번으로 쓰고 fsync합니다."""
+        while data:
+            data = data[os.write(self._fd, data):]
+        os.fsync(self._fd)
+
+    def _writer(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = None in batch
+            lines = [json.dumps(event, ensure_ascii=False, default=str) + "\n" for event in batch if event is not None]
+            try:
+                if lines:
+                    self._write("".join(lines).encode("utf-8"))
+            except OSError as e:
+                self.logger.error(f"주문 저널 기록 실패: {e}")
+            for _ in batch:
+                self._queue.task_done()
+            if closing:
+                return
+
+    def close(self) -> None:
+        """남은 이벤트를 기록하고 백그라운드 스레드와 파일을 닫습니다."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        os.close(self._fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+# 모듈 단독 실행 테스트: 바스켓 도중 중단된 실행을 이어서 실행하면 성공/결과 불명 leg를 건너뜀
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "journal.jsonl")
+        with OrderJournal(path) as journal:
+            for symbol in ("TSLA", "JPM", "PLTR"):
+                journal.record("intent", "1234", symbol, "buy", 10)
+            journal.flush()
+            journal.record("submitted", "1234", "TSLA", "buy", 10, attempt=1)
+            journal.record("response", "1234", "TSLA", "buy", 10, response={"rt_cd": "0"}, ok=True)
+            journal.record_durable("submitted", "1234", "JPM", "buy", 10, attempt=1)
+            # 여기서 프로세스가 죽었다고 가정 (JPM 응답, PLTR 전송 없음)
+            first_run = journal.run_id
+
+        resumed = OrderJournal(path, resume=True)
+        print(resumed.run_id == first_run, {symbol: resumed.status("1234", symbol, "buy", 10)
+                                            for symbol in ("TSLA", "JPM", "PLTR")})
+        resumed.close()
+
+        # 기록 지연 시간: record()는 큐에 넣기만 함
+        with OrderJournal(path) as journal:
+            started = time.perf_counter()
+            for i in range(1000):
+                journal.record("submitted", "1234", f"SYM{i}", "buy", 1)
+            print(f"record() 호출당 {(time.perf_counter() - started) * 1000:.3f}μs")
@@ -1,5 +1,7 @@
 import math
 import logging
+from strategies.order_dispatcher import OrderDispatcher
+from utils import telemetry
 
 class RebalancingStrategy:
     """
@@ -9,37 +11,56 @@ class RebalancingStrategy:
       - 해외주식 시세 조회 API(quotation_service)를 사용해 현재가를 받아오고,
         목표 투자금액을 현재가로 나눈 후 내림(floor)하여 주문 수량을 계산합니다.
       - 계산된 주문 수량이 0보다 크면, 해외주식 주문 API(order_service)를 통해 시장가 주문을 실행합니다.
+      - config의 rebalance.mode가 "delta"이면 현재 보유 수량(order_service.get_positions())과의
+        차이만큼만 매수/매도하며, 비중 차이(drift_threshold)나 주문 금액(min_notional)이 작은 종목은 건너뜁니다.
+        잔고 조회가 실패하면 빈 잔고로 보지 않고 예외로 실행을 중단합니다.
+        stocks에 없는 보유 종목은 rebalance.sell_untargeted가 true일 때만 전량 매도하고, 아니면 경고만 남깁니다.
+      - config의 rebalance.band가 있으면 잔고 평가금액으로 현재 비중을 먼저 확인하여, 어떤 종목도 band를
+        벗어나지 않았으면 시세 조회와 주문을 모두 건너뜁니다. (달력 + band 혼합 방식은 실행 주기로 정함)
     """
-    def __init__(self, config: dict, order_service, quotation_service, portfolio_value: float):
+    def __init__(self, config: dict, order_service, quotation_service, portfolio_value: float, journal=None,
+                 rate_limiter=None):
         """
         :param config: config.yaml에서 로드한 설정 dict (예: {'stocks': {'TSLA': 0.2, 'JPM': 0.2, ...}})
         :param order_service: 해외주식 주문 API 서비스를 제공하는 인스턴스 (services/order_service.py)
         :param quotation_service: 해외주식 시세 조회 API 서비스를 제공하는 인스턴스 (services/quotation_service.py)
         :param portfolio_value: 전체 포트폴리오 투자금액 (예: 1,000,000)
+        :param journal: 주문 저널 (strategies/order_journal.py, 주문 전송/응답 기록 및 이어서 실행에 사용)
+        :param rate_limiter: 여러 계좌가 공유하는 주문 rate limiter (없으면 config의 order.rate_per_sec로 생성)
         """
         self.config = config
+        self.journal = journal
+        self.rate_limiter = rate_limiter
         self.order_service = order_service
         self.quotation_service = quotation_service
         self.portfolio_value = portfolio_value
+        # 리밸런싱 모드 설정: {"mode": "full" | "delta", "drift_threshold": 비중 차이, "min_notional": 최소 주문 금액,
+        #                     "band": 비중 이탈 허용 폭, "band_mode": "absolute" | "relative",
+        #                     "sell_untargeted": stocks에 없는 보유 종목 전량 매도 여부 (delta 모드)}
+        self.rebalance_config = config.get("rebalance", {})
         self.logger = logging.getLogger(__name__)
         if not self.logger.hasHandlers():
             logging.basicConfig(level=logging.INFO)
 
+    @telemetry.traced("strategy.calculate_orders")
     def calculate_orders(self) -> dict:
         """
         각 종목별 목표 투자금액과 현재 시세를 기반으로 주문할 수량을 산출합니다.
+        시세는 fetch_quotes()로 전체 종목을 한 번에(동시에) 조회합니다.
         
         계산 공식:
             target_quantity = floor((portfolio_value * weight) / current_price)
+        delta 모드에서는 주문 수량 = target_quantity - 현재 보유 수량 (음수면 매도)
         
-        :return: {종목코드: 주문수량, ...}
+        :return: {종목코드: 주문수량, ...} (delta 모드에서는 부호 있는 수량)
         """
-        orders = {}
         stocks_config = self.config.get("stocks", {})
+        quotes = self.fetch_quotes(list(stocks_config))
+        targets = {}
+        prices = {}
         for symbol, weight in stocks_config.items():
             target_investment = self.portfolio_value * weight
-            # 시세 조회 API 호출
-            quote = self.quotation_service.get_quote(symbol)
+            quote = quotes.get(symbol, {})
             try:
                 # 응답 JSON에 'price' 키가 현재가를 담고 있다고 가정합니다.
                 price = float(quote.get("price", 0))
@@ -51,32 +72,127 @@ class RebalancingStrategy:
                 self.logger.error(f"{symbol}의 가격이 유효하지 않습니다: {price}")
                 continue
 
-            quantity = math.floor(target_investment / price)
+            targets[symbol] = math.floor(target_investment / price)
+            prices[symbol] = price
+            self.logger.info(
+                f"[{symbol}] 목표 투자금액: ${target_investment:.2f}, 현재가: ${price:.2f}, 목표수량: {targets[symbol]}"
+            )
+
+        if self.rebalance_config.get("mode", "full") == "delta":
+            return self._delta_orders(targets, prices)
+
+        orders = {}
+        for symbol, quantity in targets.items():
             if quantity > 0:
                 orders[symbol] = quantity
-                self.logger.info(
-                    f"[{symbol}] 목표 투자금액: ${target_investment:.2f}, 현재가: ${price:.2f}, 주문수량: {quantity}"
-                )
             else:
-                self.logger.info(f"[{symbol}] 주문 수량이 0입니다. (목표 투자금액 ${target_investment:.2f} / 가격 ${price:.2f})")
+                self.logger.info(f"[{symbol}] 주문 수량이 0입니다. (현재가 ${prices[symbol]:.2f})")
+        return orders
+
+    def _delta_orders(self, targets: dict, prices: dict) -> dict:
+        """
+        현재 보유 수량 대비 목표 수량의 차이(delta)만큼의 주문을 산출합니다.
+        비중 차이가 drift_threshold 미만이거나 주문 금액이 min_notional 미만인 종목은 건너뜁니다.
+        stocks에 없는 보유 종목은 sell_untargeted 설정이 있으면 전량 매도합니다. (시세 조회에 실패한 stocks 종목은 건드리지 않음)
+        
+        :param targets: {종목코드: 목표 수량}
+        :param prices: {종목코드: 현재가}
+        :return: {종목코드: 부호 있는 주문 수량} (양수: 매수, 음수: 매도)
+        :raises RuntimeError: 잔고 조회 실패 (order_service.get_positions)
+        """
+        drift_threshold = self.rebalance_config.get("drift_threshold", 0.0)
+        min_notional = self.rebalance_config.get("min_notional", 0.0)
+        positions = self.order_service.get_positions()
+        orders = {}
+        untargeted = {symbol: held for symbol, held in positions.items()
+                      if symbol not in self.config.get("stocks", {}) and held > 0}
+        if untargeted:
+            if self.rebalance_config.get("sell_untargeted", False):
+                for symbol, held in untargeted.items():
+                    orders[symbol] = -held
+                    self.logger.info(f"[{symbol}] 목표 비중에 없는 보유 종목: 매도 {held}주")
+            else:
+                self.logger.warning(f"목표 비중에 없는 보유 종목은 매도하지 않습니다: {untargeted} "
+                                    f"(rebalance.sell_untargeted: true로 전량 매도)")
+        for symbol, target_quantity in targets.items():
+            price = prices[symbol]
+            held = positions.get(symbol, 0)
+            delta = target_quantity - held
+            notional = abs(delta) * price
+            drift = notional / self.portfolio_value  # 현재 비중과 목표 비중의 차이
+            if delta == 0 or drift < drift_threshold or notional < min_notional:
+                self.logger.info(f"[{symbol}] 보유 {held}주, 목표 {target_quantity}주: 조정 생략 "
+                                 f"(비중 차이 {drift:.2%}, 주문 금액 ${notional:.2f})")
+                continue
+            orders[symbol] = delta
+            self.logger.info(f"[{symbol}] 보유 {held}주 → 목표 {target_quantity}주: {'매수' if delta > 0 else '매도'} {abs(delta)}주")
         return orders
 
+    @telemetry.traced("strategy.needs_rebalance")
+    def needs_rebalance(self) -> bool:
+        """
+        비중 이탈(drift band) 사전 점검: 잔고 평가금액(order_service.get_position_values())으로 계산한
+        현재 비중이 목표 비중에서 band 이상 벗어난 종목이 있는지 확인합니다.
+        백테스트(engine.drift_band_mask)와 같은 기준을 사용합니다.
+            absolute: |현재 비중 - 목표 비중| > band
+            relative: |현재 비중 - 목표 비중| / 목표 비중 > band
+        현재 비중은 보유 종목 평가금액 합계 대비 평가금액입니다. (drift_band_mask와 같이 현재 포트폴리오 가치로 정규화)
+        
+        :return: 리밸런싱이 필요하면 True (band 설정이 없거나 잔고 평가금액을 조회할 수 없으면 항상 True)
+        :raises RuntimeError: 잔고 조회 실패 또는 평가금액이 없는 잔고 (0 비중으로 보고 전량 매수하지 않도록)
+        """
+        band = self.rebalance_config.get("band")
+        if band is None or not hasattr(self.order_service, "get_position_values"):
+            return True
+        relative = self.rebalance_config.get("band_mode", "absolute") == "relative"
+        values = self.order_service.get_position_values()
+        total = sum(values.values())
+        if total <= 0:
+            raise RuntimeError(f"잔고 평가금액이 없어 비중 이탈을 점검할 수 없습니다: {values} "
+                               f"(첫 매수는 rebalance.band 없이 실행)")
+        for symbol, weight in self.config.get("stocks", {}).items():
+            current = values.get(symbol, 0.0) / total
+            deviation = abs(current - weight)
+            if relative and weight > 0:
+                deviation /= weight
+            if deviation > band:
+                self.logger.info(f"[{symbol}] 현재 비중 {current:.2%}, 목표 비중 {weight:.2%}: band 이탈 → 리밸런싱")
+                return True
+        self.logger.info(f"모든 종목이 band({band:.2%}, {'relative' if relative else 'absolute'}) 이내입니다.")
+        return False
+
+    @telemetry.traced("strategy.fetch_quotes")
+    def fetch_quotes(self, symbols: list) -> dict:
+        """
+        종목 시세를 조회합니다. quotation_service가 get_quotes()(일괄 동시 조회)를 제공하면 사용하고,
+        그렇지 않으면 get_quote()를 종목별로 호출합니다.
+        
+        :param symbols: 종목 코드 리스트
+        :return: {종목코드: 시세 응답 dict, ...}
+        """
+        if hasattr(self.quotation_service, "get_quotes"):
+            return self.quotation_service.get_quotes(symbols)
+        return {symbol: self.quotation_service.get_quote(symbol) for symbol in symbols}
+
+    @telemetry.traced("strategy.execute")
     def execute(self) -> dict:
         """
         리밸런싱 전략 실행:
-          - calculate_orders()를 통해 산출된 주문 수량에 대해, 시장가 주문을 실행합니다.
+          - needs_rebalance()가 False이면 (모든 종목이 band 이내) 시세 조회/주문 없이 빈 결과를 반환합니다.
+          - calculate_orders()를 통해 산출된 주문 수량에 대해, OrderDispatcher로 시장가 주문을 병렬 실행합니다.
+          - 초당 주문 건수 제한/재시도 설정은 config의 order 항목(rate_per_sec, max_workers, max_retries, backoff)을 따릅니다.
         
-        :return: {종목코드: API 주문 응답, ...}
+        :return: {종목코드: {"side", "quantity", "response", "attempts", "submitted_at", "completed_at", "latency_ms"}, ...}
+                 (이어서 실행하는 저널로 건너뛴 주문에는 "skipped": "done" | "in_doubt"가 추가됨)
         """
+        if not self.needs_rebalance():
+            self.logger.info("비중 이탈이 없어 리밸런싱을 건너뜁니다.")
+            return {}
         orders_to_place = self.calculate_orders()
-        results = {}
-        for symbol, quantity in orders_to_place.items():
-            self.logger.info(f"시장가 주문 실행: {symbol}, 수량 {quantity}")
-            # 주문 서비스의 place_order()를 통해 주문 실행 (order_type은 "market"으로 지정)
-            order_response = self.order_service.place_order(symbol, order_type="market", quantity=quantity)
-            results[symbol] = order_response
-            self.logger.info(f"{symbol} 주문 결과: {order_response}")
-        return results
+        dispatcher = OrderDispatcher(self.order_service, journal=self.journal, rate_limiter=self.rate_limiter,
+                                     **self.config.get("order", {}))
+        self.logger.info(f"시장가 주문 실행: {orders_to_place}")
+        return dispatcher.dispatch(orders_to_place)
 
 # 만약 이 모듈을 단독으로 실행한다면, 아래와 같이 간단한 테스트를 할 수 있습니다.
 if __name__ == "__main__":
@@ -93,7 +209,9 @@ if __name__ == "__main__":
     # 주문/시세 서비스 인스턴스는 실제 API 호출 모듈을 사용하여 생성해야 합니다.
     # 여기서는 목업(mock) 예시로 간단한 람다 함수를 사용합니다.
     mock_order_service = type("MockOrderService", (), {
-        "place_order": lambda self, symbol, order_type, quantity, price=None: {"symbol": symbol, "order_type": order_type, "quantity": quantity, "status": "success"}
+        "place_order": lambda self, symbol, order_type, quantity, price=None, side="buy": {"symbol": symbol, "order_type": order_type, "side": side, "quantity": quantity, "status": "success"},
+        "get_positions": lambda self: {"TSLA": 2500, "JPM": 1995, "PG": 2000},  # 현재 보유 수량 가정
+        "get_position_values": lambda self: {"TSLA": 240000, "JPM": 199500, "JNJ": 200000, "PG": 200000, "PLTR": 190000}
     })()
     mock_quotation_service = type("MockQuotationService", (), {
         "get_quote": lambda self, symbol: {"price": "100"}  # 모든 종목의 현재가를 $100으로 가정
@@ -103,3 +221,13 @@ if __name__ == "__main__":
     strategy = RebalancingStrategy(example_config, mock_order_service, mock_quotation_service, portfolio_value)
     order_results = strategy.execute()
     print("주문 결과:", order_results)
+
+    # 보유 수량 대비 차이만 주문하는 delta 모드 (비중 차이 1% 미만은 생략)
+    delta_config = dict(example_config, rebalance={"mode": "delta", "drift_threshold": 0.01})
+    delta_strategy = RebalancingStrategy(delta_config, mock_order_service, mock_quotation_service, portfolio_value)
+    print("delta 주문:", delta_strategy.calculate_orders())
+
+    # 비중 이탈 사전 점검: 5%p band 이내면 시세 조회/주문 없이 건너뜀 (TSLA 24% vs 목표 20%는 이탈 아님)
+    band_config = dict(example_config, rebalance={"band": 0.05})
+    band_strategy = RebalancingStrategy(band_config, mock_order_service, mock_quotation_service, portfolio_value)
+    print("band 점검 결과:", band_strategy.execute())
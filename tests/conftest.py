@@ -0,0 +1,9 @@
+import os
+import sys
+
+# backtest/ 모듈은 backtest 디렉터리에서 실행하는 평면 import(from engine import ...)를 사용하므로
+# 저장소 루트와 backtest/를 모두 import 경로에 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "backtest")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from alignment import align_prices, forward_fill, intersect_sorted, to_epoch, union_sorted
+
+def series(days, values):
+    return pd.Series(values, index=pd.DatetimeIndex([pd.Timestamp('2024-01-01') + pd.Timedelta(days=d) for d in days],
+                                                     name='Date'), dtype=np.float64)
+
+SERIES = {
+    'AAA': series([0, 1, 2, 4], [1.0, 2.0, 3.0, 5.0]),
+    'BBB': series([1, 2, 3, 4, 5], [10.0, 20.0, 30.0, 40.0, 50.0]),
+    'CCC': series([3, 4], [300.0, 400.0]),  # 가장 늦게 상장
+}
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+NAN = np.nan
+
+def days(index):
+    return list((index - pd.Timestamp('2024-01-01')).days)
+
+def test_sorted_set_operations_on_epochs():
+    a, b = np.array([1, 3, 5, 7], dtype=np.int64), np.array([3, 4, 5], dtype=np.int64)
+    assert intersect_sorted([a, b, np.array([5, 9], dtype=np.int64)]).tolist() == [5]
+    assert union_sorted([a, b]).tolist() == [1, 3, 4, 5, 7]
+    # index 단위(us, ns)와 관계없이 ns epoch
+    assert to_epoch(SERIES['CCC'].index).tolist() == [pd.Timestamp('2024-01-04').value, pd.Timestamp('2024-01-05').value]
+
+def test_inner_keeps_common_dates_only():
+    index, matrix = align_prices(SERIES, SYMBOLS, 'inner')
+    assert days(index) == [4]
+    np.testing.assert_array_equal(matrix, [[5.0, 40.0, 400.0]])
+
+def test_outer_trims_to_latest_first_listing():
+    index, matrix = align_prices(SERIES, SYMBOLS, 'outer')
+    # 합집합 0..5 중 CCC가 상장한 3일부터 사용, AAA의 3일/5일과 CCC의 5일은 직전 값으로 채움
+    assert days(index) == [3, 4, 5]
+    np.testing.assert_array_equal(matrix, [[3.0, 30.0, 300.0],
+                                           [5.0, 40.0, 400.0],
+                                           [5.0, 50.0, 400.0]])
+
+def test_listing_keeps_full_calendar_with_nan_before_listing():
+    index, matrix = align_prices(SERIES, SYMBOLS, 'listing')
+    assert days(index) == [0, 1, 2, 3, 4, 5]
+    np.testing.assert_array_equal(matrix, [[1.0, NAN, NAN],
+                                           [2.0, 10.0, NAN],
+                                           [3.0, 20.0, NAN],
+                                           [3.0, 30.0, 300.0],
+                                           [5.0, 40.0, 400.0],
+                                           [5.0, 50.0, 400.0]])
+
+def test_duplicate_and_unsorted_dates_keep_last_value():
+    messy = {'AAA': series([2, 0, 2], [3.0, 1.0, 9.0]), 'BBB': series([0, 2], [10.0, 20.0])}
+    index, matrix = align_prices(messy, ['AAA', 'BBB'], 'inner')
+    assert days(index) == [0, 2]
+    np.testing.assert_array_equal(matrix, [[1.0, 10.0], [9.0, 20.0]])
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        align_prices(SERIES, SYMBOLS, 'left')
+
+def test_forward_fill_in_place():
+    matrix = np.array([[NAN, 1.0], [2.0, NAN], [NAN, NAN], [4.0, 5.0]])
+    result = forward_fill(matrix)
+    assert result is matrix
+    np.testing.assert_array_equal(matrix, [[NAN, 1.0], [2.0, 1.0], [2.0, 1.0], [4.0, 5.0]])
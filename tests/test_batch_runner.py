@@ -0,0 +1,44 @@
+from strategies.batch_runner import BatchRebalancer
+from utils.rate_limiter import TokenBucket
+
+class FakeQuotationService:
+    def __init__(self):
+        self.calls = 0
+
+    def get_quotes(self, symbols):
+        self.calls += 1
+        return {symbol: {"price": "100"} for symbol in symbols}
+
+class FakeOrderService:
+    def __init__(self, account):
+        if account["account_id"] == "FAIL":
+            raise ConnectionError("계좌 인증 실패")
+        self.account_id = account["account_id"]
+
+    def place_order(self, symbol, order_type, quantity, price=None, side="buy"):
+        return {"rt_cd": "0"}
+
+class CountingBucket(TokenBucket):
+    def __init__(self, rate):
+        super().__init__(rate)
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        return super().acquire()
+
+def test_accounts_share_one_quote_snapshot_and_rate_limiter():
+    config = {"stocks": {"AAA": 0.5, "BBB": 0.5}, "order": {"rate_per_sec": 1000}}
+    accounts = [{"name": f"acct{i}", "account_id": str(i), "portfolio_value": 10000} for i in range(4)]
+    accounts.append({"name": "broken", "account_id": "FAIL", "portfolio_value": 10000})
+    accounts[0]["stocks"] = {"CCC": 1.0}
+    quotes = FakeQuotationService()
+    runner = BatchRebalancer(config, accounts, quotes, FakeOrderService)
+    runner.rate_limiter = CountingBucket(1000)
+
+    summary = runner.run()
+    assert quotes.calls == 1 and summary["symbols"] == 3
+    assert summary["accounts"]["broken"]["status"] == "error"
+    orders = sum(result["orders"] for result in summary["accounts"].values())
+    assert orders == 1 + 3 * 2
+    assert runner.rate_limiter.acquired == orders  # 모든 계좌가 같은 limiter로 주문
@@ -0,0 +1,65 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from services.broker_client import BrokerClient
+from services.order_service import OrderService
+from services.quotation_service import QuotationService
+
+@pytest.fixture
+def stub_server():
+    """토큰 발급과 REST 요청을 받아 경로/헤더를 기록하는 로컬 스텁 서버"""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            requests_seen.append((self.path, dict(self.headers)))
+            if self.path.endswith("tokenP"):
+                payload = {"access_token": "ACCESS", "expires_in": 86400}
+            elif self.path.endswith("Approval"):
+                payload = {"approval_key": "APPROVAL"}
+            else:
+                payload = {"rt_cd": "0", "price": "100", "output1": []}
+            payload = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", requests_seen
+    server.shutdown()
+
+def test_rest_calls_send_access_token(tmp_path, stub_server):
+    base_url, requests_seen = stub_server
+    client = BrokerClient(base_url, "APP_KEY", "APP_SECRET", os.path.join(tmp_path, "token.json"))
+    try:
+        OrderService(base_url, None, "1234", client=client).place_order("TSLA", "market", 1)
+        QuotationService(base_url, None, client=client).get_quote("TSLA")
+    finally:
+        client.close()
+
+    paths = [path for path, _ in requests_seen]
+    assert paths == ["/oauth2/tokenP", "/order", "/quotation"]  # REST만 쓰면 approval_key는 발급하지 않음
+    for _, headers in requests_seen[1:]:
+        assert headers["authorization"] == "Bearer ACCESS"
+        assert headers["appkey"] == "APP_KEY" and headers["appsecret"] == "APP_SECRET"
+        assert "approval_key" not in headers
+
+def test_token_cache_is_reused(tmp_path, stub_server):
+    base_url, requests_seen = stub_server
+    cache_path = os.path.join(tmp_path, "token.json")
+    for _ in range(2):
+        client = BrokerClient(base_url, "APP_KEY", "APP_SECRET", cache_path)
+        assert client.access_token() == "ACCESS"
+        client.close()
+    assert [path for path, _ in requests_seen] == ["/oauth2/tokenP"]
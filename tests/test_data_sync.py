@@ -0,0 +1,44 @@
+import functools
+import os
+from datetime import datetime
+import pandas as pd
+import price_store
+from data_sync import fake_provider, missing_ranges, plan_batches, sync_universe
+
+provider = functools.partial(fake_provider, latency=0)
+
+def test_sync_fetches_only_missing_ranges(tmp_path):
+    db_path = os.path.join(tmp_path, 'data.db')
+    universe = [f"S{i:02d}" for i in range(30)]
+
+    first = sync_universe(universe, db_path, provider, max_workers=4, batch_size=8, today=datetime(2024, 3, 1, 12))
+    assert sorted(first['symbol']) == universe
+    assert first['error'].isna().all() and (first['rows'] > 0).all()
+    # 이미 최신이면 요청하지 않음
+    assert sync_universe(universe, db_path, provider, today=datetime(2024, 3, 1, 12)).empty
+
+    second = sync_universe(universe, db_path, provider, today=datetime(2024, 3, 8, 12))
+    assert set(second['start']) == {'2024-03-01'} and set(second['end']) == {'2024-03-07'}
+    conn = price_store.connect(db_path)
+    try:
+        assert set(price_store.last_dates(conn, universe).values()) == {'2024-03-07'}
+        assert missing_ranges(conn, universe, datetime(2024, 3, 8, 12)) == {}
+    finally:
+        conn.close()
+
+def test_provider_failure_is_reported_per_symbol(tmp_path):
+    def failing(symbols, start_date, end_date):
+        if 'BAD' in symbols:
+            raise ConnectionError("rate limited")
+        return provider(symbols, start_date, end_date)
+
+    result = sync_universe(['AAA', 'BAD'], os.path.join(tmp_path, 'data.db'), failing, batch_size=1,
+                           today=datetime(2024, 3, 1, 12)).set_index('symbol')
+    assert pd.isna(result.loc['AAA', 'error']) and result.loc['AAA', 'rows'] > 0
+    assert result.loc['BAD', 'error'] == "rate limited" and result.loc['BAD', 'rows'] == 0
+
+def test_plan_batches_groups_by_range():
+    ranges = {'A': ('2024-01-01', '2024-01-31'), 'B': ('2024-01-01', '2024-01-31'), 'C': ('2024-01-15', '2024-01-31')}
+    assert plan_batches(ranges, batch_size=1) == [('2024-01-01', '2024-01-31', ['A']),
+                                                 ('2024-01-01', '2024-01-31', ['B']),
+                                                 ('2024-01-15', '2024-01-31', ['C'])]
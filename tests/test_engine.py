@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from engine import (FREQ_MAP, ExecutionModel, build_price_matrix, rebalance_mask, resolve_freq_alias,
+                    simulate_rebalancing, simulate_rebalancing_batch, simulate_rebalancing_costs)
+from rebalancing_backtest import _loop_rebalancing_simulation
+
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+
+@pytest.fixture(scope="module")
+def market():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2015-01-01', periods=750)
+    data_dict = {symbol: pd.DataFrame({symbol: 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index))))},
+                                      index=index)
+                 for symbol in SYMBOLS}
+    return index, data_dict, build_price_matrix(data_dict, SYMBOLS)
+
+@pytest.mark.parametrize("freq", list(FREQ_MAP))
+@pytest.mark.parametrize("weights", [{'AAA': 0.5, 'BBB': 0.3, 'CCC': 0.2},
+                                     {'AAA': 0.4, 'BBB': 0.3, 'CCC': 0.1}])
+def test_vectorized_matches_loop(market, freq, weights):
+    index, data_dict, prices = market
+    mask = rebalance_mask(index, resolve_freq_alias(freq))
+    expected = _loop_rebalancing_simulation(SYMBOLS, weights, data_dict, index, index[mask], 10000)
+    weight_vector = np.array([weights[symbol] for symbol in SYMBOLS])
+
+    values, _ = simulate_rebalancing(prices, weight_vector, mask, 10000)
+    np.testing.assert_allclose(values, expected, rtol=1e-10)
+    batch = simulate_rebalancing_batch(prices, weight_vector[None, :], mask, 10000)
+    np.testing.assert_allclose(batch[0], expected, rtol=1e-10)
+    frictionless, _ = simulate_rebalancing_costs(prices, weight_vector, mask, 10000,
+                                                 ExecutionModel(whole_shares=False))
+    np.testing.assert_allclose(frictionless[0], expected, rtol=1e-10)
+
+def test_unlisted_symbol_weight_is_redistributed(market):
+    index, _, prices = market
+    prices = prices.copy()
+    prices[:100, 2] = np.nan  # CCC는 100번째 거래일에 상장
+    weight_vector = np.array([0.5, 0.3, 0.2])
+    mask = rebalance_mask(index, 'M')
+    values, shares = simulate_rebalancing(prices, weight_vector, mask, 10000)
+    assert not np.isnan(values).any()
+    assert (shares[:100, 2] == 0).all()
+    # 상장 전에는 AAA, BBB에 5:3으로 전액 투자
+    np.testing.assert_allclose(shares[0, :2] * prices[0, :2], [6250, 3750])
+
+@pytest.mark.parametrize("model", [ExecutionModel(whole_shares=False, commission_bps=10),
+                                   ExecutionModel(whole_shares=False, commission_bps=10, min_fee=1.0, slippage=0.2),
+                                   ExecutionModel(commission_bps=10, min_fee=1.0, slippage=0.2)])
+def test_costs_never_borrow_cash(market, model):
+    index, _, prices = market
+    mask = rebalance_mask(index, 'M')
+    values, ledger = simulate_rebalancing_costs(prices, np.array([0.4, 0.3, 0.3]), mask, 10000, model,
+                                                prices * 1.01, prices * 0.99)
+    assert ledger['cash'].min() >= -1e-6
+    assert ledger['fees'].sum() > 0
+    frictionless, _ = simulate_rebalancing(prices, np.array([0.4, 0.3, 0.3]), mask, 10000)
+    assert values[0, -1] < frictionless[-1]
@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import data_loader
+import price_store
+from evaluator import IncrementalEvaluator
+from rebalancing_backtest import load_aligned_columns
+
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+WEIGHTS = {'AAA': 0.5, 'BBB': 0.3, 'CCC': 0.2}
+
+def ohlcv(index, close):
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000},
+                        index=pd.DatetimeIndex(index, name='Date'))
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(1)
+    index = pd.bdate_range('2023-01-02', periods=260)
+    frames = {}
+    for j, symbol in enumerate(SYMBOLS):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index))))
+        keep = rng.random(len(index)) > 0.1 if j else np.ones(len(index), dtype=bool)
+        frames[symbol] = ohlcv(index[keep], close[keep])
+    # BBB는 두 번째/세 번째 구간의 첫 거래일에 거래가 없고, CCC는 30번째 거래일에 상장
+    frames['BBB'] = frames['BBB'].drop([index[100], index[180]], errors='ignore')
+    frames['CCC'] = frames['CCC'][frames['CCC'].index >= index[30]]
+    return index, frames
+
+@pytest.mark.parametrize("how", ['outer', 'listing'])
+def test_refresh_chunks_match_full_history(tmp_path, monkeypatch, frames, how):
+    monkeypatch.setattr(data_loader, 'download_data', lambda *args, **kwargs: pd.DataFrame())
+    index, frames = frames
+    db_path = os.path.join(tmp_path, 'data.db')
+    state_path = os.path.join(tmp_path, 'state.json')
+
+    conn = price_store.connect(db_path)
+    try:
+        for stop in (100, 180, len(index)):
+            upto = index[stop - 1]
+            price_store.upsert_many(conn, {symbol: df[df.index <= upto] for symbol, df in frames.items()})
+            if stop == 100:
+                evaluator = IncrementalEvaluator(SYMBOLS, WEIGHTS, 10000, 'm', state_path, how)
+            else:
+                evaluator = IncrementalEvaluator.load(state_path)
+            assert evaluator.refresh(db_path) > 0
+    finally:
+        conn.close()
+
+    full_index, matrices = load_aligned_columns(SYMBOLS, how=how, db_path=db_path)
+    full = IncrementalEvaluator(SYMBOLS, WEIGHTS, 10000, 'm', how=how)
+    full.update(full_index, matrices['Close'])
+    expected, actual = full.performance(), IncrementalEvaluator.load(state_path).performance()
+    assert actual['end'] == expected['end']
+    np.testing.assert_allclose([actual['value'], actual['MDD']], [expected['value'], expected['MDD']], rtol=1e-10)
+
+def test_update_forward_fills_from_last_prices():
+    index = pd.bdate_range('2024-01-01', periods=4)
+    prices = np.array([[100.0, 50.0], [101.0, 51.0], [102.0, np.nan], [103.0, 52.0]])
+    full = IncrementalEvaluator(['AAA', 'BBB'], {'AAA': 0.5, 'BBB': 0.5}, 1000, 'm', how='outer')
+    full.update(index, np.array([[100.0, 50.0], [101.0, 51.0], [102.0, 51.0], [103.0, 52.0]]))
+    chunked = IncrementalEvaluator(['AAA', 'BBB'], {'AAA': 0.5, 'BBB': 0.5}, 1000, 'm', how='outer')
+    chunked.update(index[:2], prices[:2])
+    chunked.update(index[2:3], prices[2:3])
+    assert chunked.value == pytest.approx(102 * chunked.shares[0] + 51 * chunked.shares[1])
+    chunked.update(index, prices)
+    assert chunked.value == pytest.approx(full.value) and chunked.max_drawdown == pytest.approx(full.max_drawdown)
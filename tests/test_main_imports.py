@@ -0,0 +1,15 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_main_import_skips_heavy_modules():
+    # 새 프로세스에서 import해야 다른 테스트가 이미 불러온 모듈의 영향을 받지 않음
+    code = ("import json, sys\n"
+            "import main\n"
+            "print(json.dumps(sorted(m for m in ('pandas', 'numpy', 'yfinance', 'websockets') if m in sys.modules)))\n")
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    assert json.loads(output.splitlines()[-1]) == []
@@ -0,0 +1,63 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from engine import rebalance_mask, simulate_rebalancing
+from metrics import METRIC_COLUMNS, StreamingMetrics, compute_metrics, compute_turnover
+
+def test_compute_metrics_matches_hand_computed_series():
+    values = np.array([[100.0, np.nan], [110.0, 100.0], [99.0, 50.0], [121.0, 100.0]])
+    result = compute_metrics(values, names=['A', 'B'], periods_per_year=3)
+
+    returns = [0.1, -0.1, 121 / 99 - 1]
+    mean = sum(returns) / 3
+    std = math.sqrt(sum((r - mean) ** 2 for r in returns) / 2)
+    downside = math.sqrt(0.1 ** 2 / 3)
+    a = result.loc['A']
+    assert a['return'] == pytest.approx(21.0)
+    assert a['CAGR'] == pytest.approx(21.0)  # 수익률 3개 = 1년
+    assert a['volatility'] == pytest.approx(std * math.sqrt(3) * 100)
+    assert a['Sharpe'] == pytest.approx(mean / std * math.sqrt(3))
+    assert a['Sortino'] == pytest.approx(mean / downside * math.sqrt(3))
+    assert a['MDD'] == pytest.approx(-10.0)
+    assert a['MDD_duration'] == 1
+    assert a['turnover'] == 0
+
+    b = result.loc['B']  # 늦게 상장한 시계열: 앞쪽 NaN 제외
+    assert b['return'] == pytest.approx(0.0)
+    assert b['MDD'] == pytest.approx(-50.0)
+    assert b['MDD_duration'] == 1
+    assert list(result.columns) == METRIC_COLUMNS
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 300])
+def test_streaming_metrics_matches_full_series(chunk_size):
+    rng = np.random.default_rng(0)
+    values = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (600, 5)), axis=0))
+    values[:150, 0] = np.nan  # 늦게 상장한 종목
+    streaming = StreamingMetrics(values.shape[1])
+    for start in range(0, len(values), chunk_size):
+        streaming.update(values[start:start + chunk_size])
+    np.testing.assert_allclose(streaming.result().to_numpy(), compute_metrics(values).to_numpy(),
+                               rtol=1e-9, equal_nan=True)
+
+def engine_turnover(prices, weights, mask):
+    """엔진의 보유 수량/현금 변화로 계산한 연환산 회전율(%)"""
+    values, shares = simulate_rebalancing(prices, weights, mask, 1.0)
+    cash = values - np.sum(shares * np.nan_to_num(prices), axis=1)
+    traded = 0.0
+    for t in np.flatnonzero(mask)[1:]:
+        price = np.nan_to_num(prices[t])
+        traded += 0.5 * (np.sum(np.abs(shares[t] - shares[t - 1]) * price) + abs(cash[t] - cash[t - 1])) / values[t]
+    return traded / ((len(prices) - 1) / 252) * 100
+
+@pytest.mark.parametrize("weights", [[0.5, 0.3, 0.2], [0.4, 0.2, 0.1]])
+def test_turnover_matches_engine_trades(weights):
+    rng = np.random.default_rng(1)
+    index = pd.bdate_range('2020-01-01', periods=300)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(index), 3)), axis=0))
+    prices[:70, 2] = np.nan  # 늦게 상장한 종목은 상장 후 첫 리밸런싱부터 편입
+    mask = rebalance_mask(index, 'M')
+    mask[0] = True
+    weights = np.array(weights)
+    turnover = compute_turnover(prices, weights[None, :], mask)
+    assert turnover[0] == pytest.approx(engine_turnover(prices, weights, mask), rel=1e-9)
@@ -0,0 +1,108 @@
+import os
+import shutil
+import pytest
+from services.order_service import THROTTLE_MSG_CD
+from strategies.order_dispatcher import OrderDispatcher
+from strategies.order_journal import OrderJournal
+
+class FakeOrderService:
+    """place_order 호출을 기록하고, 종목별로 지정한 응답(또는 예외)을 돌려주는 목업 주문 서비스"""
+    account_id = "1234"
+
+    def __init__(self, responses=None, on_send=None):
+        self.responses = responses or {}
+        self.on_send = on_send
+        self.calls = []
+
+    def place_order(self, symbol, order_type, quantity, price=None, side="buy"):
+        self.calls.append((symbol, side, quantity))
+        if self.on_send is not None:
+            self.on_send(symbol)
+        response = self.responses.get(symbol, {"rt_cd": "0"})
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+def dispatcher(service, journal=None, **kwargs):
+    kwargs.setdefault("backoff", 0)
+    return OrderDispatcher(service, rate_per_sec=1000, journal=journal, **kwargs)
+
+def test_sells_are_sent_before_buys():
+    service = FakeOrderService()
+    results = dispatcher(service).dispatch({"AAA": 5, "BBB": -3, "CCC": 0})
+    assert service.calls == [("BBB", "sell", 3), ("AAA", "buy", 5)]
+    assert set(results) == {"AAA", "BBB"}
+
+def test_resume_skips_done_and_in_doubt_legs(tmp_path):
+    path = os.path.join(tmp_path, "journal.jsonl")
+    service = FakeOrderService({"AAA": {"rt_cd": "0"},
+                                "BBB": TimeoutError("read timed out"),       # 전송 후 응답을 받지 못함
+                                "CCC": {"rt_cd": "1", "msg1": "주문가능금액 부족"}})  # 증권사 거부 (확정 실패)
+    with OrderJournal(path) as journal:
+        first = dispatcher(service, journal).dispatch({"AAA": 1, "BBB": 1, "CCC": 1})
+    assert first["BBB"]["response"] == {"error": "read timed out"}
+
+    retry = FakeOrderService()
+    with OrderJournal(path, resume=True) as journal:
+        assert [journal.status("1234", symbol, "buy", 1) for symbol in ("AAA", "BBB", "CCC")] == ["done", "in_doubt", None]
+        results = dispatcher(retry, journal).dispatch({"AAA": 1, "BBB": 1, "CCC": 1})
+    assert retry.calls == [("CCC", "buy", 1)]
+    assert results["AAA"]["skipped"] == "done" and results["BBB"]["skipped"] == "in_doubt"
+
+def test_killed_between_send_and_flush_is_not_resent(tmp_path):
+    path = os.path.join(tmp_path, "journal.jsonl")
+    crashed = os.path.join(tmp_path, "crashed.jsonl")
+
+    def crash_after_send(symbol):
+        # HTTP 전송 직후 프로세스가 죽었다면 남아 있을 디스크 내용을 그대로 복사
+        if symbol == "BBB":
+            shutil.copyfile(path, crashed)
+
+    with OrderJournal(path) as journal:
+        dispatcher(FakeOrderService(on_send=crash_after_send), journal, max_workers=1).dispatch(
+            {"AAA": -1, "BBB": 1, "CCC": 1})
+
+    retry = FakeOrderService()
+    with OrderJournal(crashed, resume=True) as journal:
+        assert journal.status("1234", "BBB", "buy", 1) == "in_doubt"
+        dispatcher(retry, journal, max_workers=1).dispatch({"AAA": -1, "BBB": 1, "CCC": 1})
+    assert ("BBB", "buy", 1) not in retry.calls
+    assert ("CCC", "buy", 1) in retry.calls
+
+def test_send_path_does_not_wait_for_the_journal_queue(tmp_path, monkeypatch):
+    path = os.path.join(tmp_path, "journal.jsonl")
+    flushes = []
+    with OrderJournal(path) as journal:
+        monkeypatch.setattr(journal, "flush", lambda: flushes.append(len(service.calls)))
+        service = FakeOrderService()
+        dispatcher(service, journal).dispatch({"AAA": -1, "BBB": 1, "CCC": 1})
+    assert flushes == [0]  # 전송 전 intent flush 한 번뿐
+
+def test_resume_sends_leg_whose_delta_changed(tmp_path):
+    path = os.path.join(tmp_path, "journal.jsonl")
+    with OrderJournal(path) as journal:
+        dispatcher(FakeOrderService({"BBB": TimeoutError("read timed out")}), journal).dispatch({"AAA": 10, "BBB": 5})
+
+    # 이어서 실행할 때 잔고 기준으로 다시 계산한 delta가 달라진 leg는 새 주문
+    retry = FakeOrderService()
+    with OrderJournal(path, resume=True) as journal:
+        assert journal.status("1234", "AAA", "buy", 10) == "done"
+        assert journal.status("1234", "AAA", "buy", 4) is None
+        results = dispatcher(retry, journal).dispatch({"AAA": 4, "BBB": 5})
+    assert retry.calls == [("AAA", "buy", 4)]
+    assert results["BBB"]["skipped"] == "in_doubt" and "skipped" not in results["AAA"]
+
+@pytest.mark.parametrize("response,ok", [({"rt_cd": "0"}, True), ({"rt_cd": "1"}, False),
+                                         ({"rt_cd": "1", "msg_cd": THROTTLE_MSG_CD}, False),
+                                         ({"error": "timeout"}, False), (None, False)])
+def test_is_success(response, ok):
+    assert OrderDispatcher.is_success(response) is ok
+
+def test_throttled_order_backs_off_without_sleeping_after_last_attempt(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("strategies.order_dispatcher.time.sleep", sleeps.append)
+    service = FakeOrderService({"AAA": {"rt_cd": "1", "msg_cd": THROTTLE_MSG_CD}})
+    result = dispatcher(service, max_retries=3, backoff=0.2).dispatch({"AAA": 1})["AAA"]
+    assert result["attempts"] == 4 and len(service.calls) == 4
+    assert sleeps == [0.2, 0.4, 0.8]
+    assert not OrderDispatcher.is_success(result["response"])
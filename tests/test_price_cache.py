@@ -0,0 +1,50 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import price_cache
+import price_store
+
+pytestmark = pytest.mark.skipif(not price_cache.is_available(), reason="pyarrow가 설치되어 있지 않음")
+
+def ohlcv(index, volume):
+    close = np.linspace(100, 110, len(index))
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': volume},
+                        index=pd.DatetimeIndex(index, name='Date'))
+
+@pytest.fixture
+def conn(tmp_path):
+    db_path = os.path.join(tmp_path, 'data.db')
+    conn = price_store.connect(db_path)
+    yield conn, db_path
+    conn.close()
+
+@pytest.mark.parametrize("first_volume,appended_volume", [(1000, np.nan), (np.nan, 1000)])
+def test_append_with_different_volume_dtype(conn, first_volume, appended_volume):
+    conn, db_path = conn
+    index = pd.bdate_range('2024-01-01', periods=30)
+    price_store.upsert_prices(conn, 'AAA', ohlcv(index[:20], first_volume))
+    price_cache.read_symbol(conn, 'AAA', db_path)  # 캐시 생성
+    price_store.upsert_prices(conn, 'AAA', ohlcv(index[20:], appended_volume))
+
+    cached = price_cache.read_symbol(conn, 'AAA', db_path)
+    expected = price_store.read_symbol(conn, 'AAA')
+    assert len(cached) == 30
+    assert (cached.index == expected.index).all()
+    pd.testing.assert_frame_equal(cached.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False)
+    # 다시 읽어도 같은 캐시 사용 (행 수/마지막 날짜가 맞음)
+    table, rows, last_date = price_cache._open_table(price_cache.cache_path(db_path, 'AAA'))
+    assert (rows, last_date) == (30, '2024-02-09') and table.num_rows == 30
+
+def test_open_table_data_outlives_closed_file(conn):
+    conn, db_path = conn
+    index = pd.bdate_range('2024-01-01', periods=10)
+    price_store.upsert_prices(conn, 'AAA', ohlcv(index, 1000))
+    price_cache.read_symbol(conn, 'AAA', db_path)
+    path = price_cache.cache_path(db_path, 'AAA')
+    fd_dir = f"/proc/{os.getpid()}/fd"
+    table, _, _ = price_cache._open_table(path)
+    if os.path.isdir(fd_dir):
+        open_files = {os.path.realpath(os.path.join(fd_dir, fd)) for fd in os.listdir(fd_dir)}
+        assert os.path.realpath(path) not in open_files
+    assert table.column('Close').to_pylist()[-1] == pytest.approx(110)
@@ -0,0 +1,49 @@
+import os
+import sqlite3
+import pandas as pd
+import pytest
+import price_store
+
+def ohlcv(dates, close, volume=100):
+    index = pd.DatetimeIndex(pd.to_datetime(dates), name='Date')
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': volume}, index=index)
+
+@pytest.fixture
+def db_path(tmp_path):
+    return os.path.join(tmp_path, 'prices.db')
+
+def test_legacy_table_is_migrated_once(db_path):
+    legacy = sqlite3.connect(db_path)
+    ohlcv(['2024-01-02', '2024-01-03'], [10.0, 11.0]).to_sql('TSLA', legacy)  # 기존 종목별 테이블
+    legacy.close()
+
+    conn = price_store.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == price_store.SCHEMA_VERSION
+    assert price_store._legacy_tables(conn) == []
+    rows = conn.execute("SELECT symbol, date, close, volume FROM prices ORDER BY date").fetchall()
+    assert rows == [('TSLA', '2024-01-02', 10.0, 100), ('TSLA', '2024-01-03', 11.0, 100)]
+
+    # user_version 이후에는 다시 연결해도 이전하지 않음 (종목별 테이블을 새로 만들어도 그대로 둠)
+    ohlcv(['2024-01-04'], [12.0]).to_sql('JPM', conn)
+    conn.close()
+    conn = price_store.connect(db_path)
+    assert price_store._legacy_tables(conn) == ['JPM']
+    assert conn.execute("SELECT count(*) FROM prices").fetchone()[0] == 2
+    conn.close()
+
+def test_upsert_overwrites_existing_date(db_path):
+    conn = price_store.connect(db_path)
+    assert price_store.upsert_prices(conn, 'TSLA', ohlcv(['2024-01-02', '2024-01-03'], [10.0, 11.0])) == 2
+    price_store.upsert_prices(conn, 'TSLA', ohlcv(['2024-01-03', '2024-01-04'], [11.5, 12.0], volume=200))
+    rows = conn.execute("SELECT date, close, volume FROM prices WHERE symbol = 'TSLA' ORDER BY date").fetchall()
+    assert rows == [('2024-01-02', 10.0, 100), ('2024-01-03', 11.5, 200), ('2024-01-04', 12.0, 200)]
+    conn.close()
+
+def test_last_dates(db_path):
+    conn = price_store.connect(db_path)
+    price_store.upsert_many(conn, {'TSLA': ohlcv(['2024-01-02', '2024-01-05'], [10.0, 11.0]),
+                                   'JPM': ohlcv(['2024-01-03'], [190.0]),
+                                   'EMPTY': ohlcv([], [])})
+    assert price_store.last_dates(conn, ['TSLA', 'JPM', 'EMPTY', 'PLTR']) == {'TSLA': '2024-01-05',
+                                                                           'JPM': '2024-01-03'}
+    conn.close()
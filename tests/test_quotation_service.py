@@ -0,0 +1,67 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from services.quotation_service import QuotationService
+
+LATENCY = 0.1
+
+@pytest.fixture
+def quote_server():
+    """tr_key와 클라이언트 포트(연결)를 기록하고, 지연 후 시세를 돌려주는 로컬 스텁 서버 (BAD 종목은 500)"""
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            tr_key = body["input"]["tr_key"]
+            seen.append((tr_key, self.client_address[1]))
+            time.sleep(LATENCY)  # 네트워크 왕복 지연 흉내
+            if tr_key.endswith("BAD"):
+                payload, status = b"internal error", 500
+            else:
+                payload, status = json.dumps({"tr_key": tr_key, "price": "100"}).encode(), 200
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", seen
+    server.shutdown()
+
+def test_get_quotes_maps_tr_key_and_isolates_failures(quote_server):
+    base_url, seen = quote_server
+    service = QuotationService(base_url, "DUMMY_APPROVAL_KEY", max_concurrency=4)
+    try:
+        quotes = service.get_quotes(["TSLA", "BAD", "JPM"])
+    finally:
+        service.close()
+    assert quotes["TSLA"] == {"tr_key": "DNASATSLA", "price": "100"}
+    assert quotes["JPM"] == {"tr_key": "DNASAJPM", "price": "100"}
+    assert set(quotes["BAD"]) == {"error"}  # 한 종목의 실패가 다른 종목 결과에 영향 없음
+    assert sorted(tr_key for tr_key, _ in seen) == ["DNASABAD", "DNASAJPM", "DNASATSLA"]
+
+def test_get_quotes_runs_concurrently_on_pooled_connections(quote_server):
+    base_url, seen = quote_server
+    symbols = [f"SYM{i}" for i in range(16)]
+    service = QuotationService(base_url, "DUMMY_APPROVAL_KEY", max_concurrency=8)
+    try:
+        started = time.perf_counter()
+        quotes = service.get_quotes(symbols)
+        elapsed = time.perf_counter() - started
+        service.get_quotes(symbols)  # 두 번째 호출은 열려 있는 keep-alive 연결을 재사용
+    finally:
+        service.close()
+    assert [quotes[symbol]["tr_key"] for symbol in symbols] == [f"DNASA{symbol}" for symbol in symbols]
+    assert elapsed < len(symbols) * LATENCY / 2  # 순차 실행이면 1.6초
+    assert len(seen) == 2 * len(symbols)
+    assert len({port for _, port in seen}) <= 8  # 연결 수는 풀 크기(max_concurrency) 이하
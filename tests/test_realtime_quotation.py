@@ -0,0 +1,67 @@
+import asyncio
+import json
+import threading
+import pytest
+import websockets
+from services.realtime_quotation_service import (HDFSCNT0_FIELD_COUNT, HDFSCNT0_LAST_INDEX, HDFSCNT0_SYMBOL_INDEX,
+                                                 RealtimeQuotationService)
+
+def make_frame(*quotes) -> str:
+    fields = []
+    for symbol, price in quotes:
+        record = [""] * HDFSCNT0_FIELD_COUNT
+        record[HDFSCNT0_SYMBOL_INDEX] = symbol
+        record[HDFSCNT0_LAST_INDEX] = price
+        fields.extend(record)
+    return f"0|HDFSCNT0|{len(quotes):03d}|" + "^".join(fields)
+
+def handle(service, message):
+    asyncio.run(service._handle_message(None, message))
+
+def test_parses_multi_record_frame():
+    service = RealtimeQuotationService("ws://unused", "KEY", ["TSLA", "JPM"])
+    handle(service, make_frame(("TSLA", "250.10"), ("JPM", "190.00")))
+    assert service.get_quote("TSLA")["price"] == "250.10"
+    assert service.wait_until_ready(0)
+
+@pytest.mark.parametrize("message", ["0|HDFSCNT0|abc|TSLA", make_frame(("TSLA", "N/A")), "0|HDFSCNT0|1|"])
+def test_malformed_frame_is_skipped(message):
+    service = RealtimeQuotationService("ws://unused", "KEY", ["TSLA"])
+    handle(service, message)
+    assert "error" in service.get_quote("TSLA")
+    handle(service, make_frame(("TSLA", "251.00")))
+    assert service.get_quote("TSLA")["price"] == "251.00"
+
+@pytest.mark.parametrize("message", ["[1, 2]", "5", "null", '"text"', '{"header": 5}'])
+def test_non_object_json_is_skipped(message):
+    service = RealtimeQuotationService("ws://unused", "KEY", ["TSLA"])
+    handle(service, message)
+    handle(service, make_frame(("TSLA", "251.00")))
+    assert service.get_quote("TSLA")["price"] == "251.00"
+
+def test_receive_loop_survives_malformed_frame():
+    ready, port = threading.Event(), []
+
+    async def fake_broker(ws):
+        symbol = json.loads(await ws.recv())["body"]["input"]["tr_key"][5:]
+        await ws.send("0|HDFSCNT0|xx|garbage")
+        await ws.send(make_frame((symbol, "100.00")))
+        await asyncio.sleep(1)
+
+    def serve():
+        async def main():
+            async with websockets.serve(fake_broker, "127.0.0.1", 0) as server:
+                port.append(server.sockets[0].getsockname()[1])
+                ready.set()
+                await asyncio.sleep(2)
+        asyncio.run(main())
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait(2)
+    service = RealtimeQuotationService(f"ws://127.0.0.1:{port[0]}", "KEY", ["TSLA"])
+    service.start()
+    try:
+        assert service.wait_until_ready(timeout=2)
+        assert service.get_quote("TSLA")["price"] == "100.00"
+    finally:
+        service.stop()
@@ -0,0 +1,59 @@
+import pytest
+from services.order_service import THROTTLE_MSG_CD, OrderService
+from strategies.rebalancing import RebalancingStrategy
+
+STOCKS = {"AAA": 0.5, "BBB": 0.5}
+
+class FakeQuotationService:
+    def get_quote(self, symbol):
+        return {"price": "100"}
+
+class BalanceOrderService(OrderService):
+    """잔고 조회(_post) 응답을 지정한 값으로 돌려주는 주문 서비스"""
+    def __init__(self, balance):
+        super().__init__("http://test.invalid", "TOKEN", "1234")
+        self.balance = balance
+
+    def _post(self, url, body, headers):
+        if url.endswith("/balance"):
+            return self.balance
+        return {"rt_cd": "0"}
+
+def holding(symbol, quantity, value=0):
+    return {"ovrs_pdno": symbol, "ovrs_cblc_qty": str(quantity), "ovrs_stck_evlu_amt": str(value)}
+
+@pytest.mark.parametrize("balance", [{"rt_cd": "1", "msg_cd": THROTTLE_MSG_CD, "msg1": "초당 거래건수 초과"},
+                                     {"rt_cd": "1", "msg1": "조회 실패"}, {"rt_cd": "0"}, {}])
+def test_failed_balance_aborts_delta_orders(balance):
+    strategy = RebalancingStrategy({"stocks": STOCKS, "rebalance": {"mode": "delta"}},
+                                   BalanceOrderService(balance), FakeQuotationService(), 10000)
+    with pytest.raises(RuntimeError):
+        strategy.calculate_orders()
+
+def test_delta_orders_from_holdings():
+    balance = {"rt_cd": "0", "output1": [holding("AAA", 40), holding("BBB", 50)]}
+    strategy = RebalancingStrategy({"stocks": STOCKS, "rebalance": {"mode": "delta"}},
+                                   BalanceOrderService(balance), FakeQuotationService(), 10000)
+    assert strategy.calculate_orders() == {"AAA": 10}
+
+@pytest.mark.parametrize("sell_untargeted,expected", [(False, {}), (True, {"OLD": -7})])
+def test_untargeted_holdings(sell_untargeted, expected):
+    balance = {"rt_cd": "0", "output1": [holding("AAA", 50), holding("BBB", 50), holding("OLD", 7)]}
+    config = {"stocks": STOCKS, "rebalance": {"mode": "delta", "sell_untargeted": sell_untargeted}}
+    strategy = RebalancingStrategy(config, BalanceOrderService(balance), FakeQuotationService(), 10000)
+    assert strategy.calculate_orders() == expected
+
+def band_strategy(values, band=0.05):
+    balance = {"rt_cd": "0", "output1": [holding(symbol, 1, value) for symbol, value in values.items()]}
+    return RebalancingStrategy({"stocks": STOCKS, "rebalance": {"band": band}},
+                               BalanceOrderService(balance), FakeQuotationService(), 10000)
+
+def test_band_uses_current_portfolio_value():
+    # 포트폴리오가 두 배가 되어도 비중(50:50)은 그대로이므로 리밸런싱하지 않음
+    assert not band_strategy({"AAA": 10000, "BBB": 10000}).needs_rebalance()
+    assert not band_strategy({"AAA": 2400, "BBB": 2600}).needs_rebalance()
+    assert band_strategy({"AAA": 12000, "BBB": 8000}).needs_rebalance()
+
+def test_band_with_empty_balance_is_an_error():
+    with pytest.raises(RuntimeError):
+        band_strategy({}).needs_rebalance()
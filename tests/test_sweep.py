@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+import rebalancing_backtest
+from engine import rebalance_mask, resolve_freq_alias, simulate_rebalancing
+from sweep import run_parameter_sweep, sweep_price_matrix
+
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+WEIGHTS = np.array([[0.5, 0.3, 0.2], [1.0, 0.0, 0.0], [0.2, 0.2, 0.6], [0.3, 0.3, 0.2], [0.1, 0.8, 0.1]])
+
+@pytest.fixture
+def market():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2020-01-01', periods=260)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(index), len(SYMBOLS))), axis=0))
+    return index, prices
+
+def assert_matches_serial(results, index, prices):
+    assert len(results) == len(WEIGHTS) * 3
+    for row in results.itertuples():
+        weights = WEIGHTS[row.scenario]
+        mask = rebalance_mask(index, resolve_freq_alias(row.rebalance_freq))
+        values, _ = simulate_rebalancing(prices, weights, mask, 10000)
+        np.testing.assert_allclose([getattr(row, symbol) for symbol in SYMBOLS], weights)
+        assert row.final_value == pytest.approx(values[-1], rel=1e-12)
+        assert row.MDD == pytest.approx((values / np.maximum.accumulate(values) - 1).min() * 100, rel=1e-9)
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_sweep_matches_serial_simulation(market, max_workers):
+    index, prices = market
+    # chunk_size=2 → 주기마다 3개 묶음; max_workers=2이면 initializer로 전역 가격/mask를 받은 워커에서 계산
+    results = sweep_price_matrix(prices, index, SYMBOLS, WEIGHTS, ['d', 'w', 'm'], 10000,
+                                 max_workers=max_workers, chunk_size=2)
+    assert_matches_serial(results, index, prices)
+
+def test_run_parameter_sweep_loads_prices_once(market, monkeypatch):
+    index, prices = market
+    calls = []
+
+    def fake_load(symbols, start=None, end=None, how='inner', columns=('Close',), db_path=None):
+        calls.append(list(symbols))
+        return index, {'Close': prices}
+
+    monkeypatch.setattr(rebalancing_backtest, 'load_aligned_columns', fake_load)
+    results = run_parameter_sweep(SYMBOLS, pd.DataFrame(WEIGHTS, columns=SYMBOLS), ['d', 'w', 'm'], 10000,
+                                  max_workers=2, chunk_size=2)
+    assert calls == [SYMBOLS]
+    assert_matches_serial(results, index, prices)
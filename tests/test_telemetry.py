@@ -0,0 +1,86 @@
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+import pytest
+from utils import telemetry
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def outputs(tmp_path):
+    jsonl_path, prometheus_path = os.path.join(tmp_path, "trace.jsonl"), os.path.join(tmp_path, "metrics.prom")
+    telemetry.reset()
+    telemetry.configure(jsonl_path, prometheus_path)
+    yield jsonl_path, prometheus_path
+    telemetry.disable()
+    telemetry.reset()
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_span_counter_and_http_are_exported(outputs):
+    jsonl_path, prometheus_path = outputs
+
+    @telemetry.traced("test.inner")
+    def inner():
+        pass
+
+    with telemetry.span("test.outer", symbols=2):
+        inner()
+        telemetry.count("order_retries_total", side="buy")
+    response = SimpleNamespace(status_code=200, content=b"12345", request=SimpleNamespace(body=b"abc"))
+    telemetry.record_http("order", response)
+    telemetry.flush()
+
+    records = read_jsonl(jsonl_path)
+    spans = [record for record in records if record["type"] == "span"]
+    assert [(span["name"], span["parent"]) for span in spans] == [("test.inner", "test.outer"), ("test.outer", None)]
+    assert spans[1]["attrs"] == {"symbols": 2} and not spans[1]["error"]
+    counters = records[-1]["counters"]
+    assert records[-1]["type"] == "snapshot"
+    assert counters == {'order_retries_total{side="buy"}': 1,
+                        'http_requests_total{service="order",status="200"}': 1,
+                        'http_request_bytes_total{service="order"}': 3,
+                        'http_response_bytes_total{service="order"}': 5}
+
+    with open(prometheus_path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert 'rebalance_span_seconds_count{span="test.outer"} 1' in lines
+    assert 'rebalance_span_errors_total{span="test.inner"} 0' in lines
+    assert "# TYPE rebalance_http_requests_total counter" in lines
+    assert 'rebalance_http_requests_total{service="order",status="200"} 1' in lines
+    assert 'rebalance_http_response_bytes_total{service="order"} 5' in lines
+
+def test_disabled_span_is_noop():
+    assert not telemetry.is_enabled()
+    assert telemetry.span("test.noop") is telemetry.span("test.other")
+    telemetry.count("ignored_total")
+    assert telemetry.snapshot() == {"spans": {}, "counters": {}}
+
+def test_environment_variables_enable_telemetry(tmp_path):
+    jsonl_path, prometheus_path = os.path.join(tmp_path, "trace.jsonl"), os.path.join(tmp_path, "metrics.prom")
+    env = dict(os.environ, TELEMETRY_JSONL=jsonl_path, TELEMETRY_PROMETHEUS=prometheus_path)
+    code = ("from utils import telemetry\n"
+            "assert telemetry.is_enabled()\n"
+            "with telemetry.span('env.span'):\n"
+            "    telemetry.count('env_total', 2)\n")
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, env=env, check=True)
+
+    # 종료 시 atexit flush로 내보냄
+    records = read_jsonl(jsonl_path)
+    assert records[0]["name"] == "env.span"
+    assert records[-1]["counters"] == {"env_total": 2}
+    with open(prometheus_path, encoding="utf-8") as f:
+        assert "rebalance_env_total 2\n" in f.read()
+
+def test_backtest_tracing_shares_module_without_touching_sys_path():
+    code = ("import sys\n"
+            "before = list(sys.path)\n"
+            "import tracing\n"
+            "from utils import telemetry\n"
+            "assert sys.path == before\n"
+            "assert tracing.traced is telemetry.traced\n")
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.join(ROOT_DIR, "backtest"), check=True)
@@ -0,0 +1,79 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import rebalancing_backtest
+from engine import rebalance_mask, resolve_freq_alias, simulate_rebalancing
+from metrics import compute_metrics
+from walk_forward import WINDOW_COLUMNS, rolling_price_matrix, summarize_windows
+
+SYMBOLS = ['AAA', 'BBB', 'CCC', 'DDD']
+
+@pytest.fixture(scope='module')
+def market():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2010-01-01', periods=252 * 5)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (len(index), len(SYMBOLS))), axis=0))
+    return index, prices
+
+@pytest.mark.parametrize("rebalance_freq,start_freq,weights", [
+    ('m', 'm', [0.4, 0.3, 0.2, 0.1]),
+    ('m', 'w', [0.4, 0.3, 0.2, 0.1]),   # 리밸런싱 날짜가 아닌 시작일 (다음 리밸런싱까지 보유 후 이어 붙임)
+    ('w', 'm', [0.3, 0.2, 0.2, 0.1]),   # 비중 합 < 1: 나머지는 현금
+    ('d', 'm', [0.25, 0.25, 0.25, 0.25]),
+])
+def test_windows_match_per_window_resimulation(market, rebalance_freq, start_freq, weights):
+    index, prices = market
+    weights = np.array(weights)
+    results = rolling_price_matrix(prices, index, weights, rebalance_freq, (1, 3), start_freq)
+    assert list(results.columns) == WINDOW_COLUMNS
+    assert set(results['horizon']) == {1, 3}
+
+    for _, row in results.sample(25, random_state=0).iterrows():
+        start, stop = index.get_loc(row['start']), index.get_loc(row['end']) + 1
+        mask = rebalance_mask(index, resolve_freq_alias(rebalance_freq))[start:stop]
+        values, _ = simulate_rebalancing(prices[start:stop], weights, mask, 1.0)  # 시작일에 초기 매수
+        expected = compute_metrics(values, initial_values=1.0).iloc[0]
+        for metric in WINDOW_COLUMNS[3:]:
+            assert row[metric] == pytest.approx(expected[metric], rel=1e-12, abs=1e-12), metric
+
+def test_process_pool_matches_in_process(market):
+    index, prices = market
+    weights = np.array([0.4, 0.3, 0.2, 0.1])
+    serial = rolling_price_matrix(prices, index, weights, 'm', (1, 3), 'w')
+    pooled = rolling_price_matrix(prices, index, weights, 'm', (1, 3), 'w', max_workers=2, chunk_size=16)
+    pd.testing.assert_frame_equal(serial, pooled)
+
+def test_summarize_windows():
+    results = pd.DataFrame({'horizon': [1, 1, 1, 3],
+                            'return': [10.0, 20.0, 30.0, 50.0],
+                            'CAGR': [10.0, 20.0, 30.0, 14.5],
+                            'MDD': [-5.0, -10.0, -15.0, -20.0]})
+    summary = summarize_windows(results)
+    assert list(summary.index) == [1, 3]
+    assert summary.loc[1, ('return', 'count')] == 3
+    assert summary.loc[1, ('return', 'mean')] == pytest.approx(20.0)
+    assert summary.loc[1, ('MDD', 'min')] == -15.0
+    assert summary.loc[1, ('CAGR', '50%')] == 20.0
+    assert summary.loc[1, ('return', '5%')] == pytest.approx(11.0)
+    assert summary.loc[3, ('CAGR', 'max')] == 14.5
+
+def test_rolling_cli(market, tmp_path, monkeypatch, capsys):
+    index, prices = market
+    config_path = os.path.join(tmp_path, 'config.yaml')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write("stocks:\n" + "".join(f"  {symbol}: 0.25\n" for symbol in SYMBOLS))
+    loaded = []
+
+    def fake_load(symbols, start=None, end=None, how='inner', columns=('Close',), db_path=None):
+        loaded.append((list(symbols), how))
+        return index, {'Close': prices}
+
+    monkeypatch.setattr(rebalancing_backtest, 'load_aligned_columns', fake_load)
+    rebalancing_backtest.main(['--config', config_path, '--rolling', '--freq', 'm',
+                               '--horizons', '1', '3', '--start-freq', 'm'])
+    expected = rolling_price_matrix(prices, index, np.full(4, 0.25), 'm', (1, 3), 'm')
+    output = capsys.readouterr().out
+    assert loaded == [(SYMBOLS, 'inner')]
+    assert f"rolling 구간 {len(expected)}개 (시작 간격 m, 기간 [1, 3]년)" in output
+    assert "return" in output and "MDD" in output
@@ -0,0 +1,47 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    스레드 안전한 토큰 버킷 rate limiter.
+    초당 rate개의 토큰이 채워지며, 최대 capacity개까지 쌓입니다.
+    증권사 API의 초당 거래건수(TR) 제한을 넘지 않도록 요청 전에 acquire()를 호출합니다.
+    """
+    def __init__(self, rate: float, capacity: int = None):
+        """
+        :param rate: 초당 허용 요청 수 (예: 실계좌 20, 모의투자 2)
+        :param capacity: 순간적으로 허용할 최대 요청 수 (기본값: rate)
+        """
+        if rate <= 0:
+            raise ValueError("rate는 0보다 커야 합니다.")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        토큰 하나를 얻을 때까지 대기합니다.
+        :return: 대기한 시간(초)
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+# 모듈 단독 실행 테스트
+if __name__ == "__main__":
+    bucket = TokenBucket(rate=5)
+    started = time.monotonic()
+    for i in range(15):
+        bucket.acquire()
+    print(f"15회 acquire (초당 5회 제한): {time.monotonic() - started:.2f}초")
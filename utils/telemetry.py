@@ -0,0 +1,264 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+# 경량 추적/계측 모듈
+#   - span("이름") 컨텍스트 또는 @traced("이름") 데코레이터로 구간 소요 시간을 기록
+#   - count("이름", 값, 라벨=...)로 HTTP 호출 수, 재시도 수, 전송 바이트 등을 누적
+#   - JSON-lines 파일(span마다 한 줄)과 Prometheus 텍스트 파일(flush 시 갱신)로 내보냄
+# configure()를 호출하기 전(비활성 상태)에는 전역 플래그 확인 한 번 외에 아무 일도 하지 않습니다.
+# 환경 변수 TELEMETRY_JSONL / TELEMETRY_PROMETHEUS가 있으면 import 시 자동으로 활성화합니다.
+
+METRIC_PREFIX = "rebalance"
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+_jsonl_file = None
+_prometheus_path = None
+_spans = {}     # {span 이름: [횟수, 합계(초), 최대(초), 오류 횟수]}
+_counters = {}  # {(카운터 이름, ((라벨, 값), ...)): 누적값}
+_atexit_registered = False
+
+class _NoopSpan:
+    """비활성 상태에서 span()이 돌려주는 빈 컨텍스트 (객체를 새로 만들지 않도록 하나만 사용)"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Span:
+    """구간 소요 시간 측정 컨텍스트. 같은 스레드에서 열린 바깥 span을 parent로 기록합니다."""
+    __slots__ = ("name", "attrs", "parent", "started", "wall_started")
+
+    def __init__(self, name: str, attrs: dict = None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.parent = None
+        self.started = 0.0
+        self.wall_started = 0.0
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.wall_started = time.time()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        _local.stack.pop()
+        _record_span(self, duration, exc_type is not None)
+        return False
+
+    def set(self, **attrs) -> None:
+        """span에 속성(예: 종목 코드, 주문 수량)을 추가합니다."""
+        self.attrs.update(attrs)
+
+def configure(jsonl_path: str = None, prometheus_path: str = None) -> None:
+    """
+    계측을 활성화합니다.
+    :param jsonl_path: span/카운터 기록을 한 줄씩 추가할 JSON-lines 파일 경로 (None이면 기록하지 않음)
+    :param prometheus_path: flush() 때 갱신할 Prometheus 텍스트 파일 경로 (node_exporter textfile collector 용)
+    """
+    global _enabled, _jsonl_file, _prometheus_path, _atexit_registered
+    with _lock:
+        if _jsonl_file is not None:
+            _jsonl_file.close()
+        _jsonl_file = open(jsonl_path, "a", encoding="utf-8", buffering=1) if jsonl_path else None
+        _prometheus_path = prometheus_path
+        _enabled = True
+        if not _atexit_registered:
+            atexit.register(flush)
+            _atexit_registered = True
+
+def disable() -> None:
+    """누적된 값을 내보낸 뒤 계측을 끕니다."""
+    global _enabled, _jsonl_file
+    flush()
+    with _lock:
+        _enabled = False
+        if _jsonl_file is not None:
+            _jsonl_file.close()
+            _jsonl_file = None
+
+def is_enabled() -> bool:
+    return _enabled
+
+def reset() -> None:
+    """누적된 span 통계와 카운터를 초기화합니다."""
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+def span(name: str, **attrs):
+    """
+    구간 소요 시간을 기록하는 컨텍스트를 반환합니다. (비활성 상태이면 아무 일도 하지 않는 공용 객체)
+    예: with span("strategy.calculate_orders", symbols=5): ...
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, attrs)
+
+def traced(name: str = None):
+    """
+    함수 호출 전체를 span으로 기록하는 데코레이터. (비활성 상태에서는 원래 함수를 바로 호출)
+    :param name: span 이름 (None이면 함수의 qualname)
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name: str, value: float = 1, **labels) -> None:
+    """
+    카운터를 증가시킵니다. (Prometheus 이름: rebalance_<name>)
+    예: count("http_requests_total", service="order", status="200")
+    """
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def record_http(service: str, response) -> None:
+    """
+    requests 응답 하나에 대한 HTTP 호출 수(상태 코드별)와 요청/응답 바이트를 기록합니다.
+    :param service: 서비스 이름 (예: "quotation", "order")
+    :param response: requests.Response
+    """
+    if not _enabled:
+        return
+    body = getattr(getattr(response, "request", None), "body", None) or b""
+    count("http_requests_total", service=service, status=str(response.status_code))
+    count("http_request_bytes_total", len(body), service=service)
+    count("http_response_bytes_total", len(response.content or b""), service=service)
+
+def _record_span(span_obj: Span, duration: float, error: bool) -> None:
+    with _lock:
+        stats = _spans.get(span_obj.name)
+        if stats is None:
+            stats = _spans[span_obj.name] = [0, 0.0, 0.0, 0]
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] = max(stats[2], duration)
+        stats[3] += int(error)
+        if _jsonl_file is not None:
+            record = {
+                "type": "span",
+                "name": span_obj.name,
+                "start": span_obj.wall_started,
+                "duration_ms": duration * 1000,
+                "parent": span_obj.parent,
+                "thread": threading.current_thread().name,
+                "error": error,
+            }
+            if span_obj.attrs:
+                record["attrs"] = span_obj.attrs
+            _jsonl_file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+def snapshot() -> dict:
+    """
+    현재까지의 span 통계와 카운터를 반환합니다.
+    :return: {'spans': {이름: {'count', 'total_ms', 'max_ms', 'errors'}}, 'counters': {이름{라벨}: 값}}
+    """
+    with _lock:
+        spans = {name: {"count": c, "total_ms": total * 1000, "max_ms": peak * 1000, "errors": errors}
+                 for name, (c, total, peak, errors) in _spans.items()}
+        counters = {_format_key(name, labels): value for (name, labels), value in _counters.items()}
+    return {"spans": spans, "counters": counters}
+
+def _format_key(name: str, labels: tuple) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+def _prometheus_text() -> str:
+    lines = [f"# TYPE {METRIC_PREFIX}_span_seconds summary"]
+    with _lock:
+        spans = sorted(_spans.items())
+        counters = sorted(_counters.items())
+    for name, (c, total, peak, errors) in spans:
+        lines.append(f'{METRIC_PREFIX}_span_seconds_count{{span="{name}"}} {c}')
+        lines.append(f'{METRIC_PREFIX}_span_seconds_sum{{span="{name}"}} {total:.6f}')
+    lines.append(f"# TYPE {METRIC_PREFIX}_span_seconds_max gauge")
+    lines.extend(f'{METRIC_PREFIX}_span_seconds_max{{span="{name}"}} {peak:.6f}' for name, (_, _, peak, _) in spans)
+    lines.append(f"# TYPE {METRIC_PREFIX}_span_errors_total counter")
+    lines.extend(f'{METRIC_PREFIX}_span_errors_total{{span="{name}"}} {errors}' for name, (_, _, _, errors) in spans)
+    typed = set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} counter")
+            typed.add(name)
+        lines.append(f"{METRIC_PREFIX}_{_format_key(name, labels)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+def flush() -> None:
+    """Prometheus 텍스트 파일을 갱신하고(임시 파일에 쓴 뒤 교체), JSON-lines에 카운터 스냅샷을 한 줄 추가합니다."""
+    if not _enabled:
+        return
+    if _prometheus_path:
+        tmp_path = f"{_prometheus_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(_prometheus_text())
+        os.replace(tmp_path, _prometheus_path)
+    if _jsonl_file is not None:
+        record = dict(snapshot(), type="snapshot", time=time.time())
+        with _lock:
+            _jsonl_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+if os.environ.get("TELEMETRY_JSONL") or os.environ.get("TELEMETRY_PROMETHEUS"):
+    configure(os.environ.get("TELEMETRY_JSONL"), os.environ.get("TELEMETRY_PROMETHEUS"))
+
+# 모듈 단독 실행 테스트: 비활성/활성 상태의 오버헤드와 내보내기 형식 확인
+if __name__ == "__main__":
+    import tempfile
+
+    @traced("demo.work")
+    def work(n):
+        return sum(range(n))
+
+    def plain(n):
+        return sum(range(n))
+
+    calls = 200000
+    started = time.perf_counter()
+    for _ in range(calls):
+        plain(10)
+    baseline = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(calls):
+        work(10)
+    print(f"비활성 상태 호출당 추가 시간: {(time.perf_counter() - started - baseline) / calls * 1e9:.0f}ns")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(os.path.join(tmp, "trace.jsonl"), os.path.join(tmp, "metrics.prom"))
+        with span("demo.outer", symbols=3):
+            for _ in range(3):
+                work(1000)
+            count("http_requests_total", service="demo", status="200")
+        flush()
+        with open(os.path.join(tmp, "metrics.prom"), encoding="utf-8") as f:
+            print(f.read())
+        with open(os.path.join(tmp, "trace.jsonl"), encoding="utf-8") as f:
+            print(f.readline().strip())
+        disable()